@@ -1,7 +1,20 @@
 import streamlit as st
-import sqlite3
+import os
+import sys
 from datetime import datetime
-import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'windows'))
+from timetable_grid import get_grid_service
+from admin_tables import get_admin_table_service
+from schema import ensure_schema
+from database import connection
+
+@st.cache_resource
+def migrate_db_once():
+    # Runs once per server process, not on every rerun
+    return ensure_schema()
+
+migrate_db_once()
 
 # Initialize session state variables
 if 'logged_in' not in st.session_state:
@@ -12,19 +25,18 @@ if 'user_data' not in st.session_state:
     st.session_state.user_data = None
 
 def init_db():
-    conn = sqlite3.connect('files/timetable.db')
-    return conn
+    # Borrow a pooled connection; use as `with init_db() as conn:`
+    return connection()
 
 def check_login(user_type, username, password):
-    conn = init_db()
     if user_type == "Student":
-        cursor = conn.execute(f"SELECT PASSW, SECTION, NAME, ROLL FROM STUDENT WHERE SID='{username}'")
-        data = cursor.fetchone()
+        with init_db() as conn:
+            data = conn.execute("SELECT PASSW, SECTION, NAME, ROLL FROM STUDENT WHERE SID=?", (username,)).fetchone()
         if data and data[0] == password:
             return True, {"section": data[1], "name": data[2], "roll": data[3]}
     elif user_type == "Faculty":
-        cursor = conn.execute(f"SELECT PASSW, INI, NAME, EMAIL FROM FACULTY WHERE FID='{username}'")
-        data = cursor.fetchone()
+        with init_db() as conn:
+            data = conn.execute("SELECT PASSW, INI, NAME, EMAIL FROM FACULTY WHERE FID=?", (username,)).fetchone()
         if data and data[0] == password:
             return True, {"ini": data[1], "name": data[2], "email": data[3]}
     elif user_type == "Admin":
@@ -33,68 +45,37 @@ def check_login(user_type, username, password):
     return False, None
 
 def show_timetable(section=None, faculty_ini=None):
-    conn = init_db()
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    periods = range(1, 7)
-    
-    # Create empty DataFrame for timetable
-    timetable = pd.DataFrame(index=days, columns=periods)
-    
-    for day_idx, day in enumerate(days):
-        for period in periods:
-            if section:  # For students
-                cursor = conn.execute(f"""
-                    SELECT SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, FACULTY.NAME 
-                    FROM SCHEDULE 
-                    JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE 
-                    JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI 
-                    WHERE SECTION='{section}' AND DAYID={day_idx} AND PERIODID={period-1}
-                """)
-            else:  # For faculty
-                cursor = conn.execute(f"""
-                    SELECT SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, SCHEDULE.SECTION 
-                    FROM SCHEDULE 
-                    JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE 
-                    WHERE FINI='{faculty_ini}' AND DAYID={day_idx} AND PERIODID={period-1}
-                """)
-            
-            data = cursor.fetchone()
-            if data:
-                if section:
-                    timetable.at[day, period] = f"{data[1]}\n({data[0]})\n{data[2]}"
-                else:
-                    timetable.at[day, period] = f"{data[1]}\n({data[0]})\nSection: {data[2]}"
-            else:
-                timetable.at[day, period] = "No Class"
-    
-    return timetable
+    # Whole week in one query, cached per section/FINI across reruns
+    grid_service = get_grid_service()
+    if section:  # For students
+        return grid_service.get_section_grid(section)
+    return grid_service.get_faculty_grid(faculty_ini)
 
 def show_notifications():
-    conn = init_db()
     current_time = datetime.now()
     day_of_week = current_time.weekday()
     
-    if st.session_state.user_type == "Student":
-        section = st.session_state.user_data["section"]
-        cursor = conn.execute(f"""
-            SELECT SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, FACULTY.NAME, SCHEDULE.PERIODID 
-            FROM SCHEDULE 
-            JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE 
-            JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI 
-            WHERE SECTION='{section}' AND DAYID={day_of_week}
-            ORDER BY PERIODID
-        """)
-    else:
-        faculty_ini = st.session_state.user_data["ini"]
-        cursor = conn.execute(f"""
-            SELECT SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, SCHEDULE.SECTION, SCHEDULE.PERIODID 
-            FROM SCHEDULE 
-            JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE 
-            WHERE FINI='{faculty_ini}' AND DAYID={day_of_week}
-            ORDER BY PERIODID
-        """)
-    
-    classes = cursor.fetchall()
+    with init_db() as conn:
+        if st.session_state.user_type == "Student":
+            section = st.session_state.user_data["section"]
+            cursor = conn.execute("""
+                SELECT SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, FACULTY.NAME, SCHEDULE.PERIODID 
+                FROM SCHEDULE 
+                JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE 
+                JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI 
+                WHERE SECTION=? AND DAYID=?
+                ORDER BY PERIODID
+            """, (section, day_of_week))
+        else:
+            faculty_ini = st.session_state.user_data["ini"]
+            cursor = conn.execute("""
+                SELECT SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, SCHEDULE.SECTION, SCHEDULE.PERIODID 
+                FROM SCHEDULE 
+                JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE 
+                WHERE FINI=? AND DAYID=?
+                ORDER BY PERIODID
+            """, (faculty_ini, day_of_week))
+        classes = cursor.fetchall()
     if classes:
         st.sidebar.markdown("### Today's Classes")
         for class_info in classes:
@@ -111,6 +92,43 @@ def show_notifications():
                 Section: {class_info[2]}
                 """)
 
+def show_admin_table(table):
+    # One page per rerun; the cursors of the pages seen so far allow going back
+    service = get_admin_table_service()
+    col1, col2 = st.columns(2)
+    with col1:
+        search = st.text_input("Search", key=f"{table}_search").strip()
+    section = None
+    if table == 'STUDENT':
+        with col2:
+            section = st.selectbox("Section", ["All"] + service.sections(), key=f"{table}_section")
+        if section == "All":
+            section = None
+
+    # Start from the first page whenever the table or its filters change
+    filters = (table, search, section)
+    if st.session_state.get('admin_filters') != filters:
+        st.session_state.admin_filters = filters
+        st.session_state.admin_cursors = [None]  # after-key of every page up to the current one
+    cursors = st.session_state.admin_cursors
+
+    page, next_cursor = service.get_page(table, after=cursors[-1], search=search, section=section)
+    total = service.count(table, search=search, section=section)
+    pages = max(1, -(-total // service.page_size))
+    st.dataframe(page, use_container_width=True)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.experimental_rerun()
+    with col2:
+        st.markdown(f"Page {len(cursors)} of {pages} ({total} rows)")
+    with col3:
+        if st.button("Next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.experimental_rerun()
+
 # Main Streamlit app
 st.title("Timetable Management System")
 
@@ -147,14 +165,7 @@ else:
     else:  # Admin
         st.markdown("### Admin Dashboard")
         admin_option = st.selectbox("Select Option", ["View All Sections", "View All Faculty"])
-        if admin_option == "View All Sections":
-            conn = init_db()
-            sections = pd.read_sql_query("SELECT * FROM STUDENT", conn)
-            st.dataframe(sections)
-        else:
-            conn = init_db()
-            faculty = pd.read_sql_query("SELECT * FROM FACULTY", conn)
-            st.dataframe(faculty)
+        show_admin_table('STUDENT' if admin_option == "View All Sections" else 'FACULTY')
     
     if st.session_state.user_type in ["Student", "Faculty"]:
         st.markdown("### Your Timetable")
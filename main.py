@@ -1,21 +1,22 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import os, sys
+import sys
 sys.path.insert(0, 'windows/')
-import sqlite3
+from schema import ensure_schema
+from database import connection
+from notification_model import NotificationModel
+from app_shell import get_shell
 
-import time
-import threading
+notifier = NotificationModel()
 
 
 def challenge():
-    conn = sqlite3.connect(r'files/timetable.db')
-
     user = str(combo1.get())
     if user == "Student":
-        cursor = conn.execute(f"SELECT PASSW, SECTION, NAME, ROLL FROM STUDENT WHERE SID='{id_entry.get()}'")
-        cursor = list(cursor)
+        with connection() as conn:
+            cursor = conn.execute("SELECT PASSW, SECTION, NAME, ROLL FROM STUDENT WHERE SID=?", (id_entry.get(),))
+            cursor = list(cursor)
         if len(cursor) == 0:
             messagebox.showwarning('Bad id', 'No such user found!')
         elif passw_entry.get() != cursor[0][0]:
@@ -33,12 +34,14 @@ def challenge():
                 font=('Consolas', 12, 'italic'),
             ).pack()
             m.destroy()
+            import timetable_stud  # Loads the timetable model; only needed after login
             timetable_stud.student_tt_frame(nw, cursor[0][1])
             nw.mainloop()
 
     elif user == "Faculty":
-        cursor = conn.execute(f"SELECT PASSW, INI, NAME, EMAIL FROM FACULTY WHERE FID='{id_entry.get()}'")
-        cursor = list(cursor)
+        with connection() as conn:
+            cursor = conn.execute("SELECT PASSW, INI, NAME, EMAIL FROM FACULTY WHERE FID=?", (id_entry.get(),))
+            cursor = list(cursor)
         if len(cursor) == 0:
             messagebox.showwarning('Bad id', 'No such user found!')
         elif passw_entry.get() != cursor[0][0]:
@@ -56,13 +59,15 @@ def challenge():
                 font=('Consolas', 12, 'italic'),
             ).pack()
             m.destroy()
+            import timetable_fac  # Loads the timetable model; only needed after login
             timetable_fac.fac_tt_frame(nw, cursor[0][1])
             nw.mainloop()
 
     elif user == "Admin":
         if id_entry.get() == 'admin' and passw_entry.get() == 'admin':
-            m.destroy()
-            os.system('python windows\\admin_screen.py')
+            # The admin tools run in this process; it exits when the last one is closed
+            m.withdraw()
+            get_shell(m).open('admin')
         else:
             messagebox.showerror('Bad Input', 'Incorret Username/Password!')
 
@@ -71,6 +76,8 @@ def on_closing(window):
     notifier.stop_notification_service()
     window.destroy()
 
+ensure_schema()  # Create/upgrade tables once at startup
+
 m = tk.Tk()
 
 m.geometry('400x430')
@@ -157,33 +164,3 @@ tk.Button(
 ).pack(pady=10)
 
 m.mainloop()
-
-def notify_after_login(user_id, user_type):
-    """Start notification system after successful login"""
-    notifier = NotificationModel()
-    
-    def check_notifications():
-        while not notifier._stop_flag:
-            notifier.notify_upcoming_class(user_id, user_type)
-            time.sleep(60)  # Check every minute
-    
-    # Stop any existing notification thread
-    if notifier._notification_thread and notifier._notification_thread.is_alive():
-        notifier._stop_flag = True
-        notifier._notification_thread.join()
-    
-    # Reset flag and start new thread
-    notifier._stop_flag = False
-    notifier._notification_thread = threading.Thread(target=check_notifications)
-    notifier._notification_thread.daemon = True
-    notifier._notification_thread.start()
-
-# Modify challenge function to call notify_after_login on successful login
-def challenge():
-    success, user_data = check_login(combo1.get(), user_entry.get(), passw_entry.get())
-    if success:
-        notify_after_login(user_entry.get(), combo1.get())
-        # Rest of login success handling...
-    else:
-        # Login failed handling...
-        pass
@@ -0,0 +1,124 @@
+import os
+import threading
+from database import get_connection
+
+'''
+    ADMIN TABLES
+
+    Paginated, filterable views of STUDENT and FACULTY for the admin
+    dashboard. Pages are read with keyset pagination (WHERE key > last key
+    of the previous page ORDER BY key LIMIT n), which costs the same on the
+    last page as on the first, and only the listed columns are selected, so
+    passwords never leave the database. Row counts and the list of
+    sections are cached until another connection commits (PRAGMA
+    data_version), so a rerun of the dashboard reads one page and nothing
+    else.
+'''
+
+PAGE_SIZE = 50
+
+# Table -> (key column ordering the pages, columns shown, columns the search box matches)
+ADMIN_TABLES = {
+    'STUDENT': ('SID', ['SID', 'NAME', 'ROLL', 'SECTION'], ['SID', 'NAME']),
+    'FACULTY': ('FID', ['FID', 'NAME', 'INI', 'EMAIL', 'SUBCODE1', 'SUBCODE2'], ['FID', 'NAME', 'INI', 'EMAIL']),
+}
+
+
+def _where(table, search=None, section=None):
+    """(WHERE clause terms, params) of the dashboard filters"""
+    _, _, search_columns = ADMIN_TABLES[table]
+    terms, params = [], []
+    if search:
+        terms.append("(" + " OR ".join(f"{column} LIKE ?" for column in search_columns) + ")")
+        params += [f"%{search}%"] * len(search_columns)
+    if section and table == 'STUDENT':
+        terms.append("SECTION = ?")
+        params.append(section)
+    return terms, params
+
+
+class AdminTableService:
+    """
+    Reads one page of an admin table at a time.
+
+    get_page(table, after=...) returns (DataFrame, cursor of the next page
+    or None on the last page); pass the cursor back as after to continue.
+    count() and sections() are cached until the database changes.
+    """
+    def __init__(self, db_path=None, page_size=PAGE_SIZE):
+        if db_path is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            db_path = os.path.join(project_root, 'files', 'timetable.db')
+        self.db_path = db_path
+        self.page_size = page_size
+
+        # Held for the service's lifetime: PRAGMA data_version is per connection
+        self.conn = get_connection(self.db_path)
+        self._lock = threading.Lock()
+        self._cache = {}  # {('count', table, search, section) | ('sections',): value}
+        self._data_version = None
+
+    def get_page(self, table, after=None, search=None, section=None):
+        """One page of table ordered by its key, starting after key value after"""
+        import pandas as pd  # Loaded with the first page, not when the app starts
+        key, columns, _ = ADMIN_TABLES[table]
+        terms, params = _where(table, search, section)
+        if after is not None:
+            terms.append(f"{key} > ?")
+            params.append(after)
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        if terms:
+            query += " WHERE " + " AND ".join(terms)
+        # One row more than a page tells whether there is a next page
+        query += f" ORDER BY {key} LIMIT ?"
+        params.append(self.page_size + 1)
+
+        with self._lock:
+            page = pd.read_sql_query(query, self.conn, params=params)
+        if len(page) > self.page_size:
+            page = page.iloc[:self.page_size]
+            return page, page[key].tolist()[-1]
+        return page, None
+
+    def count(self, table, search=None, section=None):
+        """Number of rows of table matching the filters"""
+        def query():
+            terms, params = _where(table, search, section)
+            sql = f"SELECT COUNT(*) FROM {table}"
+            if terms:
+                sql += " WHERE " + " AND ".join(terms)
+            return self.conn.execute(sql, params).fetchone()[0]
+        return self._cached(('count', table, search or None, section or None), query)
+
+    def sections(self):
+        """Sorted list of the sections students are in"""
+        def query():
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT SECTION FROM STUDENT ORDER BY SECTION")]
+        return self._cached(('sections',), query)
+
+    def _cached(self, cache_key, query):
+        with self._lock:
+            self._check_external_writes()
+            if cache_key not in self._cache:
+                self._cache[cache_key] = query()
+            return self._cache[cache_key]
+
+    def _check_external_writes(self):
+        """Clear the cache if any other connection committed since the last check"""
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_admin_table_service():
+    """Return the process-wide admin table service (created on first use)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AdminTableService()
+        return _service
@@ -0,0 +1,118 @@
+import importlib
+import tkinter as tk
+
+from schema import ensure_schema
+
+'''
+    APP SHELL
+
+    Runs every screen of the application in one process and one Tk
+    interpreter. A screen is a module with an open_window(master, *args)
+    function that builds its window as a Toplevel of the shell's root and
+    returns it. Modules are imported on first use and windows are reused:
+    opening a screen whose window is still open just raises it. Screens
+    share the process' connection pool and timetable model, and the schema
+    is checked once at startup instead of once per window.
+
+    The root is the login window when main.py starts the shell, or a
+    hidden Tk when a screen is run on its own; the shell quits once the
+    root is hidden and its last window has closed.
+'''
+
+# Screen name -> module that provides open_window(master, *args)
+SCREENS = {
+    'admin': 'admin_screen',
+    'subjects': 'subjects',
+    'faculty': 'faculty',
+    'students': 'student',
+    'scheduler': 'scheduler',
+    'timetable_stud': 'timetable_stud',
+    'timetable_fac': 'timetable_fac',
+    'step1': 'step1',
+    'step2': 'step2',
+    'step3': 'step3',
+    'lessons': 'lesson_dialog',
+    'editor': 'timetable_editor_component',
+    'timetable': 'timetable_generator',
+}
+
+
+class AppShell:
+    """
+    Opens screens by name as Toplevels of one root.
+
+    open(name, *args) imports the screen's module on first use and builds
+    its window, or raises the window if it is already open; a reused
+    window with a show(*args) method is given the new arguments.
+    """
+    def __init__(self, root=None):
+        if root is None:
+            root = tk.Tk()
+            root.withdraw()
+        self.root = root
+        self._modules = {}
+        self._windows = {}
+
+    def module(self, name):
+        """The module of a screen, imported on first use"""
+        if name not in self._modules:
+            self._modules[name] = importlib.import_module(SCREENS[name])
+        return self._modules[name]
+
+    def open(self, name, *args):
+        """Show a screen, building its window if it is not open; returns the window"""
+        window = self._windows.get(name)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            window.focus_set()
+            if hasattr(window, 'show'):
+                window.show(*args)
+            return window
+
+        window = self.module(name).open_window(self.root, *args)
+        self._windows[name] = window
+        window.bind("<Destroy>", lambda e, n=name, w=window: self._on_destroy(e, n, w), add="+")
+        return window
+
+    def _on_destroy(self, event, name, window):
+        if event.widget is not window:
+            return  # A child widget was destroyed
+        if self._windows.get(name) is window:
+            del self._windows[name]
+        # Quit once nothing visible is left
+        if not self._windows:
+            try:
+                if self.root.state() == 'withdrawn':
+                    self.root.destroy()
+            except tk.TclError:
+                pass
+
+
+_shell = None
+
+
+def get_shell(root=None):
+    """The process-wide AppShell; root is used only when the shell is created"""
+    global _shell
+    if _shell is None:
+        _shell = AppShell(root)
+    return _shell
+
+
+def open_screen(name, *args):
+    """Open a screen in the process-wide shell"""
+    return get_shell().open(name, *args)
+
+
+def run_standalone(name, module, *args):
+    """
+    Run one screen as the whole application, for modules started as a
+    script. module is the running __main__ module, so it is not imported
+    a second time when other screens open it.
+    """
+    ensure_schema()  # Create/upgrade tables once at startup
+    shell = get_shell()
+    shell._modules.setdefault(name, module)
+    shell.open(name, *args)
+    shell.root.mainloop()
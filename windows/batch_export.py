@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import textwrap
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database import DB_PATH, get_connection, release_connection
+from timetable_model import get_timetable_model
+from timetable_layout import (load_timetable_structure, section_timetable, faculty_timetable,
+                              find_spans, cell_text)
+
+'''
+    BATCH TIMETABLE EXPORT
+
+    Renders the timetable of every section and every faculty member to PNG
+    and/or PDF with Pillow, laid out like the timetable window (the same
+    days, periods and merged spans, from timetable_layout.py). The
+    timetables are read from the shared timetable model in this process,
+    and the drawing is fanned out over a process pool. A manifest in the
+    output folder records a hash of what each file shows, so timetables
+    that did not change since the last export are skipped.
+
+        python windows/batch_export.py
+        python windows/batch_export.py --format pdf --only sections --force
+'''
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'files', 'timetables')
+MANIFEST_NAME = 'manifest.json'
+
+FORMATS = ['png', 'pdf']
+RENDER_VERSION = 1  # bump when the drawing changes, so every timetable is exported again
+
+# Page layout, in pixels
+MARGIN = 30
+TITLE_HEIGHT = 50
+HEADER_HEIGHT = 50
+LABEL_WIDTH = 70
+CELL_WIDTH = 150
+CELL_HEIGHT = 80
+WRAP_CHARS = 20  # characters per line of a cell's subject
+
+MERGED_COLOR = "#f0f0f0"  # as the merged cells of the timetable window
+HEADER_COLOR = "#e0e0e0"
+
+
+def safe_name(name):
+    """name usable as a file name"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name)).strip('_') or 'unnamed'
+
+
+def collect_jobs(model, conn, include=('sections', 'faculty')):
+    """
+    What to draw for every timetable: [{'key', 'title', 'days',
+    'periods_info', 'data'}], where key is the output path without
+    extension, relative to the output folder
+    """
+    days, periods_info = load_timetable_structure(conn)
+    jobs = []
+    if 'sections' in include:
+        for section in model.section_names():
+            jobs.append({
+                'key': f"sections/{safe_name(section)}",
+                'title': f"Section {section}",
+                'days': days,
+                'periods_info': periods_info,
+                'data': section_timetable(model, section, days, periods_info),
+            })
+    if 'faculty' in include:
+        names = dict(conn.execute("SELECT INI, NAME FROM FACULTY").fetchall())
+        for fini in model.faculty_names():
+            jobs.append({
+                'key': f"faculty/{safe_name(fini)}",
+                'title': f"{names[fini]} ({fini})" if names.get(fini) else fini,
+                'days': days,
+                'periods_info': periods_info,
+                'data': faculty_timetable(model, fini, days, periods_info),
+            })
+    return jobs
+
+
+def job_hash(job):
+    """Hash of everything a timetable's file shows"""
+    content = [RENDER_VERSION, job['title'], job['days'], sorted(job['periods_info'].items()), job['data']]
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _wrap(text):
+    return "\n".join(textwrap.fill(line, WRAP_CHARS) for line in text.split("\n"))
+
+
+def render_job(job, out_dir, formats):
+    """Draw one timetable and save it in formats; runs in a worker process. Returns the paths written"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 12)
+        bold = ImageFont.truetype("DejaVuSans-Bold.ttf", 13)
+        title_font = ImageFont.truetype("DejaVuSans-Bold.ttf", 22)
+    except OSError:
+        font = bold = title_font = ImageFont.load_default()
+
+    days, periods_info = job['days'], job['periods_info']
+    periods = list(periods_info.keys())
+    width = 2 * MARGIN + LABEL_WIDTH + len(periods) * CELL_WIDTH
+    height = 2 * MARGIN + TITLE_HEIGHT + HEADER_HEIGHT + len(days) * CELL_HEIGHT
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+
+    left, top = MARGIN, MARGIN + TITLE_HEIGHT
+    draw.text((width / 2, MARGIN + TITLE_HEIGHT / 2), job['title'], fill="black", font=title_font, anchor="mm")
+
+    def box(x0, y0, x1, y1, text, fill="white", text_font=font):
+        draw.rectangle((x0, y0, x1, y1), fill=fill, outline="black")
+        if text:
+            draw.multiline_text(((x0 + x1) / 2, (y0 + y1) / 2), text, fill="black", font=text_font,
+                                anchor="mm", align="center")
+
+    # Period headers and day labels
+    box(left, top, left + LABEL_WIDTH, top + HEADER_HEIGHT, "", HEADER_COLOR)
+    for c, (period_num, time_str) in enumerate(periods_info.items()):
+        x = left + LABEL_WIDTH + c * CELL_WIDTH
+        box(x, top, x + CELL_WIDTH, top + HEADER_HEIGHT, f"{period_num}\n{time_str}", HEADER_COLOR, bold)
+    for r, day in enumerate(days):
+        y = top + HEADER_HEIGHT + r * CELL_HEIGHT
+        box(left, y, left + LABEL_WIDTH, y + CELL_HEIGHT, day, HEADER_COLOR, bold)
+        for c in range(len(periods)):
+            x = left + LABEL_WIDTH + c * CELL_WIDTH
+            box(x, y, x + CELL_WIDTH, y + CELL_HEIGHT, "")
+
+        # Lessons, consecutive periods of the same one merged into one cell
+        day_cells = job['data'].get(day, {})
+        for span in find_spans(day_cells, periods):
+            x0 = left + LABEL_WIDTH + periods.index(span[0]) * CELL_WIDTH
+            x1 = left + LABEL_WIDTH + (periods.index(span[-1]) + 1) * CELL_WIDTH
+            fill = MERGED_COLOR if len(span) > 1 else "white"
+            box(x0, y, x1, y + CELL_HEIGHT, _wrap(cell_text(day_cells[span[0]], span)), fill)
+
+    base = os.path.join(out_dir, job['key'])
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    paths = []
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        if fmt == 'pdf':
+            image.save(path, "PDF", resolution=100.0)
+        else:
+            image.save(path, "PNG", optimize=True)
+        paths.append(path)
+    return paths
+
+
+def load_manifest(out_dir):
+    """{key: {'hash', 'formats'}} of the last export to out_dir"""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable manifest {path}: {e}")
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+
+
+def is_current(entry, digest, formats, out_dir, key):
+    """Whether the files of key were exported from the same content in every format"""
+    return (entry is not None and entry.get('hash') == digest
+            and set(formats) <= set(entry.get('formats', []))
+            and all(os.path.exists(os.path.join(out_dir, f"{key}.{fmt}")) for fmt in formats))
+
+
+def export_all(db_path=None, out_dir=OUTPUT_DIR, formats=FORMATS, include=('sections', 'faculty'),
+               workers=None, force=False, progress=print):
+    """
+    Export every changed timetable; returns (written, skipped, [(key, error)]).
+    workers is the size of the process pool (default: one per CPU).
+    """
+    conn = get_connection(db_path)
+    try:
+        model = get_timetable_model(db_path)
+        model.refresh()
+        jobs = collect_jobs(model, conn, include)
+    finally:
+        release_connection(conn, db_path)
+
+    manifest = load_manifest(out_dir)
+    todo = []
+    for job in jobs:
+        digest = job_hash(job)
+        if force or not is_current(manifest.get(job['key']), digest, formats, out_dir, job['key']):
+            todo.append((job, digest))
+    skipped = len(jobs) - len(todo)
+    written, failed = 0, []
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_job, job, out_dir, formats): (job, digest) for job, digest in todo}
+            try:
+                for future in as_completed(futures):
+                    job, digest = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed.append((job['key'], str(e)))
+                        progress(f"Failed {job['key']}: {e}")
+                        continue
+                    manifest[job['key']] = {'hash': digest, 'formats': sorted(formats)}
+                    written += 1
+                    progress(f"[{written + len(failed)}/{len(todo)}] {job['key']}")
+            finally:
+                # Keep what was written even if the run is interrupted
+                save_manifest(out_dir, manifest)
+    return written, skipped, failed
+
+
+if __name__ == "__main__":
+    import argparse
+    import importlib.util
+    import time
+
+    parser = argparse.ArgumentParser(description="Export every section and faculty timetable to PNG/PDF")
+    parser.add_argument('--out', default=OUTPUT_DIR, help="output folder (default files/timetables)")
+    parser.add_argument('--format', choices=FORMATS + ['both'], default='both', help="file format")
+    parser.add_argument('--only', choices=['sections', 'faculty'], help="export only these timetables")
+    parser.add_argument('--workers', type=int, help="processes drawing timetables (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="export even the timetables that did not change")
+    parser.add_argument('--db', help="database file (default files/timetable.db)")
+    args = parser.parse_args()
+
+    # The workers draw with Pillow
+    if importlib.util.find_spec("PIL") is None:
+        print("Pillow is required for exporting: pip install Pillow")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    written, skipped, failed = export_all(
+        args.db or DB_PATH, args.out,
+        FORMATS if args.format == 'both' else [args.format],
+        (args.only,) if args.only else ('sections', 'faculty'),
+        args.workers, args.force,
+    )
+    print(f"Exported {written} timetables to {args.out}, {skipped} unchanged, {len(failed)} failed "
+          f"({time.perf_counter() - started:.1f} s)")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,292 @@
+import os
+import sqlite3
+import pandas as pd
+
+from database import get_connection, release_connection
+
+'''
+    BULK CSV IMPORT
+
+    Loads students, faculty, subjects or lessons from a CSV file. The file
+    is read in chunks, so its size does not matter, and every chunk is
+    validated with vectorized pandas checks: required columns, integers,
+    allowed values, keys repeated within the file, and references to
+    sections (CLASSES), subjects and faculty that do not exist. Rows that
+    fail are reported with their line number and skipped; the rest of the
+    chunk is written with one executemany, and the whole file is imported
+    in one transaction.
+
+        python windows/bulk_import.py students.csv
+        python windows/bulk_import.py lessons.csv --kind lessons --dry-run
+'''
+
+CHUNK_SIZE = 20000  # CSV rows read, validated and written at a time
+MAX_REPORTED_ERRORS = 20  # errors listed in summary(); all are kept in ImportReport.errors
+
+# What each kind of file holds:
+#   table       table the rows are written to
+#   columns     CSV columns that are written (CSV headers are matched case-insensitively)
+#   required    columns that must not be empty
+#   key         column that must be unique within the file, or None
+#   integers    columns that must be whole numbers
+#   choices     {column: allowed values}
+#   references  {column: query of the values it may take}; empty optional values are not checked
+#   upper       columns stored in upper case, as the entry screens do
+#   defaults    {column: value stored when the CSV cell is empty}
+#   replace     REPLACE rows with the same key (as the entry screens do) instead of INSERT
+IMPORTS = {
+    'students': {
+        'table': 'STUDENT',
+        'columns': ['SID', 'PASSW', 'NAME', 'ROLL', 'SECTION'],
+        'required': ['SID', 'PASSW', 'NAME', 'ROLL', 'SECTION'],
+        'key': 'SID',
+        'integers': ['ROLL'],
+        'choices': {},
+        'references': {'SECTION': "SELECT CLASS_NAME FROM CLASSES"},
+        'upper': ['NAME'],
+        'defaults': {},
+        'replace': True,
+    },
+    'faculty': {
+        'table': 'FACULTY',
+        'columns': ['FID', 'PASSW', 'NAME', 'INI', 'EMAIL', 'SUBCODE1', 'SUBCODE2'],
+        'required': ['FID', 'PASSW', 'NAME', 'INI', 'EMAIL', 'SUBCODE1'],
+        'key': 'FID',
+        'integers': [],
+        'choices': {},
+        'references': {'SUBCODE1': "SELECT SUBCODE FROM SUBJECTS",
+                       'SUBCODE2': "SELECT SUBCODE FROM SUBJECTS"},
+        'upper': ['NAME', 'INI'],
+        'defaults': {'SUBCODE2': 'NULL'},
+        'replace': True,
+    },
+    'subjects': {
+        'table': 'SUBJECTS',
+        'columns': ['SUBCODE', 'SUBNAME', 'SUBTYPE', 'COLOR'],
+        'required': ['SUBCODE', 'SUBNAME', 'SUBTYPE'],
+        'key': 'SUBCODE',
+        'integers': [],
+        'choices': {'SUBTYPE': ['T', 'P']},
+        'references': {},
+        'upper': ['SUBTYPE'],
+        'defaults': {'COLOR': '#008080'},
+        'replace': True,
+    },
+    'lessons': {
+        'table': 'LESSONS',
+        'columns': ['TEACHER_ID', 'SUBJECT_CODE', 'CLASS_NAME', 'LESSONS_PER_WEEK', 'LESSON_TYPE'],
+        'required': ['TEACHER_ID', 'SUBJECT_CODE', 'CLASS_NAME', 'LESSONS_PER_WEEK'],
+        'key': None,
+        'integers': ['LESSONS_PER_WEEK'],
+        'choices': {},
+        'references': {'TEACHER_ID': "SELECT FID FROM FACULTY",
+                       'SUBJECT_CODE': "SELECT SUBCODE FROM SUBJECTS",
+                       'CLASS_NAME': "SELECT CLASS_NAME FROM CLASSES"},
+        'upper': [],
+        'defaults': {},
+        'replace': False,
+    },
+}
+
+
+class ImportReport:
+    """Outcome of an import: rows read and written, and (line, message) of every rejected row"""
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.rows = 0
+        self.written = 0
+        self.errors = []
+        self.dry_run = False
+
+    def summary(self):
+        verb = "would be written" if self.dry_run else "written"
+        lines = [f"{self.kind}: {self.rows} rows read, {self.written} {verb}, {len(self.errors)} rejected"]
+        for line, message in self.errors[:MAX_REPORTED_ERRORS]:
+            lines.append(f"  line {line}: {message}")
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            lines.append(f"  ... and {len(self.errors) - MAX_REPORTED_ERRORS} more")
+        return "\n".join(lines)
+
+
+def read_header(path):
+    """Upper-cased column names of a CSV file"""
+    return [str(column).strip().upper() for column in pd.read_csv(path, nrows=0).columns]
+
+
+def detect_kind(header, kinds=None):
+    """The kind whose required columns are all in header (the best match wins), or None"""
+    header = set(header)
+    matches = [(len(header & set(IMPORTS[kind]['columns'])), kind) for kind in (kinds or IMPORTS)
+               if set(IMPORTS[kind]['required']) <= header]
+    return max(matches)[1] if matches else None
+
+
+def validate_chunk(chunk, spec, references, seen_keys, first_line):
+    """
+    Split a chunk into the rows that can be written and the errors of the rest.
+
+    chunk holds the spec's columns as stripped strings; references is
+    {column: set of allowed values}; seen_keys holds the keys of earlier
+    chunks and is updated. Returns (valid rows as a DataFrame, [(line, message)]).
+    """
+    problems = pd.Series("", index=chunk.index)
+
+    def flag(mask, message):
+        problems[mask] += message + "; "
+
+    for column in spec['required']:
+        flag(chunk[column] == "", f"{column} is empty")
+    for column in spec['integers']:
+        present = chunk[column] != ""
+        numbers = pd.to_numeric(chunk[column], errors='coerce')
+        flag(present & (numbers.isna() | (numbers % 1 != 0)), f"{column} is not a whole number")
+    for column, allowed in spec['choices'].items():
+        present = chunk[column] != ""
+        flag(present & ~chunk[column].isin(allowed), f"{column} must be one of {', '.join(allowed)}")
+    for column, allowed in references.items():
+        present = chunk[column] != ""
+        if column not in spec['required']:
+            present &= chunk[column] != "NULL"
+        unknown = present & ~chunk[column].isin(allowed)
+        flag(unknown, f"unknown {column} " + chunk.loc[unknown, column])
+
+    key = spec['key']
+    if key:
+        present = chunk[key] != ""
+        flag(present & (chunk[key].duplicated() | chunk[key].isin(seen_keys)), f"duplicate {key}")
+        seen_keys.update(chunk.loc[present, key])
+
+    bad = problems != ""
+    lines = chunk.index[bad] + first_line
+    errors = [(int(line), message.rstrip("; ")) for line, message in zip(lines, problems[bad])]
+    return chunk[~bad], errors
+
+
+def _prepare(valid, spec):
+    """Rows ready for executemany: defaults and integers applied"""
+    valid = valid.copy()
+    for column, default in spec['defaults'].items():
+        valid.loc[valid[column] == "", column] = default
+    for column in spec['integers']:
+        valid[column] = pd.to_numeric(valid[column]).astype('int64')
+    # Empty optional cells are stored as NULL
+    valid = valid.astype(object).where(valid != "", None)
+    return [tuple(int(v) if hasattr(v, 'item') else v for v in row)
+            for row in valid.itertuples(index=False, name=None)]
+
+
+def _write(conn, sql, rows, lines, report):
+    """executemany rows; if one of them fails, write them one by one to find and report it"""
+    conn.execute("SAVEPOINT import_chunk")
+    try:
+        conn.executemany(sql, rows)
+        conn.execute("RELEASE import_chunk")
+        report.written += len(rows)
+        return
+    except sqlite3.Error:
+        conn.execute("ROLLBACK TO import_chunk")
+        conn.execute("RELEASE import_chunk")
+    for row, line in zip(rows, lines):
+        try:
+            conn.execute(sql, row)
+            report.written += 1
+        except sqlite3.Error as e:
+            report.errors.append((line, str(e)))
+
+
+def import_csv(conn, path, kind=None, chunk_size=CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Import a CSV file of the given kind (detected from its header when
+    None) in one transaction on conn. Invalid rows are skipped and
+    reported; with dry_run everything is validated and then rolled back.
+    progress(rows read so far) is called after every chunk.
+
+    Returns an ImportReport. Raises ValueError when the file cannot be
+    imported at all (unknown kind or missing columns), and RuntimeError if
+    conn already has an open transaction, rather than committing someone
+    else's work with the import.
+    """
+    if conn.in_transaction:
+        raise RuntimeError("The connection has uncommitted changes that are not part of this import")
+    header = read_header(path)
+    if kind is None:
+        kind = detect_kind(header)
+        if kind is None:
+            raise ValueError(f"Cannot tell what {os.path.basename(path)} contains from its columns: {', '.join(header)}")
+    spec = IMPORTS[kind]
+    missing = [column for column in spec['required'] if column not in header]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} has no {', '.join(missing)} column(s) for importing {kind}")
+
+    columns = spec['columns']
+    placeholders = ", ".join("?" for _ in columns)
+    verb = "REPLACE" if spec['replace'] else "INSERT"
+    sql = f"{verb} INTO {spec['table']} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    report = ImportReport(kind, path)
+    report.dry_run = dry_run
+    references = {column: {str(row[0]) for row in conn.execute(query)}
+                  for column, query in spec['references'].items()}
+    seen_keys = set()
+
+    conn.execute("BEGIN")
+    try:
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+        for chunk in reader:
+            chunk.columns = [str(column).strip().upper() for column in chunk.columns]
+            first_line = report.rows + 2  # line 1 is the header
+            chunk = chunk.reset_index(drop=True)
+            chunk = pd.DataFrame({column: chunk[column].str.strip() if column in chunk else ""
+                                  for column in columns})
+            for column in spec['upper']:
+                chunk[column] = chunk[column].str.upper()
+            report.rows += len(chunk)
+
+            valid, errors = validate_chunk(chunk, spec, references, seen_keys, first_line)
+            report.errors.extend(errors)
+            if len(valid):
+                _write(conn, sql, _prepare(valid, spec), (valid.index + first_line).tolist(), report)
+            if progress:
+                progress(report.rows)
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    report.errors.sort()
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Import students, faculty, subjects or lessons from CSV files")
+    parser.add_argument('files', nargs='+', help="CSV files, imported in the order given")
+    parser.add_argument('--kind', choices=sorted(IMPORTS), help="what the files contain (default: detected from the header)")
+    parser.add_argument('--db', help="database file (default files/timetable.db)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="rows read and written at a time")
+    parser.add_argument('--dry-run', action='store_true', help="validate only, write nothing")
+    args = parser.parse_args()
+
+    conn = get_connection(args.db)
+    failed = False
+    try:
+        for path in args.files:
+            started = time.perf_counter()
+            try:
+                report = import_csv(conn, path, args.kind, args.chunk_size, args.dry_run)
+            except (ValueError, RuntimeError, OSError, sqlite3.Error) as e:
+                print(f"{path}: {e}")
+                failed = True
+                continue
+            print(f"{path} ({time.perf_counter() - started:.2f} s)")
+            print(report.summary())
+            failed = failed or bool(report.errors)
+    finally:
+        release_connection(conn, args.db)
+    raise SystemExit(1 if failed else 0)
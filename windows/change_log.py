@@ -0,0 +1,96 @@
+from collections import namedtuple
+
+'''
+    SCHEDULE CHANGE LOG
+
+    Triggers created by schema migration 3 append an entry to
+    SCHEDULE_CHANGES for every row inserted, updated, replaced or deleted
+    in SCHEDULE, SCHEDULED_LESSONS, LESSONS, SUBJECTS and FACULTY. Each
+    entry has a VERSION that only ever increases, so a consumer that
+    remembers the version it last saw can ask for what changed since
+    then with changes_since() and refresh just those sections, faculty
+    members or subjects instead of reloading everything. Old entries are
+    pruned; a consumer whose version is older than the log returns None
+    from changes_since() and has to reload everything once.
+'''
+
+KEEP_CHANGES = 100000  # entries kept by prune_changes()
+
+Change = namedtuple('Change', ['version', 'table', 'operation', 'key', 'section', 'day', 'period', 'subcode', 'faculty'])
+
+
+def current_version(conn):
+    """Version of the latest change ever logged (0 if none)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'SCHEDULE_CHANGES'").fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(conn, version, tables=None):
+    """
+    [Change] logged after version, oldest first, optionally only of the
+    given tables; None if entries after version were already pruned, in
+    which case the caller has to reload everything
+    """
+    oldest = conn.execute("SELECT MIN(VERSION) FROM SCHEDULE_CHANGES").fetchone()[0]
+    if oldest is not None and oldest > version + 1:
+        return None
+    if oldest is None and current_version(conn) > version:
+        return None  # Everything after version was pruned
+
+    query = "SELECT * FROM SCHEDULE_CHANGES WHERE VERSION > ?"
+    params = [version]
+    if tables:
+        query += f" AND TABLE_NAME IN ({', '.join('?' for _ in tables)})"
+        params += list(tables)
+    return [Change(*row) for row in conn.execute(query + " ORDER BY VERSION", params)]
+
+
+def changed_sections(changes):
+    """Sections of SCHEDULE/SCHEDULED_LESSONS/LESSONS rows among changes"""
+    return {change.section for change in changes if change.section is not None}
+
+
+def changed_faculty(changes):
+    """INI (SCHEDULE) or FID (other tables) of the faculty among changes"""
+    return {change.faculty for change in changes if change.faculty is not None}
+
+
+def changed_cells(changes):
+    """{(section, day, period)} of the timetable cells among changes"""
+    return {(change.section, change.day, change.period) for change in changes
+            if change.section is not None and change.day is not None}
+
+
+def prune_changes(conn, keep=KEEP_CHANGES):
+    """Delete all but the latest keep entries; returns how many were deleted"""
+    cursor = conn.execute("DELETE FROM SCHEDULE_CHANGES WHERE VERSION <= ?", (current_version(conn) - keep,))
+    conn.commit()
+    return cursor.rowcount
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import get_connection, release_connection
+
+    parser = argparse.ArgumentParser(description="Show or prune the schedule change log")
+    parser.add_argument('--since', type=int, default=None, help="print the changes after this version")
+    parser.add_argument('--prune', type=int, metavar='KEEP', help="delete all but the latest KEEP entries")
+    parser.add_argument('--db', help="database file (default files/timetable.db)")
+    args = parser.parse_args()
+
+    conn = get_connection(args.db)
+    try:
+        if args.prune is not None:
+            print(f"Pruned {prune_changes(conn, args.prune)} entries")
+        if args.since is not None:
+            changes = changes_since(conn, args.since)
+            if changes is None:
+                print(f"Changes after version {args.since} were pruned; reload everything")
+            else:
+                for change in changes:
+                    print(f"{change.version:8} {change.operation:6} {change.table:17} {change.key} "
+                          f"section={change.section} day={change.day} period={change.period} "
+                          f"subject={change.subcode} faculty={change.faculty}")
+        print(f"Current version: {current_version(conn)}")
+    finally:
+        release_connection(conn, args.db)
@@ -4,6 +4,7 @@ from tkinter import colorchooser # For color picker
 from tkinter import messagebox
 import sqlite3 # For database integration
 import os      # For path manipulation
+from database import get_connection, release_connection
 
 class TeacherSelectionDialog(tk.Toplevel):
     def __init__(self, parent, conn):
@@ -171,28 +172,8 @@ class ClassDialog(tk.Toplevel):
 
     def _connect_db(self):
         try:
-            conn = sqlite3.connect(self.db_path)
-            # Ensure FACULTY table exists (basic schema for selection)
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS FACULTY (
-                FID TEXT PRIMARY KEY NOT NULL,
-                NAME TEXT NOT NULL
-            );
-            """)
-            # Ensure CLASSES table exists
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS CLASSES (
-                CLASS_NAME TEXT PRIMARY KEY NOT NULL,
-                SHORT_NAME TEXT,
-                PRINT_SUBJECT_PICTURES INTEGER, -- 0 for False, 1 for True
-                COLOR TEXT,
-                CLASS_TEACHER_FID TEXT, -- Foreign key to FACULTY table
-                GRADE TEXT,
-                FOREIGN KEY (CLASS_TEACHER_FID) REFERENCES FACULTY(FID)
-            );
-            """)
-            conn.commit()
-            return conn
+            # The pool makes sure FACULTY and CLASSES tables exist
+            return get_connection(self.db_path)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to connect to or create tables: {e}")
             return None
@@ -249,8 +230,8 @@ class ClassDialog(tk.Toplevel):
 
     def __del__(self):
         if hasattr(self, 'conn') and self.conn:
-            self.conn.close()
-            print("Database connection closed.")
+            release_connection(self.conn, self.db_path)
+            print("Database connection released.")
 
 if __name__ == '__main__':
     # This is for testing purposes
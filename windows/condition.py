@@ -1,5 +1,7 @@
 import sqlite3
 import os
+from database import get_connection, release_connection
+from conflict_engine import LESSON_PERIODS
 import tkinter as tk
 from tkinter import messagebox
 
@@ -25,7 +27,7 @@ class TimetableConditionChecker:
                 print(f"Database not found at: {self.db_path}")
                 return None
             
-            return sqlite3.connect(self.db_path)
+            return get_connection(self.db_path)
         except sqlite3.Error as e:
             print(f"Failed to connect to database: {e}")
             return None
@@ -113,16 +115,7 @@ class TimetableConditionChecker:
             lesson_type = result[0]
             
             # Determine number of periods to merge based on lesson type
-            lesson_periods = {
-                "Single": 1,
-                "Double": 2,
-                "Triple": 3,
-                "Quad": 4,
-                "Quint": 5,
-                "Hex": 6
-            }
-            
-            periods_to_merge = lesson_periods.get(lesson_type, 1)
+            periods_to_merge = LESSON_PERIODS.get(lesson_type, 1)
             
             if periods_to_merge == 1:
                 message = f"Subject {subject_code} is configured as Single period"
@@ -316,7 +309,7 @@ class TimetableConditionChecker:
     def __del__(self):
         """Close database connection when object is destroyed"""
         if hasattr(self, 'conn') and self.conn:
-            self.conn.close()
+            release_connection(self.conn, self.db_path)
 
 
 # Standalone testing function
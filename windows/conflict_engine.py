@@ -0,0 +1,156 @@
+from collections import namedtuple, defaultdict
+
+'''
+    TIMETABLE CONFLICT ENGINE
+
+    Analyses the whole timetable from one scan of SCHEDULE and one of LESSONS
+    instead of a query per (day, period, faculty) and per faculty per day.
+    Every conflict is returned as a Conflict record so the Scheduler, the
+    Timetable Editor and the Schedule Manager can all render the same report.
+'''
+
+# Conflict kinds, also used as the report prefix
+DOUBLE_BOOKING = 'CONFLICT'
+WORKLOAD = 'WORKLOAD'
+RECESS = 'RECESS'
+LESSONS_PER_WEEK = 'WARNING'
+MERGE_ISSUE = 'MERGE ISSUE'
+
+MAX_DAILY_PERIODS = 5  # recommended max periods per faculty per day
+RECESS_AFTER = 3       # recess after 3rd Period
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Number of consecutive periods each LESSON_TYPE has to span
+LESSON_PERIODS = {
+    "Single": 1,
+    "Double": 2,
+    "Triple": 3,
+    "Quad": 4,
+    "Quint": 5,
+    "Hex": 6
+}
+
+
+class Conflict(namedtuple('Conflict', [
+        'kind', 'message', 'faculty', 'sections', 'subject', 'day', 'periods', 'count', 'limit'],
+        defaults=(None, (), None, None, (), None, None))):
+    """
+    One problem found in the timetable.
+
+    kind is one of DOUBLE_BOOKING, WORKLOAD, RECESS, LESSONS_PER_WEEK or
+    MERGE_ISSUE; the remaining fields say where it is (day and periods are
+    zero indexed). str(conflict) gives the line shown to the user.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{self.kind}: {self.message}"
+
+
+def find_conflicts(conn, day_names=None, max_daily_periods=MAX_DAILY_PERIODS,
+                   recess_after=RECESS_AFTER):
+    """
+    Find every conflict in the SCHEDULE table.
+
+    Args:
+        conn: Open database connection
+        day_names (list, optional): Names used in messages, indexed by DAYID
+        max_daily_periods (int): Periods per day a faculty member may teach
+        recess_after (int): Recess falls between PERIODID recess_after-1 and recess_after
+
+    Returns:
+        list: Conflict records ordered by kind, then by position
+    """
+    day_names = day_names if day_names else DAY_NAMES
+
+    def day_name(day_id):
+        return day_names[day_id] if 0 <= day_id < len(day_names) else f"Day {day_id}"
+
+    # Single pass over SCHEDULE builds every index the checks need
+    sections_at = defaultdict(set)           # {(DAYID, PERIODID, FINI): {SECTION}}
+    faculty_day_periods = defaultdict(set)   # {(FINI, DAYID): {PERIODID}}
+    faculty_day_count = defaultdict(int)     # {(FINI, DAYID): rows}
+    subject_slots = defaultdict(set)         # {(SECTION, SUBCODE): {(DAYID, PERIODID)}}
+    subject_count = defaultdict(int)         # {(SECTION, SUBCODE): rows}
+
+    for day_id, period_id, section, subcode, fini in conn.execute(
+            "SELECT DAYID, PERIODID, SECTION, SUBCODE, FINI FROM SCHEDULE"):
+        if fini != 'NULL':
+            sections_at[(day_id, period_id, fini)].add(section)
+            faculty_day_periods[(fini, day_id)].add(period_id)
+            faculty_day_count[(fini, day_id)] += 1
+        if subcode != 'NULL':
+            subject_slots[(section, subcode)].add((day_id, period_id))
+            subject_count[(section, subcode)] += 1
+
+    # First LESSONS row per class/subject, as the per-cell checks used to read it
+    lessons = {}
+    for class_name, subcode, per_week, lesson_type in conn.execute(
+            "SELECT CLASS_NAME, SUBJECT_CODE, LESSONS_PER_WEEK, LESSON_TYPE FROM LESSONS ORDER BY ID"):
+        lessons.setdefault((class_name, subcode), (per_week, lesson_type))
+
+    conflicts = []
+
+    # Same faculty in more than one section at the same time
+    for (day_id, period_id, fini), sections in sorted(sections_at.items()):
+        if len(sections) > 1:
+            sections = tuple(sorted(sections))
+            conflicts.append(Conflict(
+                DOUBLE_BOOKING,
+                f"Faculty '{fini}' is assigned to multiple sections ({', '.join(sections)}) "
+                f"during {day_name(day_id)} Period {period_id+1}",
+                faculty=fini, sections=sections, day=day_id, periods=(period_id,)))
+
+    # Too many periods in a day
+    for (fini, day_id), period_count in sorted(faculty_day_count.items()):
+        if period_count > max_daily_periods:
+            conflicts.append(Conflict(
+                WORKLOAD,
+                f"Faculty '{fini}' has {period_count} periods on {day_name(day_id)} "
+                f"(recommended max: {max_daily_periods})",
+                faculty=fini, day=day_id, count=period_count, limit=max_daily_periods))
+
+    # Teaching both the period before and the period after recess
+    if recess_after > 0:
+        around_recess = {recess_after - 1, recess_after}
+        for (fini, day_id), periods in sorted(faculty_day_periods.items()):
+            if around_recess <= periods:
+                conflicts.append(Conflict(
+                    RECESS,
+                    f"Faculty '{fini}' is assigned to adjacent periods across recess on {day_name(day_id)}",
+                    faculty=fini, day=day_id, periods=tuple(sorted(around_recess))))
+
+    for (section, subcode), slots in sorted(subject_slots.items()):
+        if (section, subcode) not in lessons:
+            continue
+        per_week, lesson_type = lessons[(section, subcode)]
+
+        # More lessons placed than LESSONS_PER_WEEK allows
+        assigned = subject_count[(section, subcode)]
+        if per_week is not None and assigned > per_week:
+            conflicts.append(Conflict(
+                LESSONS_PER_WEEK,
+                f"Subject '{subcode}' in section '{section}' has {assigned} assignments "
+                f"but lessons_per_week is set to {per_week}",
+                sections=(section,), subject=subcode, count=assigned, limit=per_week))
+
+        # Double/Triple/... lessons whose periods are not part of a full consecutive span
+        span = LESSON_PERIODS.get(lesson_type, 1)
+        if span <= 1:
+            continue
+        for day_id, period_id in sorted(slots):
+            properly_merged = any(
+                all((day_id, p) in slots for p in range(start, start + span))
+                for start in range(max(0, period_id - span + 1), period_id + 1)
+            )
+            if not properly_merged:
+                conflicts.append(Conflict(
+                    MERGE_ISSUE,
+                    f"Subject '{subcode}' in section '{section}' on {day_name(day_id)} "
+                    f"Period {period_id+1} is configured as {lesson_type} lesson but does not span {span} "
+                    f"consecutive periods as required",
+                    sections=(section,), subject=subcode, day=day_id, periods=(period_id,),
+                    count=span))
+
+    return conflicts
@@ -0,0 +1,178 @@
+from collections import defaultdict, Counter
+
+from conflict_engine import MAX_DAILY_PERIODS, RECESS_AFTER, DAY_NAMES
+
+'''
+    INCREMENTAL CONFLICT INDEX
+
+    In-memory occupancy of the timetable, built from one scan of SCHEDULE
+    and then kept current by recording every REPLACE/DELETE the window makes.
+    Faculty and section occupancy are stored as one bitset (bit = PERIODID)
+    per (faculty, day) and per (section, day), so the per-cell conflict
+    check is a handful of dictionary lookups and bit tests with no SQL.
+'''
+
+
+class OccupancyIndex:
+    """
+    Occupancy of SCHEDULE by faculty, section and subject.
+
+    Call record_replace()/record_delete() after writing to SCHEDULE through
+    the same connection, and sync() before reading, so that commits made by
+    other connections or windows trigger a rebuild.
+    """
+    def __init__(self, max_daily_periods=MAX_DAILY_PERIODS, recess_after=RECESS_AFTER):
+        self.max_daily_periods = max_daily_periods
+        self.recess_after = recess_after
+        self._data_version = None
+        self._clear()
+
+    def _clear(self):
+        self._entries = {}                       # {ID: (DAYID, PERIODID, SUBCODE, SECTION, FINI)}
+        self._faculty_bits = defaultdict(int)    # {(FINI, DAYID): bitset of PERIODID}
+        self._section_bits = defaultdict(int)    # {(SECTION, DAYID): bitset of PERIODID}
+        self._faculty_slot = defaultdict(Counter)   # {(FINI, DAYID, PERIODID): {SECTION: rows}}
+        self._section_slot = defaultdict(int)       # {(SECTION, DAYID, PERIODID): rows}
+        self._faculty_day_rows = defaultdict(int)   # {(FINI, DAYID): rows}
+        self._subject_rows = defaultdict(int)       # {(SECTION, SUBCODE): rows}
+        self._double_booked = set()                 # {(FINI, DAYID, PERIODID)}
+        self._lessons_per_week = {}                 # {(CLASS_NAME, SUBJECT_CODE): LESSONS_PER_WEEK}
+
+    @classmethod
+    def from_connection(cls, conn, **kwargs):
+        """Build an index from the current contents of the database"""
+        index = cls(**kwargs)
+        index.load(conn)
+        return index
+
+    def load(self, conn):
+        """(Re)build the whole index with one scan of SCHEDULE and LESSONS"""
+        self._clear()
+        for entry_id, day_id, period_id, subcode, section, fini in conn.execute(
+                "SELECT ID, DAYID, PERIODID, SUBCODE, SECTION, FINI FROM SCHEDULE"):
+            self.record_replace(entry_id, day_id, period_id, subcode, section, fini)
+        for class_name, subcode, per_week in conn.execute(
+                "SELECT CLASS_NAME, SUBJECT_CODE, LESSONS_PER_WEEK FROM LESSONS ORDER BY ID"):
+            self._lessons_per_week.setdefault((class_name, subcode), per_week)
+        self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def sync(self, conn):
+        """Rebuild if another connection committed since the last load; returns True if rebuilt"""
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return False
+        self.load(conn)
+        return True
+
+    def record_replace(self, entry_id, day_id, period_id, subcode, section, fini):
+        """Mirror REPLACE INTO SCHEDULE (ID, DAYID, PERIODID, SUBCODE, SECTION, FINI)"""
+        self.record_delete(entry_id)
+        self._entries[entry_id] = (day_id, period_id, subcode, section, fini)
+
+        bit = 1 << period_id
+        self._section_slot[(section, day_id, period_id)] += 1
+        self._section_bits[(section, day_id)] |= bit
+        if subcode != 'NULL':
+            self._subject_rows[(section, subcode)] += 1
+        if fini != 'NULL':
+            slot = self._faculty_slot[(fini, day_id, period_id)]
+            slot[section] += 1
+            if len(slot) > 1:
+                self._double_booked.add((fini, day_id, period_id))
+            self._faculty_bits[(fini, day_id)] |= bit
+            self._faculty_day_rows[(fini, day_id)] += 1
+
+    def record_delete(self, entry_id):
+        """Mirror DELETE FROM SCHEDULE WHERE ID=entry_id"""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        day_id, period_id, subcode, section, fini = entry
+
+        bit = 1 << period_id
+        self._section_slot[(section, day_id, period_id)] -= 1
+        if not self._section_slot[(section, day_id, period_id)]:
+            del self._section_slot[(section, day_id, period_id)]
+            self._section_bits[(section, day_id)] &= ~bit
+        if subcode != 'NULL':
+            self._subject_rows[(section, subcode)] -= 1
+        if fini != 'NULL':
+            slot = self._faculty_slot[(fini, day_id, period_id)]
+            slot[section] -= 1
+            if not slot[section]:
+                del slot[section]
+            if len(slot) <= 1:
+                self._double_booked.discard((fini, day_id, period_id))
+            if not slot:
+                del self._faculty_slot[(fini, day_id, period_id)]
+                self._faculty_bits[(fini, day_id)] &= ~bit
+            self._faculty_day_rows[(fini, day_id)] -= 1
+
+    def entry(self, entry_id):
+        """(DAYID, PERIODID, SUBCODE, SECTION, FINI) of a SCHEDULE row, or None if there is none"""
+        return self._entries.get(entry_id)
+
+    def faculty_busy(self, fini, day_id, period_id):
+        """True if fini teaches any section at this slot"""
+        return bool(self._faculty_bits.get((fini, day_id), 0) >> period_id & 1)
+
+    def section_busy(self, section, day_id, period_id):
+        """True if section has a class at this slot"""
+        return bool(self._section_bits.get((section, day_id), 0) >> period_id & 1)
+
+    def sections_of(self, fini, day_id, period_id):
+        """Sections fini teaches at this slot"""
+        return sorted(self._faculty_slot.get((fini, day_id, period_id), ()))
+
+    def faculty_day_load(self, fini, day_id):
+        """Number of SCHEDULE rows fini has on day_id"""
+        return self._faculty_day_rows.get((fini, day_id), 0)
+
+    def subject_count(self, section, subcode):
+        """Number of times subcode is placed in section's week"""
+        return self._subject_rows.get((section, subcode), 0)
+
+    def lessons_per_week(self, section, subcode):
+        """LESSONS_PER_WEEK of subcode in section, or None if not defined"""
+        return self._lessons_per_week.get((section, subcode))
+
+    def check_conflicts(self, faculty_ini, day_id, period_id, current_section, day_names=None):
+        """
+        Check for scheduling conflicts of putting faculty_ini in current_section's slot:
+        1. Same faculty teaching in different sections during the same period/day
+        2. Faculty already at the daily period limit
+        3. Faculty teaching on both sides of the recess
+
+        Returns a tuple (has_conflict, conflict_message)
+        """
+        if faculty_ini == 'NULL':
+            return False, ""
+
+        day_names = day_names if day_names else DAY_NAMES
+        day_name = day_names[day_id] if day_id < len(day_names) else f"Day {day_id}"
+        conflicts = []
+
+        for other in self.sections_of(faculty_ini, day_id, period_id):
+            if other != current_section:
+                conflicts.append(f"Faculty '{faculty_ini}' is already assigned to section '{other}' during {day_name} Period {period_id+1}")
+
+        period_count = self.faculty_day_load(faculty_ini, day_id)
+        if period_count >= self.max_daily_periods:
+            conflicts.append(f"Faculty '{faculty_ini}' already has {period_count} periods on {day_name}")
+
+        if period_id in (self.recess_after - 1, self.recess_after):
+            adjacent_period = self.recess_after - 1 if period_id == self.recess_after else self.recess_after
+            if self.faculty_busy(faculty_ini, day_id, adjacent_period):
+                conflicts.append(f"Faculty '{faculty_ini}' is assigned to adjacent periods across recess on {day_name}")
+
+        if conflicts:
+            return True, "\n".join(conflicts)
+        return False, ""
+
+    def conflicting_slots(self):
+        """Set of (SECTION, DAYID, PERIODID) whose faculty is double-booked"""
+        return {
+            (section, day_id, period_id)
+            for fini, day_id, period_id in self._double_booked
+            for section in self._faculty_slot[(fini, day_id, period_id)]
+        }
@@ -0,0 +1,147 @@
+import sqlite3
+import os
+import threading
+import atexit
+from contextlib import contextmanager
+
+from schema import migrate
+
+'''
+    SHARED DATA-ACCESS LAYER
+
+    Every window, the Streamlit app and the notification thread borrow their
+    SQLite connections from one ConnectionPool per process instead of calling
+    sqlite3.connect() themselves. Connections are opened in WAL mode so
+    readers never block the writer, and are closed when the process exits.
+'''
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# TIMETABLE_DB points every default connection at another file, e.g. a scratch copy
+DB_PATH = os.environ.get('TIMETABLE_DB') or os.path.join(PROJECT_ROOT, 'files', 'timetable.db')
+
+# Applied to every connection the pool opens
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+    "PRAGMA temp_store = MEMORY",
+]
+
+BUSY_TIMEOUT = 30          # seconds to wait for another writer's lock
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of SQLite connections to one database file.
+
+    acquire()/release() hand out and take back connections; prefer the
+    connection() context manager, which commits or rolls back for you.
+    The schema is migrated once, when the pool opens its first connection.
+    """
+    def __init__(self, db_path=None, max_idle=4):
+        self.db_path = os.path.abspath(db_path) if db_path else DB_PATH
+        self.max_idle = max_idle
+        self._idle = []
+        self._all = set()
+        self._lock = threading.Lock()
+        self._migrated = False
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,  # Pooled connections move between threads
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """Borrow a connection, opening a new one if none is idle"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            conn = self._connect()
+            self._all.add(conn)
+            if not self._migrated:
+                migrate(conn)
+                self._migrated = True
+            return conn
+
+    def release(self, conn):
+        """Give a connection back; uncommitted work is rolled back"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._all.discard(conn)
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for one unit of work, committing on success"""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every connection opened by this pool"""
+        with self._lock:
+            connections, self._all, self._idle = self._all, set(), []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error closing connection: {e}")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    """Return the process-wide pool for db_path (default files/timetable.db)"""
+    key = os.path.abspath(db_path) if db_path else DB_PATH
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key)
+        return _pools[key]
+
+
+def get_connection(db_path=None):
+    """
+    Borrow a long-lived connection for a window that keeps one open for its
+    whole lifetime. It is closed automatically when the process exits.
+    """
+    return get_pool(db_path).acquire()
+
+
+def connection(db_path=None):
+    """Shortcut for get_pool(db_path).connection()"""
+    return get_pool(db_path).connection()
+
+
+def release_connection(conn, db_path=None):
+    """Return a connection obtained from get_connection()"""
+    get_pool(db_path).release(conn)
+
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,234 @@
+import queue
+import sqlite3
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from database import get_connection, release_connection
+
+'''
+    BACKGROUND DATABASE WORKER
+
+    Runs SQL for a Tk window on a worker thread so its mainloop never waits
+    on SQLite. The worker owns one pooled connection and takes jobs from a
+    queue; a job is a function called as fn(conn, *args) on the worker
+    thread, and its result (or exception) is handed back to the Tk thread
+    by polling with after(), where on_done/on_error are called. Jobs that
+    change the database are committed when they return and rolled back if
+    they raise. Tk is only ever touched from the Tk thread.
+
+    Tasks can be cancelled: a queued task is skipped and a running one is
+    interrupted (sqlite3 Connection.interrupt), and neither calls back.
+    While tasks are outstanding the window shows a busy cursor, and
+    BusyIndicator adds a progress bar with a Cancel button.
+'''
+
+POLL_INTERVAL = 50  # ms between checks for finished jobs while any are outstanding
+
+
+class DBTask:
+    """A job submitted to a DBWorker; cancel() drops its result"""
+    def __init__(self, worker, fn, args, on_done, on_error):
+        self.worker = worker
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        self.worker.cancel(self)
+
+
+class DBWorker:
+    """
+    Worker thread that runs database jobs for the Tk window of widget.
+
+    submit(fn, *args, on_done=..., on_error=...) queues fn(conn, *args) and
+    returns a DBTask; on_done(result) or on_error(exception) is later called
+    on the Tk thread. watch(callback) calls callback(busy) whenever the
+    worker becomes busy or idle.
+    """
+    def __init__(self, widget, db_path=None, poll_interval=POLL_INTERVAL):
+        self.widget = widget
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._outstanding = 0
+        self._current = None
+        self._current_lock = threading.Lock()
+        self._conn = None
+        self._poll_id = None
+        self._watchers = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-worker", daemon=True)
+        self._thread.start()
+
+    # --- Tk thread -----------------------------------------------------------
+
+    @property
+    def busy(self):
+        return self._outstanding > 0
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """Run fn(conn, *args) on the worker thread"""
+        task = DBTask(self, fn, args, on_done, on_error)
+        if self._closed:
+            task.cancelled = True
+            return task
+        self._jobs.put(task)
+        self._outstanding += 1
+        if self._outstanding == 1:
+            self._set_busy(True)
+        self._schedule_poll()
+        return task
+
+    def cancel(self, task):
+        """Skip a queued task or interrupt a running one; it will not call back"""
+        task.cancelled = True
+        with self._current_lock:
+            if self._current is task and self._conn is not None:
+                self._conn.interrupt()
+
+    def cancel_all(self):
+        """Cancel every outstanding task"""
+        with self._current_lock:
+            current = self._current
+        pending = []
+        while True:
+            try:
+                pending.append(self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        for task in pending:
+            if task is not None:
+                task.cancelled = True
+            self._jobs.put(task)  # Still reported back so the outstanding count stays right
+        if current is not None:
+            self.cancel(current)
+
+    def watch(self, callback):
+        """Call callback(busy) when the worker becomes busy or idle"""
+        self._watchers.append(callback)
+
+    def close(self):
+        """Cancel outstanding tasks and stop the thread once it is free"""
+        if self._closed:
+            return
+        self._closed = True
+        self.cancel_all()
+        self._jobs.put(None)
+        if self._poll_id is not None:
+            try:
+                self.widget.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            try:
+                self._poll_id = self.widget.after(self.poll_interval, self._poll)
+            except tk.TclError:
+                self._poll_id = None  # The window has been destroyed
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if task.cancelled or self._closed:
+                continue
+            try:
+                if error is None:
+                    if task.on_done:
+                        task.on_done(result)
+                elif task.on_error:
+                    task.on_error(error)
+                else:
+                    print(f"Database task error: {error}")
+            except Exception as e:
+                print(f"Database task callback error: {e}")
+        if self._closed:
+            return
+        if self._outstanding > 0:
+            self._schedule_poll()
+        else:
+            self._set_busy(False)
+
+    def _set_busy(self, busy):
+        try:
+            self.widget.winfo_toplevel().config(cursor="watch" if busy else "")
+        except tk.TclError:
+            return
+        for callback in list(self._watchers):
+            try:
+                callback(busy)
+            except Exception as e:
+                print(f"Busy indicator error: {e}")
+
+    # --- worker thread -------------------------------------------------------
+
+    def _run(self):
+        try:
+            self._conn = get_connection(self.db_path)
+        except sqlite3.Error as e:
+            self._conn = None
+            print(f"Database worker failed to connect: {e}")
+        try:
+            while True:
+                task = self._jobs.get()
+                if task is None:
+                    break
+                self._results.put(self._execute(task))
+        finally:
+            if self._conn is not None:
+                release_connection(self._conn, self.db_path)
+
+    def _execute(self, task):
+        if task.cancelled:
+            return task, None, None
+        if self._conn is None:
+            return task, None, sqlite3.OperationalError("no database connection")
+        with self._current_lock:
+            self._current = task
+        try:
+            result = task.fn(self._conn, *task.args)
+            if self._conn.in_transaction:
+                self._conn.commit()
+            return task, result, None
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            return task, None, e
+        finally:
+            with self._current_lock:
+                self._current = None
+            task.done = True
+
+
+class BusyIndicator(ttk.Frame):
+    """Progress bar and Cancel button that are shown while worker is busy"""
+    def __init__(self, parent, worker, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.worker = worker
+        self.progress = ttk.Progressbar(self, mode="indeterminate", length=120)
+        self.cancel_button = ttk.Button(self, text="Cancel", command=worker.cancel_all)
+        worker.watch(self.set_busy)
+        if worker.busy:
+            self.set_busy(True)
+
+    def set_busy(self, busy):
+        if busy:
+            self.progress.pack(side=tk.LEFT, padx=(0, 5))
+            self.cancel_button.pack(side=tk.LEFT)
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+            self.progress.pack_forget()
+            self.cancel_button.pack_forget()
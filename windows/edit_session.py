@@ -0,0 +1,125 @@
+'''
+    TIMETABLE EDIT SESSION
+
+    Changes made in the timetable editor are staged here instead of being
+    written to SCHEDULE one by one. Every edit (one cell, or all the cells
+    of a merged Double/Triple lesson) is one action that can be undone and
+    redone. The staged cells are checked together against the conflict
+    rules of the editor's OccupancyIndex, and save() writes them all in one
+    transaction, so a batch of edits costs one commit.
+
+    A cell's state is the SCHEDULE row (DAYID, PERIODID, SUBCODE, SECTION,
+    FINI) of its entry ID, or None when the cell is free.
+'''
+
+
+class EditSession:
+    """
+    Staged SCHEDULE changes with undo/redo.
+
+    stage() records an action of [(entry ID, state before, state after)];
+    the caller mirrors the after states into its OccupancyIndex, and
+    undo()/redo() return the (entry ID, state) pairs to mirror back.
+    """
+    def __init__(self):
+        self._undo = []
+        self._redo = []
+
+    def stage(self, changes):
+        """Record one action, [(entry_id, before, after)]"""
+        changes = [(entry_id, before, after) for entry_id, before, after in changes if before != after]
+        if changes:
+            self._undo.append(changes)
+            self._redo.clear()
+        return changes
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        """Take back the last action; returns [(entry_id, state to restore)]"""
+        if not self._undo:
+            return []
+        changes = self._undo.pop()
+        self._redo.append(changes)
+        return [(entry_id, before) for entry_id, before, _ in reversed(changes)]
+
+    def redo(self):
+        """Apply the last undone action again; returns [(entry_id, state to restore)]"""
+        if not self._redo:
+            return []
+        changes = self._redo.pop()
+        self._undo.append(changes)
+        return [(entry_id, after) for entry_id, _, after in changes]
+
+    def pending(self):
+        """{entry_id: (state in the database, staged state)} of every cell the staged actions change"""
+        cells = {}
+        for changes in self._undo:
+            for entry_id, before, after in changes:
+                original = cells[entry_id][0] if entry_id in cells else before
+                cells[entry_id] = (original, after)
+        return {entry_id: states for entry_id, states in cells.items() if states[0] != states[1]}
+
+    def __len__(self):
+        return len(self.pending())
+
+    def problems(self, index, day_names):
+        """
+        Conflicts of the staged cells, as messages; index must already hold
+        the staged states. Checks double-booked faculty, faculty over the
+        daily period limit and subjects placed more than LESSONS_PER_WEEK.
+        """
+        messages = []
+        checked = set()
+        for _, staged in self.pending().values():
+            if staged is None:
+                continue
+            day_id, period_id, subcode, section, fini = staged
+            day_name = day_names[day_id] if day_id < len(day_names) else f"Day {day_id}"
+            if fini != 'NULL':
+                others = [other for other in index.sections_of(fini, day_id, period_id) if other != section]
+                if others:
+                    messages.append(f"Faculty '{fini}' is in sections {', '.join([section] + others)} "
+                                    f"during {day_name} Period {period_id + 1}")
+                load = index.faculty_day_load(fini, day_id)
+                if load > index.max_daily_periods and ('load', fini, day_id) not in checked:
+                    checked.add(('load', fini, day_id))
+                    messages.append(f"Faculty '{fini}' has {load} periods on {day_name}")
+            limit = index.lessons_per_week(section, subcode)
+            count = index.subject_count(section, subcode)
+            if subcode != 'NULL' and limit and count > limit and ('limit', section, subcode) not in checked:
+                checked.add(('limit', section, subcode))
+                messages.append(f"Subject {subcode} is placed {count} times in section {section}, "
+                                f"but LESSONS_PER_WEEK is {limit}")
+        return messages
+
+    def save(self, conn):
+        """
+        Write the staged cells in one transaction and forget the undo
+        history; returns the number of cells written. On a database error
+        nothing is written and the session is kept. Raises RuntimeError if
+        conn already has an open transaction, rather than committing
+        someone else's work with the staged cells.
+        """
+        pending = self.pending()
+        deletes = [(entry_id,) for entry_id, (_, staged) in pending.items() if staged is None]
+        replaces = [(entry_id, *staged) for entry_id, (_, staged) in pending.items() if staged is not None]
+        if conn.in_transaction:
+            raise RuntimeError("The connection has uncommitted changes that are not part of this session")
+        with conn:  # Commits once, or rolls back everything
+            conn.executemany("DELETE FROM SCHEDULE WHERE ID=?", deletes)
+            conn.executemany("""
+                REPLACE INTO SCHEDULE (ID, DAYID, PERIODID, SUBCODE, SECTION, FINI)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, replaces)
+        self.discard()
+        return len(pending)
+
+    def discard(self):
+        """Forget every staged action"""
+        self._undo.clear()
+        self._redo.clear()
@@ -1,8 +1,10 @@
-import sqlite3
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 import sys
+from database import get_connection, release_connection
+from db_worker import DBWorker
+from app_shell import run_standalone
 
 fid = passw = conf_passw = name = ini = email = subcode1 = subcode2 = None
 
@@ -11,10 +13,13 @@ fid = passw = conf_passw = name = ini = email = subcode1 = subcode2 = None
     LIST OF FUNCTIONS USED FOR VARIOUS FUNCTIONS THROUGH TKinter INTERFACE
         * create_treeview()
         * update_treeview()
+        * fill_treeview()
         * parse_data()
         * update data()
         * remove_data()
         * show_passw()
+        * on_destroy()
+        * open_window()
 '''
 
 # create treeview (call this function once)
@@ -34,11 +39,23 @@ def create_treeview():
 
 
 # update treeview (call this function after each update)
+# the rows are read on the database worker thread, then shown by fill_treeview()
+load_task = None
 def update_treeview():
+    global load_task
+    if load_task:
+        load_task.cancel()
+    load_task = worker.submit(
+        lambda conn: conn.execute("SELECT FID, NAME, SUBCODE1, SUBCODE2 FROM FACULTY").fetchall(),
+        on_done=fill_treeview,
+        on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load the list: {e}")
+    )
+
+
+def fill_treeview(rows):
     for row in tree.get_children():
         tree.delete(row)
-    cursor = conn.execute("SELECT FID, NAME, SUBCODE1, SUBCODE2 FROM FACULTY")
-    for row in cursor:
+    for row in rows:
         tree.insert(
             "",
             0,
@@ -154,25 +171,23 @@ def show_passw():
 
 
 
-# main
-if __name__ == "__main__":  
+# stop the worker and return the connection when the window is closed
+def on_destroy(event):
+    if event.widget is subtk:
+        worker.close()
+        release_connection(conn)
+
 
+# build the window (as a Toplevel of master) and return it
+def open_window(master=None):
+    global B1_show, combo1, combo2, conf_passw_entry, conn, email_entry, fid_entry, ini_entry
+    global name_entry, passw_entry, subcode_li, subtk, tree, worker
     '''
         DATABASE CONNECTIONS AND SETUP
     '''
 
-    # connecting database
-    conn = sqlite3.connect(r'files/timetable.db')
-
-    # creating Tabe in the database
-    conn.execute('CREATE TABLE IF NOT EXISTS FACULTY\
-    (FID CHAR(10) NOT NULL PRIMARY KEY,\
-    PASSW CHAR(50) NOT NULL,\
-    NAME CHAR(50) NOT NULL,\
-    INI CHAR(5) NOT NULL,\
-    EMAIL CHAR(50) NOT NULL,\
-    SUBCODE1 CHAR(10) NOT NULL,\
-    SUBCODE2 CHAR(10)    )')
+    # connecting database (tables are created/upgraded by the pool on first connect)
+    conn = get_connection()
 
 
     '''
@@ -185,10 +200,14 @@ if __name__ == "__main__":
     '''
 
     # TKinter Window
-    subtk = tk.Tk()
+    subtk = tk.Toplevel(master)
     subtk.geometry('1000x550')
     subtk.title('Add/Update Faculties')
 
+    # runs the list queries off the Tk thread
+    worker = DBWorker(subtk)
+    subtk.bind("<Destroy>", on_destroy, add="+")
+
     # Label1
     tk.Label(
         subtk,
@@ -377,6 +396,8 @@ if __name__ == "__main__":
     )
     B3.place(x=650,y=465)
 
-    # looping Tkiniter window
-    subtk.mainloop()
-    conn.close() # close database after all operations
+    return subtk
+
+
+if __name__ == "__main__":
+    run_standalone('faculty', sys.modules[__name__])
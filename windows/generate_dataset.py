@@ -0,0 +1,292 @@
+import os
+import random
+import sqlite3
+
+from schema import ensure_schema
+from change_log import prune_changes
+from conflict_engine import LESSON_PERIODS
+
+'''
+    SYNTHETIC DATASET GENERATOR
+
+    Builds a database with the real schema (schema.py, migrations and
+    change log triggers included) filled with a made-up institution of any
+    size, so every screen, the conflict checks and the solver can be tried
+    at production scale: sections in grades with a class teacher and home
+    classroom, students in every section, subjects of type T (theory) and
+    P (practical, with lab rooms), faculty qualified for one or two
+    subjects, and a LESSONS curriculum per section with Single, Double and
+    Triple lessons that fits the week and the faculty's hours. With
+    --schedule the timetable solver fills SCHEDULE as well.
+
+    The same --seed always produces the same database.
+
+        python windows/generate_dataset.py --sections 200 --students-per-section 40
+        python windows/generate_dataset.py --out files/bench.db --seed 7 --schedule
+'''
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_PATH = os.path.join(PROJECT_ROOT, 'files', 'benchmark.db')
+
+DAY_CODES = ["Mo", "Tu", "We", "Th", "Fr", "Sa"]  # SCHEDULED_LESSONS allows no more days
+MAX_PERIODS = 6                                   # nor more periods per day
+GRADES = 12
+SECTION_FILL = 0.8   # share of a section's week taken by its lessons
+FACULTY_HOURS = 4    # periods per day a faculty member is given on average
+PRACTICAL_SHARE = 0.3
+LAB_SHARE = 0.25     # share of classrooms that are labs
+PASSWORD = "password"
+
+DISCIPLINES = [
+    "Mathematics", "Physics", "Chemistry", "Biology", "English", "History", "Geography",
+    "Economics", "Computer Science", "Literature", "Art", "Music", "Physical Education",
+    "Philosophy", "Statistics", "Accounting", "Civics", "Environmental Science",
+    "Psychology", "Sociology", "Electronics", "Mechanics", "French", "German", "Spanish",
+]
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Meera", "Nikhil", "Priya",
+    "Rahul", "Riya", "Rohan", "Sanya", "Tara", "Vikram", "Zoya", "Kabir", "Neha", "Omar",
+    "Lena", "Marco", "Sofia", "Liam", "Emma", "Noah", "Mia", "Lucas", "Elena", "Yusuf",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Iyer", "Khan", "Gupta", "Singh", "Reddy", "Nair", "Das", "Mehta",
+    "Rossi", "Garcia", "Smith", "Brown", "Muller", "Silva", "Novak", "Kim", "Chen", "Ali",
+]
+COLORS = ["#008080", "#4682b4", "#6b8e23", "#cd853f", "#9370db", "#20b2aa", "#db7093",
+          "#5f9ea0", "#d2691e", "#778899", "#bdb76b", "#8fbc8f", "#e9967a", "#87ceeb"]
+
+
+def _letters(index):
+    """A, B, ..., Z, AA, AB, ... for index 0, 1, ..."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _base36(number):
+    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    text = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
+
+
+def make_subjects(rng, count):
+    """[(SUBCODE, SUBNAME, SUBTYPE, COLOR)]; about PRACTICAL_SHARE of them are practicals"""
+    subjects = []
+    for i in range(count):
+        discipline = DISCIPLINES[i % len(DISCIPLINES)]
+        level = i // len(DISCIPLINES) + 1
+        practical = rng.random() < PRACTICAL_SHARE
+        name = f"{discipline} {level}" + (" Lab" if practical else "")
+        subjects.append((f"S{i + 1:04d}", name, 'P' if practical else 'T', rng.choice(COLORS)))
+    return subjects
+
+
+def make_classrooms(rng, count):
+    """[(NAME, CAPACITY, TYPE)]; about LAB_SHARE of them are labs"""
+    rooms = []
+    for i in range(count):
+        lab = rng.random() < LAB_SHARE
+        name = f"{'LAB' if lab else 'R'}{i // 20 + 1}{i % 20 + 1:02d}"
+        rooms.append((name, rng.choice([30, 35, 40, 45, 50, 60]), 'Lab' if lab else 'Lecture'))
+    return rooms
+
+
+def make_faculty(rng, count, subjects):
+    """[(FID, PASSW, NAME, INI, EMAIL, SUBCODE1, SUBCODE2)]; every subject has someone to teach it"""
+    faculty = []
+    codes = [subject[0] for subject in subjects]
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        ini = f"{first[0]}{last[0]}{_base36(i)}"[:5]
+        # Deal the subjects out first, so none is left without a teacher
+        subcode1 = codes[i % len(codes)] if i < len(codes) else rng.choice(codes)
+        subcode2 = rng.choice(codes) if rng.random() < 0.5 else 'NULL'
+        if subcode2 == subcode1:
+            subcode2 = 'NULL'
+        faculty.append((f"F{i + 1:05d}", PASSWORD, f"{first} {last}".upper(), ini,
+                        f"{first}.{last}{i + 1}@school.example".lower(), subcode1, subcode2))
+    return faculty
+
+
+def make_sections(count):
+    """[(CLASS_NAME, GRADE)] spread over GRADES grades: 1A, 1B, ..., 12A, ..."""
+    per_grade = max(1, -(-count // GRADES))
+    return [(f"{i // per_grade + 1}{_letters(i % per_grade)}", str(i // per_grade + 1)) for i in range(count)]
+
+
+def make_lessons(rng, sections, subjects, faculty, num_days, num_periods):
+    """
+    [(TEACHER_ID, SUBJECT_CODE, CLASS_NAME, LESSONS_PER_WEEK, LESSON_TYPE)]
+    filling SECTION_FILL of every section's week, each lesson taught by a
+    faculty member qualified for it who still has hours left, if any
+    """
+    subject_type = {code: subtype for code, _, subtype, _ in subjects}
+    qualified = {}
+    for fid, *_, subcode1, subcode2 in faculty:
+        for code in (subcode1, subcode2):
+            if code != 'NULL':
+                qualified.setdefault(code, []).append(fid)
+    hours_left = {fid: num_days * min(FACULTY_HOURS, num_periods) for fid, *_ in faculty}
+    week = num_days * num_periods
+    codes = sorted(qualified)
+
+    lessons = []
+    for section, _ in sections:
+        periods_left = int(week * SECTION_FILL)
+        for code in rng.sample(codes, len(codes)):
+            if periods_left <= 0:
+                break
+            if subject_type[code] == 'P':
+                lesson_type = 'Triple' if rng.random() < 0.2 else 'Double'
+                blocks = 1
+            else:
+                lesson_type = 'Double' if rng.random() < 0.15 else 'Single'
+                blocks = rng.randint(1, 2) if lesson_type == 'Double' else rng.randint(2, 5)
+            # LESSONS_PER_WEEK is a whole number of spans, as the conflict rules require
+            span = LESSON_PERIODS[lesson_type]
+            if span > min(num_periods, periods_left):
+                lesson_type, span, blocks = 'Single', 1, min(blocks * span, periods_left)
+            per_week = min(blocks, periods_left // span) * span
+            teachers = [fid for fid in qualified[code] if hours_left[fid] >= per_week]
+            if not teachers:
+                continue  # Everyone who teaches it is full; try another subject
+            teacher = max(teachers, key=lambda fid: (hours_left[fid], fid))
+            hours_left[teacher] -= per_week
+            periods_left -= per_week
+            lessons.append((teacher, code, section, per_week, lesson_type))
+    return lessons
+
+
+def make_students(sections, per_section):
+    """[(SID, PASSW, NAME, ROLL, SECTION)]"""
+    students = []
+    for section, _ in sections:
+        for roll in range(1, per_section + 1):
+            n = len(students)
+            name = f"{FIRST_NAMES[n % len(FIRST_NAMES)]} {LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+            students.append((f"ST{n + 1:07d}", PASSWORD, name.upper(), roll, section))
+    return students
+
+
+def period_times(num_periods):
+    """PERIODS_CONFIG value: hourly 45 minute periods from 8:00"""
+    return ",".join(f"{p + 1}:{8 + p}:00-{8 + p}:45" for p in range(num_periods))
+
+
+def generate(path, sections=60, students_per_section=40, faculty=None, subjects=40, classrooms=None,
+             num_days=5, num_periods=6, seed=0, progress=print):
+    """
+    Write a new database at path (which must not exist); returns {table: rows}.
+    faculty and classrooms default to what the sections need.
+    """
+    rng = random.Random(seed)
+    if faculty is None:
+        # Enough hours for every section's lessons, with a third to spare
+        faculty = max(subjects, -(-int(sections * num_days * num_periods * SECTION_FILL * 4 // 3)
+                                  // (num_days * min(FACULTY_HOURS, num_periods))))
+    if classrooms is None:
+        classrooms = int(sections * 1.3) + 1
+
+    subject_rows = make_subjects(rng, subjects)
+    room_rows = make_classrooms(rng, classrooms)
+    faculty_rows = make_faculty(rng, faculty, subject_rows)
+    section_rows = make_sections(sections)
+    lesson_rows = make_lessons(rng, section_rows, subject_rows, faculty_rows, num_days, num_periods)
+    student_rows = make_students(section_rows, students_per_section)
+
+    lecture_rooms = [name for name, _, kind in room_rows if kind == 'Lecture'] or [name for name, *_ in room_rows]
+    labs = [name for name, _, kind in room_rows if kind == 'Lab'] or lecture_rooms
+    fids = [row[0] for row in faculty_rows]
+    classes = [(name, name, 0, rng.choice(COLORS), fids[i % len(fids)], grade)
+               for i, (name, grade) in enumerate(section_rows)]
+    class_rooms = [(name, students_per_section, lecture_rooms[i % len(lecture_rooms)])
+                   for i, (name, _) in enumerate(section_rows)]
+    subject_rooms = [(code, room) for code, _, subtype, _ in subject_rows if subtype == 'P'
+                     for room in rng.sample(labs, min(len(labs), rng.randint(1, 3)))]
+    settings = [('NUM_DAYS', str(num_days)), ('NUM_PERIODS', str(num_periods)),
+                ('DAYS_ENABLED', ",".join(DAY_CODES[:num_days])), ('PERIODS_CONFIG', period_times(num_periods))]
+
+    ensure_schema(path)
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executemany("INSERT INTO SUBJECTS (SUBCODE, SUBNAME, SUBTYPE, COLOR) VALUES (?, ?, ?, ?)",
+                             subject_rows)
+            conn.executemany("INSERT INTO CLASSROOMS (NAME, CAPACITY, TYPE) VALUES (?, ?, ?)", room_rows)
+            conn.executemany("INSERT INTO SUBJECT_CLASSROOMS (SUBCODE, CLASSROOM_NAME) VALUES (?, ?)",
+                             subject_rooms)
+            conn.executemany("INSERT INTO FACULTY (FID, PASSW, NAME, INI, EMAIL, SUBCODE1, SUBCODE2) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", faculty_rows)
+            conn.executemany("INSERT INTO CLASSES (CLASS_NAME, SHORT_NAME, PRINT_SUBJECT_PICTURES, COLOR, "
+                             "CLASS_TEACHER_FID, GRADE) VALUES (?, ?, ?, ?, ?, ?)", classes)
+            conn.executemany("INSERT INTO CLASS (NAME, CAPACITY, HOME_CLASSROOM) VALUES (?, ?, ?)", class_rooms)
+            conn.executemany("INSERT INTO LESSONS (TEACHER_ID, SUBJECT_CODE, CLASS_NAME, LESSONS_PER_WEEK, "
+                             "LESSON_TYPE) VALUES (?, ?, ?, ?, ?)", lesson_rows)
+            conn.executemany("INSERT INTO STUDENT (SID, PASSW, NAME, ROLL, SECTION) VALUES (?, ?, ?, ?, ?)",
+                             student_rows)
+            conn.executemany("INSERT OR REPLACE INTO TIMETABLE_SETTINGS (setting_name, setting_value) "
+                             "VALUES (?, ?)", settings)
+            conn.execute("INSERT OR REPLACE INTO SCHOOL_CONFIG (config_id, school_name, academic_year, "
+                         "periods_per_day, num_days, weekend_type, use_multiweek) VALUES (1, ?, ?, ?, ?, ?, 0)",
+                         (f"Synthetic School {seed}", "2025-2026", num_periods, num_days,
+                          "Saturday-Sunday" if num_days <= 5 else "Sunday"))
+        # The initial load is not a change anyone has to catch up with
+        prune_changes(conn, 0)
+    finally:
+        conn.close()
+
+    counts = {'SUBJECTS': len(subject_rows), 'CLASSROOMS': len(room_rows), 'FACULTY': len(faculty_rows),
+              'CLASSES': len(classes), 'LESSONS': len(lesson_rows), 'STUDENT': len(student_rows)}
+    progress(", ".join(f"{count} {table}" for table, count in counts.items()))
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic timetable database for benchmarking")
+    parser.add_argument('--out', default=OUTPUT_PATH, help="database file to create (default files/benchmark.db)")
+    parser.add_argument('--sections', type=int, default=60, help="number of sections (classes)")
+    parser.add_argument('--students-per-section', type=int, default=40, help="students in every section")
+    parser.add_argument('--faculty', type=int, help="number of faculty (default: enough for the lessons)")
+    parser.add_argument('--subjects', type=int, default=40, help="number of subjects")
+    parser.add_argument('--classrooms', type=int, help="number of classrooms (default: 1.3 per section)")
+    parser.add_argument('--days', type=int, choices=range(1, len(DAY_CODES) + 1), default=5, help="days per week")
+    parser.add_argument('--periods', type=int, choices=range(1, MAX_PERIODS + 1), default=6, help="periods per day")
+    parser.add_argument('--seed', type=int, default=0, help="random seed; the same seed gives the same database")
+    parser.add_argument('--schedule', action='store_true', help="also fill SCHEDULE with the timetable solver")
+    parser.add_argument('--force', action='store_true', help="replace the output file if it exists")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        if not args.force:
+            parser.error(f"{args.out} exists; use --force to replace it")
+        if os.path.abspath(args.out) == os.path.join(PROJECT_ROOT, 'files', 'timetable.db'):
+            parser.error("refusing to replace the application database files/timetable.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.out + suffix):
+                os.remove(args.out + suffix)
+
+    started = time.perf_counter()
+    generate(args.out, args.sections, args.students_per_section, args.faculty, args.subjects, args.classrooms,
+             args.days, args.periods, args.seed)
+    print(f"Wrote {args.out} ({time.perf_counter() - started:.2f} s)")
+
+    if args.schedule:
+        from timetable_solver import generate_timetable, write_schedule
+        conn = sqlite3.connect(args.out)
+        try:
+            solution = generate_timetable(conn, seed=args.seed)
+            print(solution.summary().splitlines()[0])
+            print(f"Wrote {write_schedule(conn, solution)} SCHEDULE rows")
+            prune_changes(conn, 0)
+        finally:
+            conn.close()
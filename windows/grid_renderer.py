@@ -0,0 +1,70 @@
+import tkinter as tk
+
+'''
+    GRID RENDERER
+
+    Repaints a grid of Tk widgets from a description of what each cell
+    should show. Only the options that differ from what is already on
+    screen are configured, and any number of render() calls made before
+    Tk is idle are coalesced into a single pass, so switching the shown
+    section costs one batch of small changes instead of a synchronous
+    redraw per cell.
+'''
+
+
+class GridRenderer:
+    """
+    Diff-based renderer of a grid of widgets.
+
+    cells maps a key, e.g. (day, period), to its widget; render() takes
+    {key: {option: value}} with the options each cell should have.
+    """
+    def __init__(self, cells):
+        self.cells = dict(cells)
+        self._shown = {}    # {key: {option: value}} as last configured
+        self._pending = {}  # {key: {option: value}} waiting for the idle pass
+        self._after_id = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Renderer of a list of rows of widgets, keyed by (row, column)"""
+        return cls({(i, j): widget for i, row in enumerate(rows) for j, widget in enumerate(row)})
+
+    def render(self, state):
+        """Show state on the next idle pass; later calls override earlier ones cell by cell"""
+        for key, options in state.items():
+            self._pending.setdefault(key, {}).update(options)
+        if self._after_id is None and self.cells:
+            widget = next(iter(self.cells.values()))
+            try:
+                self._after_id = widget.after_idle(self.flush)
+            except tk.TclError:
+                self._pending.clear()  # The grid has been destroyed
+
+    def flush(self):
+        """Apply pending changes now"""
+        self._after_id = None
+        pending, self._pending = self._pending, {}
+        for key, options in pending.items():
+            widget = self.cells.get(key)
+            if widget is None:
+                continue
+            shown = self._shown.setdefault(key, {})
+            changed = {option: value for option, value in options.items() if shown.get(option) != value}
+            if not changed:
+                continue
+            try:
+                widget.configure(**changed)
+            except tk.TclError:
+                return  # The grid has been destroyed
+            shown.update(changed)
+
+    def cancel(self):
+        """Drop pending changes"""
+        if self._after_id is not None:
+            try:
+                next(iter(self.cells.values())).after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+        self._pending.clear()
@@ -0,0 +1,258 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+
+from database import DB_PATH, get_connection, release_connection
+from timetable_layout import DAY_MAP, load_timetable_structure, find_spans
+from batch_export import safe_name, load_manifest, save_manifest
+
+'''
+    ICALENDAR FEEDS
+
+    Writes one .ics calendar per section and per faculty member (by INI)
+    from SCHEDULE and SUBJECTS, with the period times of TIMETABLE_SETTINGS,
+    so the timetable can be subscribed to from a phone calendar. Every
+    lesson is a weekly recurring event; consecutive periods of the same
+    lesson are one event. The whole schedule is read with one query and
+    grouped in memory; a manifest in the output folder keeps a hash of
+    each feed's lessons, and only the feeds whose hash changed are written
+    (atomically, so a web server never serves half a file). Feeds of
+    sections or faculty that left the schedule are removed.
+
+        python windows/ical_export.py
+        python windows/ical_export.py --start 2025-09-01 --until 2026-01-31
+'''
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'files', 'calendars')
+FEED_VERSION = 1  # bump when the feed format changes, so every feed is written again
+
+PRODID = "-//Timetable Management System//Timetable//EN"
+UID_DOMAIN = "timetable.local"
+WEEKDAYS = {"Mo": 0, "Tu": 1, "We": 2, "Th": 3, "Fr": 4, "Sa": 5}
+
+FEED_QUERY = """
+    SELECT SCHEDULE.SECTION, SCHEDULE.DAYID, SCHEDULE.PERIODID, SCHEDULE.SUBCODE, SCHEDULE.FINI,
+           SUBJECTS.SUBNAME, FACULTY.NAME
+    FROM SCHEDULE
+    LEFT JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
+    LEFT JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI
+    ORDER BY SCHEDULE.SECTION, SCHEDULE.DAYID, SCHEDULE.PERIODID
+"""
+
+
+def parse_period_times(periods_info):
+    """{period number: (start time, end time)} of the periods whose time range parses"""
+    times = {}
+    for period, time_range in periods_info.items():
+        try:
+            start, end = (datetime.datetime.strptime(part.strip(), "%H:%M").time()
+                          for part in str(time_range).split("-", 1))
+        except ValueError:
+            print(f"Cannot read the time of period {period}: {time_range!r}; its lessons are left out")
+            continue
+        times[period] = (start, end)
+    return times
+
+
+def collect_feeds(conn):
+    """
+    {feed key: {'name', 'lessons'}} of every section ('sections/<name>')
+    and faculty member ('faculty/<INI>'); lessons is {day code: {period
+    number: {'subject_code', 'summary', 'description'}}}
+    """
+    feeds = {}
+
+    def add(key, name, day_code, period, cell):
+        feed = feeds.setdefault(key, {'name': name, 'lessons': {}})
+        day = feed['lessons'].setdefault(day_code, {})
+        if period not in day:
+            day[period] = cell
+        elif 'section' in cell:
+            # Same faculty member in two sections at once: one event naming both
+            day[period]['summary'] += f", {cell['section']}"
+            day[period]['subject_code'] += f",{cell['section']}"
+
+    for section, day_id, period_id, subcode, fini, subname, faculty_name in conn.execute(FEED_QUERY):
+        if subcode in (None, 'NULL') or day_id not in DAY_MAP:
+            continue
+        day_code, period = DAY_MAP[day_id], period_id + 1
+        subject = f"{subname} ({subcode})" if subname else subcode
+        has_faculty = fini not in (None, 'NULL')
+        add(f"sections/{section}", section, day_code, period, {
+            'subject_code': f"{subcode}@{fini}",
+            'summary': subject,
+            'description': f"Faculty: {faculty_name or fini}" if has_faculty else "",
+        })
+        if has_faculty:
+            add(f"faculty/{fini}", faculty_name or fini, day_code, period, {
+                'subject_code': f"{subcode}@{section}",
+                'summary': f"{subject} - {section}",
+                'description': f"Section: {section}",
+                'section': section,
+            })
+    return feeds
+
+
+def feed_hash(feed, period_times, start, until):
+    """Hash of everything a feed contains, the generation time aside"""
+    content = [FEED_VERSION, feed['name'], feed['lessons'],
+               sorted((p, str(s), str(e)) for p, (s, e) in period_times.items()), str(start), str(until)]
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _escape(text):
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line):
+    """Fold a content line to 75 octets, as RFC 5545 requires"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74  # continuation lines start with a space
+        chunk = encoded[:limit]
+        while True:
+            try:
+                text = chunk.decode('utf-8')  # never split a multi-byte character
+                break
+            except UnicodeDecodeError:
+                chunk = chunk[:-1]
+        parts.append(text)
+        encoded = encoded[len(chunk):]
+    return "\r\n ".join(parts)
+
+
+def _local(value):
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def build_calendar(key, feed, period_times, start, until, stamp):
+    """Text of the .ics file of a feed; events start on the first lesson day on or after start"""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape('Timetable ' + feed['name'])}",
+    ]
+    rrule = "RRULE:FREQ=WEEKLY"
+    if until:
+        rrule += f";UNTIL={until.strftime('%Y%m%d')}T235959"
+
+    for day_code, day_cells in sorted(feed['lessons'].items(), key=lambda item: WEEKDAYS.get(item[0], 7)):
+        if day_code not in WEEKDAYS:
+            continue
+        first_day = start + datetime.timedelta(days=(WEEKDAYS[day_code] - start.weekday()) % 7)
+        cells = {period: cell for period, cell in day_cells.items() if period in period_times}
+        for span in find_spans(cells, period_times.keys()):
+            cell = cells[span[0]]
+            begin = datetime.datetime.combine(first_day, period_times[span[0]][0])
+            end = datetime.datetime.combine(first_day, period_times[span[-1]][1])
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{safe_name(key)}-{day_code}-{span[0]}@{UID_DOMAIN}",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART:{_local(begin)}",
+                f"DTEND:{_local(end)}",
+                rrule,
+                f"SUMMARY:{_escape(cell['summary'])}",
+            ]
+            if cell['description']:
+                lines.append(f"DESCRIPTION:{_escape(cell['description'])}")
+            lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
+
+
+def feed_path(out_dir, key):
+    kind, name = key.split("/", 1)
+    return os.path.join(out_dir, kind, f"{safe_name(name)}.ics")
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def export_feeds(db_path=None, out_dir=OUTPUT_DIR, start=None, until=None, force=False):
+    """
+    Write the feeds that changed since the last run and remove the ones
+    that are gone; returns (written, unchanged, removed).
+    start and until default to those of the last run, and start to the
+    Monday of the current week on the first run, so the feeds do not all
+    change every week.
+    """
+    manifest = load_manifest(out_dir)
+    hashes = manifest.get('feeds', {})
+    if start is None:
+        if manifest.get('start'):
+            start = datetime.date.fromisoformat(manifest['start'])
+        else:
+            today = datetime.date.today()
+            start = today - datetime.timedelta(days=today.weekday())
+    if until is None and manifest.get('until'):
+        until = datetime.date.fromisoformat(manifest['until'])
+
+    conn = get_connection(db_path)
+    try:
+        _, periods_info = load_timetable_structure(conn)
+        feeds = collect_feeds(conn)
+    finally:
+        release_connection(conn, db_path)
+    period_times = parse_period_times(periods_info)
+
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    written = unchanged = removed = 0
+    try:
+        for key, feed in feeds.items():
+            digest = feed_hash(feed, period_times, start, until)
+            path = feed_path(out_dir, key)
+            if not force and hashes.get(key) == digest and os.path.exists(path):
+                unchanged += 1
+                continue
+            _write_atomic(path, build_calendar(key, feed, period_times, start, until, stamp))
+            hashes[key] = digest
+            written += 1
+
+        for key in [key for key in hashes if key not in feeds]:
+            path = feed_path(out_dir, key)
+            if os.path.exists(path):
+                os.remove(path)
+            del hashes[key]
+            removed += 1
+    finally:
+        save_manifest(out_dir, {'start': str(start), 'until': str(until) if until else None, 'feeds': hashes})
+    return written, unchanged, removed
+
+
+def _date(text):
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+        raise ValueError(f"expected YYYY-MM-DD, got {text!r}")
+    return datetime.date.fromisoformat(text)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write an iCalendar feed per section and per faculty member")
+    parser.add_argument('--out', default=OUTPUT_DIR, help="output folder (default files/calendars)")
+    parser.add_argument('--start', type=_date, help="first day of the term, YYYY-MM-DD (default: as last run, else this Monday)")
+    parser.add_argument('--until', type=_date, help="last day of the term, YYYY-MM-DD (default: as last run, else no end)")
+    parser.add_argument('--force', action='store_true', help="write every feed, changed or not")
+    parser.add_argument('--db', help="database file (default files/timetable.db)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    written, unchanged, removed = export_feeds(args.db or DB_PATH, args.out, args.start, args.until, args.force)
+    print(f"Wrote {written} feeds to {args.out}, {unchanged} unchanged, {removed} removed "
+          f"({time.perf_counter() - started:.2f} s)")
@@ -7,6 +7,8 @@ import os
 # Import necessary modules but not non-existent functions
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from schema import migrate
+from database import get_connection, release_connection
 # No longer trying to import functions that don't exist
 # from faculty import get_faculty_list
 # from subjects import get_subject_list
@@ -188,7 +190,7 @@ class LessonDialog(tk.Toplevel):
         try:
             if not os.path.exists(os.path.dirname(self.db_file)):
                 os.makedirs(os.path.dirname(self.db_file))
-            return sqlite3.connect(self.db_file)
+            return get_connection(self.db_file)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to connect to database: {e}")
             return None
@@ -197,45 +199,7 @@ class LessonDialog(tk.Toplevel):
         """Create necessary tables if they don't exist"""
         try:
             if self.conn:
-                # Create LESSONS table
-                self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS LESSONS (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    TEACHER_ID TEXT NOT NULL,
-                    SUBJECT_CODE TEXT NOT NULL,
-                    CLASS_NAME TEXT NOT NULL,
-                    LESSONS_PER_WEEK INTEGER,
-                    LESSON_TYPE TEXT,
-                    HOME_CLASSROOM INTEGER,
-                    SHARED_ROOM INTEGER,
-                    TEACHERS_CLASSROOMS INTEGER,
-                    SUBJECTS_CLASSROOMS INTEGER,
-                    JOINT_CLASSES TEXT,
-                    FOREIGN KEY (TEACHER_ID) REFERENCES FACULTY(FID),
-                    FOREIGN KEY (SUBJECT_CODE) REFERENCES SUBJECTS(SUBCODE)
-                )
-                ''')
-                
-                # Create CLASSROOMS table if not exists
-                self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS CLASSROOMS (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    NAME TEXT NOT NULL UNIQUE,
-                    CAPACITY INTEGER,
-                    TYPE TEXT
-                )
-                ''')
-                
-                # Create CLASS table if not exists
-                self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS CLASS (
-                    NAME TEXT PRIMARY KEY,
-                    CAPACITY INTEGER,
-                    HOME_CLASSROOM TEXT
-                )
-                ''')
-                
-                self.conn.commit()
+                migrate(self.conn)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to create tables: {e}")
 
@@ -456,7 +420,7 @@ class LessonDialog(tk.Toplevel):
     def __del__(self):
         """Close database connection when dialog is destroyed"""
         if hasattr(self, 'conn') and self.conn:
-            self.conn.close()
+            release_connection(self.conn, self.db_file)
 
     def subject_dropdown_click(self, event=None):
         """Handle clicks on the subject dropdown by showing subject details if needed"""
@@ -599,6 +563,10 @@ class LessonDialog(tk.Toplevel):
         # Add close button
         ttk.Button(class_window, text="Close", command=on_close).pack(pady=10)
 
+def open_window(master=None):
+    """Open the lesson dialog as a Toplevel of master (used by the app shell)"""
+    return LessonDialog(master)
+
 # Remove unused functions at the bottom
 if __name__ == '__main__':
     # This is for testing purposes
@@ -0,0 +1,261 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+
+from database import connection
+
+'''
+    NOTIFICATION SCHEDULER
+
+    One background thread serves every logged-in user. Once per day it reads
+    the day's classes for all sections and faculty members (a handful of
+    queries, independent of the number of users), turns each subscriber's
+    classes into reminders on a min-heap ordered by fire time, and sleeps
+    until the earliest one is due.
+'''
+
+# Used when TIMETABLE_SETTINGS has no PERIODS_CONFIG row
+# PERIODID (zero indexed): (hour, minute) the period starts
+DEFAULT_PERIOD_TIMES = {
+    0: (9, 0),
+    1: (10, 0),
+    2: (11, 10),
+    3: (12, 0),
+    4: (14, 0),
+    5: (15, 0),
+}
+
+LEAD_MINUTES = 15  # remind this long before a class starts
+
+SECTION_DAY_QUERY = """
+    SELECT SCHEDULE.SECTION, SCHEDULE.PERIODID, SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, FACULTY.NAME
+    FROM SCHEDULE
+    JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
+    JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI
+    WHERE SCHEDULE.DAYID = ?
+"""
+
+FACULTY_DAY_QUERY = """
+    SELECT SCHEDULE.FINI, SCHEDULE.PERIODID, SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, SCHEDULE.SECTION
+    FROM SCHEDULE
+    JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
+    WHERE SCHEDULE.DAYID = ?
+"""
+
+
+def load_period_times(conn):
+    """
+    Read period start times from TIMETABLE_SETTINGS PERIODS_CONFIG.
+
+    The setting is formatted "1:8:00-8:45,2:9:00-9:45,..." with 1-based
+    period numbers. Returns {PERIODID: (hour, minute)} with zero-indexed
+    periods, or DEFAULT_PERIOD_TIMES if the setting is missing or invalid.
+    """
+    row = conn.execute(
+        "SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'PERIODS_CONFIG'"
+    ).fetchone()
+    if not row or not row[0]:
+        return dict(DEFAULT_PERIOD_TIMES)
+
+    period_times = {}
+    try:
+        for period_conf in row[0].split(','):
+            if ':' not in period_conf:
+                continue
+            period_num, time_range = period_conf.split(':', 1)
+            hour, minute = time_range.split('-')[0].strip().split(':')
+            period_times[int(period_num) - 1] = (int(hour), int(minute))
+    except ValueError as e:
+        print(f"Error parsing periods config: {e}. Using default period times.")
+        return dict(DEFAULT_PERIOD_TIMES)
+    return period_times or dict(DEFAULT_PERIOD_TIMES)
+
+
+class NotificationScheduler:
+    """
+    Single-threaded scheduler of "upcoming class" reminders.
+
+    subscribe() registers a user together with the callback that shows
+    their reminders; callback(title, message) is called from the scheduler
+    thread. Re-subscribing a user replaces their earlier subscription.
+    """
+    def __init__(self, db_path=None, lead_minutes=LEAD_MINUTES):
+        self.db_path = db_path
+        self.lead = timedelta(minutes=lead_minutes)
+
+        self._cond = threading.Condition()
+        self._subscribers = {}  # {(user_type, user_id): (generation, callback)}
+        self._generation = itertools.count()
+        self._heap = []         # [(fire_at, seq, key, generation, period)]
+        self._seq = itertools.count()
+        self._thread = None
+        self._stop = False
+
+        # Today's classes, loaded once per day
+        self._loaded_date = None
+        self._day_start = None
+        self._period_times = {}
+        self._by_section = {}   # {SECTION: [(PERIODID, SUBCODE, SUBNAME, FACULTY NAME)]}
+        self._by_faculty = {}   # {FINI: [(PERIODID, SUBCODE, SUBNAME, SECTION)]}
+        self._student_sections = {}  # {SID: SECTION}
+        self._faculty_inis = {}      # {FID: INI}
+
+    def subscribe(self, user_id, user_type, callback):
+        """Start sending reminders for user_id ('student' or 'faculty') to callback"""
+        key = (user_type.lower(), user_id)
+        with self._cond:
+            generation = next(self._generation)
+            self._subscribers[key] = (generation, callback)
+            if self._loaded_date is not None:
+                self._schedule_user(key, generation, datetime.now())
+            self._cond.notify()
+        self._ensure_thread()
+
+    def unsubscribe(self, user_id, user_type):
+        """Stop reminders for user_id; their pending heap entries are skipped"""
+        with self._cond:
+            self._subscribers.pop((user_type.lower(), user_id), None)
+
+    def stop(self):
+        """Stop the scheduler thread"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="notification-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stop:
+                    return
+                now = datetime.now()
+                if now.date() != self._loaded_date:
+                    try:
+                        self._load_day(now)
+                    except Exception as e:
+                        print(f"Error loading today's classes: {e}")
+                        self._cond.wait(timeout=60)  # Retry in a minute
+                        continue
+
+                due = self._pop_due(now)
+                if not due:
+                    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+                    wake_at = min(self._heap[0][0], tomorrow) if self._heap else tomorrow
+                    self._cond.wait(timeout=max((wake_at - now).total_seconds(), 0))
+                    continue
+
+            # Show reminders outside the lock so a slow callback never blocks subscribe()
+            for callback, title, message in due:
+                try:
+                    callback(title, message)
+                except Exception as e:
+                    print(f"Notification error: {e}")
+
+    def _pop_due(self, now):
+        """Remove due reminders from the heap and build their messages"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, key, generation, period = heapq.heappop(self._heap)
+            subscription = self._subscribers.get(key)
+            if not subscription or subscription[0] != generation:
+                continue  # Unsubscribed or re-subscribed since this was scheduled
+            title, message = self._build_message(key, period, now)
+            due.append((subscription[1], title, message))
+        return due
+
+    def _load_day(self, now):
+        """Read today's classes for every section and faculty member and rebuild the heap"""
+        day_of_week = now.weekday()  # Monday is 0
+        with connection(self.db_path) as conn:
+            self._period_times = load_period_times(conn)
+
+            self._by_section = {}
+            for section, period, subcode, subname, fac_name in conn.execute(SECTION_DAY_QUERY, (day_of_week,)):
+                self._by_section.setdefault(section, []).append((period, subcode, subname, fac_name))
+
+            self._by_faculty = {}
+            for fini, period, subcode, subname, section in conn.execute(FACULTY_DAY_QUERY, (day_of_week,)):
+                self._by_faculty.setdefault(fini, []).append((period, subcode, subname, section))
+
+            self._student_sections = dict(conn.execute("SELECT SID, SECTION FROM STUDENT"))
+            self._faculty_inis = dict(conn.execute("SELECT FID, INI FROM FACULTY"))
+
+        self._loaded_date = now.date()
+        self._day_start = datetime.combine(now.date(), datetime.min.time())
+        self._heap = []
+        for key, (generation, _) in self._subscribers.items():
+            self._schedule_user(key, generation, now)
+
+    def _classes_of(self, key):
+        user_type, user_id = key
+        if user_type == 'student':
+            return self._by_section.get(self._student_sections.get(user_id), [])
+        return self._by_faculty.get(self._faculty_inis.get(user_id), [])
+
+    def _schedule_user(self, key, generation, now):
+        """Push a reminder for each of the user's remaining classes today"""
+        if key[0] == 'student' and key[1] not in self._student_sections:
+            self._refresh_identity(key)
+        elif key[0] == 'faculty' and key[1] not in self._faculty_inis:
+            self._refresh_identity(key)
+
+        for period, *_ in self._classes_of(key):
+            start = self._period_start(period)
+            if start is None or start < now:
+                continue  # Unknown period or class already started
+            fire_at = max(start - self.lead, now)
+            heapq.heappush(self._heap, (fire_at, next(self._seq), key, generation, period))
+
+    def _refresh_identity(self, key):
+        """Look up a user added after today's load"""
+        user_type, user_id = key
+        with connection(self.db_path) as conn:
+            if user_type == 'student':
+                row = conn.execute("SELECT SECTION FROM STUDENT WHERE SID = ?", (user_id,)).fetchone()
+                if row:
+                    self._student_sections[user_id] = row[0]
+            else:
+                row = conn.execute("SELECT INI FROM FACULTY WHERE FID = ?", (user_id,)).fetchone()
+                if row:
+                    self._faculty_inis[user_id] = row[0]
+
+    def _period_start(self, period):
+        if period not in self._period_times:
+            return None
+        hour, minute = self._period_times[period]
+        return self._day_start.replace(hour=hour, minute=minute)
+
+    def _build_message(self, key, period, now):
+        minutes_left = max(int((self._period_start(period) - now).total_seconds() // 60), 0)
+        title = "Upcoming Class"
+        for class_period, subcode, subname, other in self._classes_of(key):
+            if class_period != period:
+                continue
+            if key[0] == 'student':
+                return title, f"You have {subname} ({subcode}) in {minutes_left} minutes!\nFaculty: {other}\nPeriod: {period + 1}"
+            return title, f"You have {subname} ({subcode}) in {minutes_left} minutes!\nSection: {other}\nPeriod: {period + 1}"
+        return title, f"You have a class in {minutes_left} minutes!\nPeriod: {period + 1}"
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_notification_scheduler():
+    """Return the process-wide notification scheduler (created on first use)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = NotificationScheduler()
+        return _scheduler
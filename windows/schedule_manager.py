@@ -5,7 +5,103 @@ import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from condition import TimetableConditionChecker
+from conflict_engine import find_conflicts
+from timetable_quality import TimetableArrays, quality_report
+from schema import ensure_schema
+from database import get_connection, release_connection
+from db_worker import DBWorker, BusyIndicator
+
+# Day names shown next to DAYID
+DAY_NAMES = {
+    0: "Monday",
+    1: "Tuesday",
+    2: "Wednesday",
+    3: "Thursday",
+    4: "Friday",
+    5: "Saturday",
+    6: "Sunday"
+}
+
+# Columns offered in the filter comboboxes
+FILTER_QUERIES = {
+    'sections': "SELECT DISTINCT SECTION FROM SCHEDULE ORDER BY SECTION",
+    'days': "SELECT DISTINCT DAYID FROM SCHEDULE ORDER BY DAYID",
+    'periods': "SELECT DISTINCT PERIODID FROM SCHEDULE ORDER BY PERIODID",
+    'subjects': "SELECT DISTINCT SUBCODE FROM SCHEDULE ORDER BY SUBCODE",
+}
+
+# Filter name -> SCHEDULE column it matches
+FILTER_COLUMNS = {
+    'section': "SCHEDULE.SECTION",
+    'day': "SCHEDULE.DAYID",
+    'period': "SCHEDULE.PERIODID",
+    'subject': "SCHEDULE.SUBCODE",
+}
+
+SCHEDULE_QUERY = """
+    SELECT
+        SCHEDULE.ID,
+        SCHEDULE.SECTION,
+        SCHEDULE.DAYID,
+        SCHEDULE.PERIODID,
+        SCHEDULE.SUBCODE,
+        SUBJECTS.SUBNAME,
+        SCHEDULE.FINI,
+        FACULTY.NAME
+    FROM SCHEDULE
+    LEFT JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
+    LEFT JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI
+"""
+
+# Rows are paged in this order; the sort key of the last row shown is the cursor of the next page
+SORT_KEY = "(SCHEDULE.SECTION, SCHEDULE.DAYID, SCHEDULE.PERIODID, SCHEDULE.ID)"
+
+PAGE_SIZE = 500       # rows fetched per page
+LOAD_AHEAD = 0.9      # fetch the next page once the view scrolls past this fraction of the loaded rows
+
+
+def _sort_key(row):
+    """Cursor of a SCHEDULE_QUERY row: (SECTION, DAYID, PERIODID, ID)"""
+    return (row[1], row[2], row[3], row[0])
+
+
+def fetch_schedule(conn, filters, after=None, limit=PAGE_SIZE, count=False, options=False):
+    """
+    One page of schedule rows matching filters ({filter name: value}),
+    starting after the cursor after; runs on the database worker thread.
+
+    Returns (rows, total matching rows or None, filter options or None);
+    the total and the options are only queried when asked for.
+    """
+    where, params = [], []
+    for name, value in filters.items():
+        where.append(f"{FILTER_COLUMNS[name]} = ?")
+        params.append(value)
+    filter_sql = " WHERE " + " AND ".join(where) if where else ""
+
+    page_where = list(where)
+    page_params = list(params)
+    if after is not None:
+        page_where.append(f"{SORT_KEY} > (?, ?, ?, ?)")
+        page_params += list(after)
+    query = SCHEDULE_QUERY
+    if page_where:
+        query += " WHERE " + " AND ".join(page_where)
+    query += f" ORDER BY {SORT_KEY[1:-1]} LIMIT ?"
+    rows = conn.execute(query, page_params + [limit]).fetchall()
+
+    total = conn.execute("SELECT COUNT(*) FROM SCHEDULE" + filter_sql, params).fetchone()[0] if count else None
+    if options:
+        options = {name: [row[0] for row in conn.execute(sql)] for name, sql in FILTER_QUERIES.items()}
+    else:
+        options = None
+    return rows, total, options
+
+
+def fetch_quality_report(conn):
+    """quality_report() of SCHEDULE; runs on the database worker thread"""
+    return quality_report(TimetableArrays.from_connection(conn))
+
 
 class ScheduleManager(tk.Tk):
     """
@@ -26,6 +122,20 @@ class ScheduleManager(tk.Tk):
             messagebox.showerror("Database Error", "Failed to connect to database.")
             self.destroy()
             return
+        
+        # Long queries run on a worker thread so the window stays responsive
+        self.worker = DBWorker(self, self.db_path)
+        self._load_task = None
+        
+        # Rows are paged into the treeview as it scrolls
+        self._filters = {}        # filters of the rows shown
+        self._cursor = None       # sort key of the last row shown
+        self._exhausted = False   # every matching row is shown
+        self._total = 0           # rows matching the filters
+        
+        # Filter options are kept until the database changes
+        self._options = None
+        self._options_version = None
             
         # Create UI elements
         self._create_ui()
@@ -43,7 +153,7 @@ class ScheduleManager(tk.Tk):
                 messagebox.showerror("Database Error", f"Database not found at: {self.db_path}")
                 return None
                 
-            return sqlite3.connect(self.db_path)
+            return get_connection(self.db_path)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to connect to database: {e}")
             return None
@@ -118,7 +228,15 @@ class ScheduleManager(tk.Tk):
             text="Check for Conflicts",
             command=self.check_for_conflicts
         )
-        self.check_conflicts_btn.pack(side=tk.LEFT)
+        self.check_conflicts_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Quality report button
+        self.quality_btn = ttk.Button(
+            action_frame,
+            text="Quality Report",
+            command=self.show_quality_report
+        )
+        self.quality_btn.pack(side=tk.LEFT)
         
         # Reload button
         self.reload_btn = ttk.Button(
@@ -162,8 +280,8 @@ class ScheduleManager(tk.Tk):
         self.tree.column("faculty_name", width=200)
         
         # Add scrollbars
-        y_scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=y_scrollbar.set)
+        self.y_scrollbar = y_scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
         
         x_scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
         self.tree.configure(xscrollcommand=x_scrollbar.set)
@@ -175,128 +293,143 @@ class ScheduleManager(tk.Tk):
         
         # Status bar
         self.status_var = tk.StringVar()
-        self.status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        self.status_bar.pack(fill=tk.X, side=tk.BOTTOM, pady=(10, 0))
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill=tk.X, side=tk.BOTTOM, pady=(10, 0))
+        BusyIndicator(status_frame, self.worker).pack(side=tk.RIGHT, padx=(5, 0))
+        self.status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        self.status_bar.pack(fill=tk.X, side=tk.LEFT, expand=True)
         
         # Set up treeview bindings
         self.tree.bind("<Double-1>", self.on_row_double_click)
     
+    def get_filters(self):
+        """{filter name: value} of the filters that are set"""
+        filters = {}
+        if self.section_var.get():
+            filters['section'] = self.section_var.get()
+        if self.day_var.get() != "":
+            filters['day'] = int(self.day_var.get())
+        if self.period_var.get() != "":
+            filters['period'] = int(self.period_var.get())
+        if self.subject_var.get():
+            filters['subject'] = self.subject_var.get()
+        return filters
+    
     def load_schedule_data(self):
-        """Load data from the SCHEDULE table into the treeview"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        try:
-            # Get day names mapping (dayid to day name)
-            day_names = {
-                0: "Monday",
-                1: "Tuesday",
-                2: "Wednesday",
-                3: "Thursday",
-                4: "Friday",
-                5: "Saturday",
-                6: "Sunday"
-            }
-            
-            # Build query with joins to get subject and faculty names
-            query = """
-            SELECT 
-                SCHEDULE.ID, 
-                SCHEDULE.SECTION, 
-                SCHEDULE.DAYID, 
-                SCHEDULE.PERIODID, 
-                SCHEDULE.SUBCODE, 
-                SUBJECTS.SUBNAME,
-                SCHEDULE.FINI,
-                FACULTY.NAME
-            FROM SCHEDULE
-            LEFT JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
-            LEFT JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI
-            """
-            
-            # Apply filters if any are set
-            where_clauses = []
-            params = []
-            
-            if hasattr(self, 'section_var') and self.section_var.get():
-                where_clauses.append("SCHEDULE.SECTION = ?")
-                params.append(self.section_var.get())
-            
-            if hasattr(self, 'day_var') and self.day_var.get() != "":
-                where_clauses.append("SCHEDULE.DAYID = ?")
-                params.append(int(self.day_var.get()))
-            
-            if hasattr(self, 'period_var') and self.period_var.get() != "":
-                where_clauses.append("SCHEDULE.PERIODID = ?")
-                params.append(int(self.period_var.get()))
-            
-            if hasattr(self, 'subject_var') and self.subject_var.get():
-                where_clauses.append("SCHEDULE.SUBCODE = ?")
-                params.append(self.subject_var.get())
-            
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-            
-            query += " ORDER BY SCHEDULE.SECTION, SCHEDULE.DAYID, SCHEDULE.PERIODID"
-            
-            cursor = self.conn.execute(query, params)
-            
-            # Populate the treeview
-            rows = cursor.fetchall()
-            for row in rows:
-                id_val, section, day_id, period_id, subject_code, subject_name, faculty_code, faculty_name = row
-                
-                # Get day name from the mapping
-                day_name = day_names.get(day_id, f"Day {day_id}")
-                
-                # Insert into treeview
-                self.tree.insert("", tk.END, values=(
-                    id_val, 
-                    section, 
-                    day_id, 
-                    day_name, 
-                    period_id, 
-                    subject_code, 
-                    subject_name or "", 
-                    faculty_code, 
-                    faculty_name or ""
-                ))
-            
-            # Update status bar
-            self.status_var.set(f"Loaded {len(rows)} schedule entries")
-            
-            # Update the filter comboboxes with available values
-            self.update_filter_options()
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to load schedule data: {e}")
+        """
+        Load the rows matching the filters from the start, as many as are
+        shown now (at least a page), and update the treeview by diff
+        """
+        filters = self.get_filters()
+        limit = max(PAGE_SIZE, len(self.tree.get_children()))
+        
+        # Filter options are re-read only when another connection committed since the last read
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        refresh_options = self._options is None or version != self._options_version
+        
+        # Only the latest load is shown
+        if self._load_task:
+            self._load_task.cancel()
+        self.status_var.set("Loading schedule...")
+        self._load_task = self.worker.submit(
+            fetch_schedule, filters, None, limit, True, refresh_options,
+            on_done=lambda result: self._show_schedule_data(result, filters, limit, version),
+            on_error=self._on_load_error
+        )
     
-    def update_filter_options(self):
-        """Update the filter combobox options with values from the database"""
-        try:
-            # Get sections
-            cursor = self.conn.execute("SELECT DISTINCT SECTION FROM SCHEDULE ORDER BY SECTION")
-            sections = [row[0] for row in cursor.fetchall()]
-            self.section_combo['values'] = [""] + sections
-            
-            # Get day IDs
-            cursor = self.conn.execute("SELECT DISTINCT DAYID FROM SCHEDULE ORDER BY DAYID")
-            day_ids = [str(row[0]) for row in cursor.fetchall()]
-            self.day_combo['values'] = [""] + day_ids
-            
-            # Get period IDs
-            cursor = self.conn.execute("SELECT DISTINCT PERIODID FROM SCHEDULE ORDER BY PERIODID")
-            period_ids = [str(row[0]) for row in cursor.fetchall()]
-            self.period_combo['values'] = [""] + period_ids
-            
-            # Get subject codes
-            cursor = self.conn.execute("SELECT DISTINCT SUBCODE FROM SCHEDULE ORDER BY SUBCODE")
-            subject_codes = [row[0] for row in cursor.fetchall()]
-            self.subject_combo['values'] = [""] + subject_codes
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to update filter options: {e}")
+    def load_more(self):
+        """Append the next page of rows, unless one is loading or all are shown"""
+        if self._load_task or self._exhausted:
+            return
+        self._load_task = self.worker.submit(
+            fetch_schedule, self._filters, self._cursor, PAGE_SIZE,
+            on_done=self._append_schedule_data,
+            on_error=self._on_load_error
+        )
+    
+    def _on_load_error(self, error):
+        self._load_task = None
+        messagebox.showerror("Database Error", f"Failed to load schedule data: {error}")
+    
+    def _on_tree_scroll(self, first, last):
+        """yscrollcommand of the treeview: load the next page when nearing the end"""
+        self.y_scrollbar.set(first, last)
+        if float(last) >= LOAD_AHEAD:
+            self.load_more()
+    
+    def _row_values(self, row):
+        """Treeview values of a SCHEDULE_QUERY row"""
+        id_val, section, day_id, period_id, subject_code, subject_name, faculty_code, faculty_name = row
+        day_name = DAY_NAMES.get(day_id, f"Day {day_id}")
+        return (id_val, section, day_id, day_name, period_id, subject_code,
+                subject_name or "", faculty_code, faculty_name or "")
+    
+    def _show_schedule_data(self, result, filters, limit, version):
+        """Make the treeview show the rows fetched by load_schedule_data, changing only what differs"""
+        self._load_task = None
+        rows, total, options = result
+        
+        # Items are keyed by SCHEDULE.ID: drop the ones that no longer match, update and reorder the rest
+        wanted = {str(row[0]) for row in rows}
+        shown = set(self.tree.get_children())
+        stale = [iid for iid in shown if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+        # Order of the items, kept up to date so only rows out of place are moved
+        order = list(self.tree.get_children())
+        for index, row in enumerate(rows):
+            iid = str(row[0])
+            values = self._row_values(row)
+            if iid in shown:
+                # Tk hands back numbers as ints, so compare both sides as strings
+                if tuple(str(v) for v in self.tree.item(iid, "values")) != tuple(str(v) for v in values):
+                    self.tree.item(iid, values=values)
+                if index < len(order) and order[index] == iid:
+                    continue
+                self.tree.move(iid, "", index)
+                order.remove(iid)
+            else:
+                self.tree.insert("", index, iid=iid, values=values)
+            order.insert(index, iid)
+        
+        self._filters = filters
+        self._cursor = _sort_key(rows[-1]) if rows else None
+        self._exhausted = len(rows) < limit
+        self._total = total
+        self._update_status()
+        
+        # Update the filter comboboxes with available values
+        if options is not None:
+            self._options = options
+            self._options_version = version
+            self.update_filter_options(options)
+    
+    def _append_schedule_data(self, result):
+        """Add a page fetched by load_more below the rows shown"""
+        self._load_task = None
+        rows, _, _ = result
+        for row in rows:
+            iid = str(row[0])
+            if not self.tree.exists(iid):
+                self.tree.insert("", tk.END, iid=iid, values=self._row_values(row))
+        if rows:
+            self._cursor = _sort_key(rows[-1])
+        self._exhausted = len(rows) < PAGE_SIZE
+        self._update_status()
+    
+    def _update_status(self):
+        shown = len(self.tree.get_children())
+        if self._exhausted:
+            self.status_var.set(f"Loaded {shown} schedule entries")
+        else:
+            self.status_var.set(f"Showing {shown} of {self._total} schedule entries (scroll for more)")
+    
+    def update_filter_options(self, options):
+        """Update the filter combobox options with values fetched from the database"""
+        self.section_combo['values'] = [""] + options['sections']
+        self.day_combo['values'] = [""] + [str(day_id) for day_id in options['days']]
+        self.period_combo['values'] = [""] + [str(period_id) for period_id in options['periods']]
+        self.subject_combo['values'] = [""] + options['subjects']
     
     def apply_filters(self):
         """Apply the selected filters and reload data"""
@@ -341,7 +474,8 @@ class ScheduleManager(tk.Tk):
             # Commit the transaction
             self.conn.commit()
             
-            # Reload data
+            # Reload data; this connection's own commits do not change its data_version
+            self._options = None
             self.load_schedule_data()
             
             # Update status
@@ -549,7 +683,8 @@ class ScheduleManager(tk.Tk):
             # Close the dialog
             dialog.destroy()
             
-            # Reload data
+            # Reload data; this connection's own commits do not change its data_version
+            self._options = None
             self.load_schedule_data()
             
             # Update status
@@ -570,76 +705,102 @@ class ScheduleManager(tk.Tk):
             self.update_selected()
     
     def check_for_conflicts(self):
-        """Check for conflicts in the timetable using the TimetableConditionChecker"""
-        try:
-            # Create a condition checker
-            condition_checker = TimetableConditionChecker(self.db_path)
-            
-            # Get conflicts
-            conflicts = []
-            
-            # 1. Check for subject assignments exceeding lessons_per_week limits
-            exceeded_limits = condition_checker.check_all_sections_limits()
-            for section, subject_code, current_count, limit in exceeded_limits:
-                conflicts.append(
-                    f"WARNING: Subject '{subject_code}' in section '{section}' has {current_count} assignments "
-                    f"but lessons_per_week is set to {limit}"
-                )
-            
-            # 2. Check for faculty conflicts (same faculty in multiple sections at same time)
-            query = """
-            SELECT s1.DAYID, s1.PERIODID, s1.FINI, s1.SECTION, s2.SECTION
-            FROM SCHEDULE s1
-            JOIN SCHEDULE s2 ON 
-                s1.DAYID = s2.DAYID AND 
-                s1.PERIODID = s2.PERIODID AND 
-                s1.FINI = s2.FINI AND 
-                s1.SECTION != s2.SECTION AND
-                s1.FINI != 'NULL'
-            """
-            
-            cursor = self.conn.execute(query)
-            faculty_conflicts = cursor.fetchall()
-            
-            day_names = {
-                0: "Monday",
-                1: "Tuesday",
-                2: "Wednesday",
-                3: "Thursday",
-                4: "Friday",
-                5: "Saturday",
-                6: "Sunday"
-            }
-            
-            for day_id, period_id, faculty, section1, section2 in faculty_conflicts:
-                day_name = day_names.get(day_id, f"Day {day_id}")
-                conflicts.append(
-                    f"CONFLICT: Faculty '{faculty}' is assigned to sections '{section1}' and '{section2}' "
-                    f"on {day_name} Period {period_id+1}"
-                )
-            
-            # 3. Check for lesson type conflicts (merged periods)
-            # This is typically handled by the condition checker, but would require more complex code
-            
-            # Display conflicts or success message
-            if conflicts:
-                conflict_text = "\n\n".join(conflicts)
-                messagebox.showwarning(
-                    "Timetable Conflicts", 
-                    f"The following conflicts were detected in the timetable:\n\n{conflict_text}"
-                )
-            else:
-                messagebox.showinfo("No Conflicts", "No conflicts found in the current timetable.")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to check for conflicts: {e}")
+        """Check for conflicts in the timetable using the conflict engine"""
+        self.status_var.set("Checking for conflicts...")
+        self.worker.submit(
+            lambda conn: [str(conflict) for conflict in find_conflicts(conn)],
+            on_done=self._show_conflicts,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to check for conflicts: {e}")
+        )
+    
+    def _show_conflicts(self, conflicts):
+        """Display conflicts found by check_for_conflicts, or a success message"""
+        self.status_var.set(f"{len(conflicts)} conflicts found")
+        if conflicts:
+            conflict_text = "\n\n".join(conflicts)
+            messagebox.showwarning(
+                "Timetable Conflicts", 
+                f"The following conflicts were detected in the timetable:\n\n{conflict_text}"
+            )
+        else:
+            messagebox.showinfo("No Conflicts", "No conflicts found in the current timetable.")
+    
+    def show_quality_report(self):
+        """Show soft-constraint quality per section and per faculty"""
+        self.worker.submit(
+            fetch_quality_report,
+            on_done=self._show_quality_report,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to compute timetable quality: {e}")
+        )
+    
+    def _show_quality_report(self, report):
+        """Open the quality report computed by show_quality_report"""
+        sections, faculty, total = report
+        
+        dialog = tk.Toplevel(self)
+        dialog.title("Timetable Quality")
+        dialog.geometry("700x450")
+        dialog.transient(self)
+        
+        ttk.Label(
+            dialog,
+            text=f"Total penalty: {total:.1f} (lower is better)",
+            padding=10
+        ).pack(anchor=tk.W)
+        
+        notebook = ttk.Notebook(dialog)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        # Sections tab
+        section_tree = self._create_report_tree(notebook, (
+            ("section", "Section", 150),
+            ("gaps", "Free Periods Between Classes", 200),
+            ("repeats", "Subject Repeated Same Day", 200),
+            ("penalty", "Penalty", 100)
+        ))
+        for row in sorted(sections, key=lambda r: -r['penalty']):
+            section_tree.insert("", tk.END, values=(
+                row['section'], row['gaps'], row['repeats'], f"{row['penalty']:.1f}"
+            ))
+        notebook.add(section_tree.master, text="Sections")
+        
+        # Faculty tab
+        faculty_tree = self._create_report_tree(notebook, (
+            ("faculty", "Faculty", 100),
+            ("periods", "Periods/Week", 100),
+            ("daily", "Periods Per Day", 160),
+            ("unevenness", "Uneven Load", 100),
+            ("recess", "Across Recess", 100),
+            ("penalty", "Penalty", 100)
+        ))
+        for row in sorted(faculty, key=lambda r: -r['penalty']):
+            faculty_tree.insert("", tk.END, values=(
+                row['faculty'], row['periods'], " ".join(map(str, row['daily'])),
+                f"{row['unevenness']:.1f}", row['recess'], f"{row['penalty']:.1f}"
+            ))
+        notebook.add(faculty_tree.master, text="Faculty")
+    
+    def _create_report_tree(self, parent, columns):
+        """Create a scrollable Treeview with (name, heading, width) columns inside its own frame"""
+        frame = ttk.Frame(parent)
+        tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show="headings")
+        for name, heading, width in columns:
+            tree.heading(name, text=heading)
+            tree.column(name, width=width, anchor=tk.CENTER)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        return tree
     
     def _on_closing(self):
         """Close the database connection and destroy the window"""
+        self.worker.close()
         if self.conn:
-            self.conn.close()
+            release_connection(self.conn, self.db_path)
         self.destroy()
 
 if __name__ == "__main__":
+    ensure_schema()  # Create/upgrade tables once at startup
     app = ScheduleManager()
     app.mainloop() 
\ No newline at end of file
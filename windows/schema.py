@@ -0,0 +1,298 @@
+import sqlite3
+import os
+
+'''
+    VERSIONED SCHEMA MIGRATIONS
+
+    Every table used by the application is created here instead of in ad-hoc
+    CREATE TABLE IF NOT EXISTS blocks spread across the windows modules.
+    The applied version is stored in PRAGMA user_version, and migrations run
+    inside a BEGIN IMMEDIATE transaction so two windows starting at the same
+    time cannot apply the same step twice.
+'''
+
+# DAYID AND PERIODID ARE ZERO INDEXED
+BASE_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS SUBJECTS
+    (SUBCODE CHAR(10) NOT NULL PRIMARY KEY,
+    SUBNAME CHAR(50) NOT NULL,
+    SUBTYPE CHAR(1) NOT NULL,
+    COLOR TEXT DEFAULT '#008080')''',
+
+    '''CREATE TABLE IF NOT EXISTS FACULTY
+    (FID CHAR(10) NOT NULL PRIMARY KEY,
+    PASSW CHAR(50) NOT NULL,
+    NAME CHAR(50) NOT NULL,
+    INI CHAR(5) NOT NULL,
+    EMAIL CHAR(50) NOT NULL,
+    SUBCODE1 CHAR(10) NOT NULL,
+    SUBCODE2 CHAR(10))''',
+
+    '''CREATE TABLE IF NOT EXISTS STUDENT
+    (SID CHAR(10) NOT NULL PRIMARY KEY,
+    PASSW CHAR(50) NOT NULL,
+    NAME CHAR(50) NOT NULL,
+    ROLL INTEGER NOT NULL,
+    SECTION CHAR(5) NOT NULL)''',
+
+    '''CREATE TABLE IF NOT EXISTS SCHEDULE
+    (ID CHAR(10) NOT NULL PRIMARY KEY,
+    DAYID INT NOT NULL,
+    PERIODID INT NOT NULL,
+    SUBCODE CHAR(10) NOT NULL,
+    SECTION CHAR(5) NOT NULL,
+    FINI CHAR(10) NOT NULL)''',
+
+    '''CREATE TABLE IF NOT EXISTS SCHOOL_CONFIG (
+        config_id INTEGER PRIMARY KEY, -- Use a fixed ID for single config
+        school_name TEXT NOT NULL,
+        academic_year TEXT,
+        registration_name TEXT,
+        periods_per_day INTEGER,
+        num_days INTEGER,
+        weekend_type TEXT,
+        use_multiweek BOOLEAN
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS SETUP_PROGRESS (
+        step TEXT PRIMARY KEY,
+        completed INTEGER DEFAULT 0,
+        completion_date TEXT
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS SCHOOL_CHARACTERISTICS (
+        id INTEGER PRIMARY KEY,
+        course_word TEXT,
+        organized_classes TEXT,
+        individual_schedule TEXT,
+        options TEXT,
+        multiple_buildings TEXT,
+        different_weeks TEXT
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS NAVIGATION_FLAGS (
+        flag_name TEXT PRIMARY KEY,
+        flag_value TEXT
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS LESSONS (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        TEACHER_ID TEXT NOT NULL,
+        SUBJECT_CODE TEXT NOT NULL,
+        CLASS_NAME TEXT NOT NULL,
+        LESSONS_PER_WEEK INTEGER,
+        LESSON_TYPE TEXT,
+        HOME_CLASSROOM INTEGER,
+        SHARED_ROOM INTEGER,
+        TEACHERS_CLASSROOMS INTEGER,
+        SUBJECTS_CLASSROOMS INTEGER,
+        JOINT_CLASSES TEXT,
+        FOREIGN KEY (TEACHER_ID) REFERENCES FACULTY(FID),
+        FOREIGN KEY (SUBJECT_CODE) REFERENCES SUBJECTS(SUBCODE)
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS CLASSROOMS (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        NAME TEXT NOT NULL UNIQUE,
+        CAPACITY INTEGER,
+        TYPE TEXT
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS CLASS (
+        NAME TEXT PRIMARY KEY,
+        CAPACITY INTEGER,
+        HOME_CLASSROOM TEXT
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS CLASSES (
+        CLASS_NAME TEXT PRIMARY KEY NOT NULL,
+        SHORT_NAME TEXT,
+        PRINT_SUBJECT_PICTURES INTEGER, -- 0 for False, 1 for True
+        COLOR TEXT,
+        CLASS_TEACHER_FID TEXT, -- Foreign key to FACULTY table
+        GRADE TEXT,
+        FOREIGN KEY (CLASS_TEACHER_FID) REFERENCES FACULTY(FID)
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS SCHEDULED_LESSONS (
+        SCHEDULE_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        CLASS_NAME TEXT NOT NULL,
+        DAY_OF_WEEK TEXT NOT NULL CHECK(DAY_OF_WEEK IN ('Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa')),
+        PERIOD_NUMBER INTEGER NOT NULL CHECK(PERIOD_NUMBER BETWEEN 1 AND 6),
+        SUBJECT_CODE TEXT,
+        TEACHER_ID TEXT,
+        FOREIGN KEY (SUBJECT_CODE) REFERENCES SUBJECTS(SUBCODE),
+        FOREIGN KEY (TEACHER_ID) REFERENCES FACULTY(FID)
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS TIMETABLE_STRUCTURE (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        days_enabled TEXT,         -- Comma-separated list of enabled days (e.g., "Mo,Tu,We,Th,Fr")
+        num_periods INTEGER,       -- Number of periods per day
+        period_start_times TEXT,   -- Comma-separated list of period start times (e.g., "8:00,9:00,...")
+        period_end_times TEXT      -- Comma-separated list of period end times (e.g., "8:45,9:45,...")
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS TIMETABLE_SETTINGS (
+        setting_name TEXT PRIMARY KEY,
+        setting_value TEXT,
+        last_updated TEXT
+    )''',
+
+    '''CREATE TABLE IF NOT EXISTS SUBJECT_CLASSROOMS
+    (ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    SUBCODE CHAR(10) NOT NULL,
+    CLASSROOM_NAME TEXT NOT NULL,
+    FOREIGN KEY(SUBCODE) REFERENCES SUBJECTS(SUBCODE),
+    UNIQUE(SUBCODE, CLASSROOM_NAME))''',
+]
+
+# Covering indexes for the hot SCHEDULE lookups:
+#   by section and slot  (student timetables, editor, notifications)
+#   by faculty and slot  (conflict checks, faculty timetables)
+#   by section and subject (lessons_per_week counts)
+SCHEDULE_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS IDX_SCHEDULE_SECTION_SLOT ON SCHEDULE (SECTION, DAYID, PERIODID, SUBCODE, FINI)',
+    'CREATE INDEX IF NOT EXISTS IDX_SCHEDULE_FACULTY_SLOT ON SCHEDULE (FINI, DAYID, PERIODID, SECTION, SUBCODE)',
+    'CREATE INDEX IF NOT EXISTS IDX_SCHEDULE_SECTION_SUBJECT ON SCHEDULE (SECTION, SUBCODE)',
+    'CREATE INDEX IF NOT EXISTS IDX_LESSONS_CLASS_SUBJECT ON LESSONS (CLASS_NAME, SUBJECT_CODE)',
+]
+
+
+def _create_base_tables(conn):
+    for statement in BASE_TABLES:
+        conn.execute(statement)
+
+    # Databases created before subjects.py stored colors lack this column
+    columns = [info[1] for info in conn.execute("PRAGMA table_info(SUBJECTS)")]
+    if 'COLOR' not in columns:
+        conn.execute("ALTER TABLE SUBJECTS ADD COLUMN COLOR TEXT DEFAULT '#008080'")
+
+
+def _create_schedule_indexes(conn):
+    for statement in SCHEDULE_INDEXES:
+        conn.execute(statement)
+    conn.execute("ANALYZE")
+
+
+# Every write to these tables is logged in SCHEDULE_CHANGES by triggers (see change_log.py).
+# Table -> expressions of (row key, SECTION, DAYID, PERIODID, SUBCODE, FACULTY) over a row
+# referred to as {row}; DAYID/PERIODID are zero indexed, as in SCHEDULE.
+TRACKED_TABLES = {
+    'SCHEDULE': ('{row}.ID', '{row}.SECTION', '{row}.DAYID', '{row}.PERIODID', '{row}.SUBCODE', '{row}.FINI'),
+    'SCHEDULED_LESSONS': ('{row}.SCHEDULE_ID', '{row}.CLASS_NAME',
+                          "(instr('MoTuWeThFrSa', {row}.DAY_OF_WEEK) - 1) / 2", '{row}.PERIOD_NUMBER - 1',
+                          '{row}.SUBJECT_CODE', '{row}.TEACHER_ID'),
+    'LESSONS': ('{row}.ID', '{row}.CLASS_NAME', 'NULL', 'NULL', '{row}.SUBJECT_CODE', '{row}.TEACHER_ID'),
+    'SUBJECTS': ('{row}.SUBCODE', 'NULL', 'NULL', 'NULL', '{row}.SUBCODE', 'NULL'),
+    'FACULTY': ('{row}.FID', 'NULL', 'NULL', 'NULL', 'NULL', '{row}.INI'),
+}
+
+# VERSION never goes back or gets reused (AUTOINCREMENT), even after old entries are pruned
+CHANGE_LOG_TABLE = '''CREATE TABLE IF NOT EXISTS SCHEDULE_CHANGES (
+    VERSION INTEGER PRIMARY KEY AUTOINCREMENT,
+    TABLE_NAME TEXT NOT NULL,
+    OPERATION TEXT NOT NULL,  -- INSERT, UPDATE or DELETE
+    ROW_KEY TEXT,
+    SECTION TEXT,
+    DAYID INTEGER,
+    PERIODID INTEGER,
+    SUBCODE TEXT,
+    FACULTY TEXT
+)'''
+
+
+LOG_CHANGE = "INSERT INTO SCHEDULE_CHANGES (TABLE_NAME, OPERATION, ROW_KEY, SECTION, DAYID, PERIODID, SUBCODE, FACULTY)"
+
+
+def _log_values(table, operation, row):
+    """Values of the SCHEDULE_CHANGES entry of one row of table (row is OLD, NEW or the table)"""
+    values = ", ".join(expression.format(row=row) for expression in TRACKED_TABLES[table])
+    return f"'{table}', '{operation}', {values}"
+
+
+def _create_change_log(conn):
+    conn.execute(CHANGE_LOG_TABLE)
+    for table, expressions in TRACKED_TABLES.items():
+        key = expressions[0].split('.', 1)[1]
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_LOG_INSERT AFTER INSERT ON {table} BEGIN
+            {LOG_CHANGE} VALUES ({_log_values(table, 'INSERT', 'NEW')});
+        END""")
+        # Both the old and the new cell of an update are affected
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_LOG_UPDATE AFTER UPDATE ON {table} BEGIN
+            {LOG_CHANGE} VALUES ({_log_values(table, 'UPDATE', 'OLD')});
+            {LOG_CHANGE} VALUES ({_log_values(table, 'UPDATE', 'NEW')});
+        END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_LOG_DELETE AFTER DELETE ON {table} BEGIN
+            {LOG_CHANGE} VALUES ({_log_values(table, 'DELETE', 'OLD')});
+        END""")
+        # REPLACE INTO deletes the row it replaces without firing delete triggers, so log that row here
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_LOG_REPLACE BEFORE INSERT ON {table} BEGIN
+            {LOG_CHANGE} SELECT {_log_values(table, 'DELETE', table)} FROM {table} WHERE {key} = NEW.{key};
+        END""")
+
+
+# (version, description, function) - append new steps, never edit old ones
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "SCHEDULE lookup indexes", _create_schedule_indexes),
+    (3, "change log", _create_change_log),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Bring the database schema up to SCHEMA_VERSION.
+
+    Cheap to call repeatedly: when the recorded version is current it costs
+    a single PRAGMA read.
+
+    Returns:
+        int: The schema version after migrating
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+
+    # Finish any transaction the caller left open before taking the write lock
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have migrated while we waited for the lock
+        current = get_schema_version(conn)
+        for version, description, apply in MIGRATIONS:
+            if version > current:
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                current = version
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return current
+
+
+def ensure_schema(db_path=None):
+    """Open the database at db_path (default $TIMETABLE_DB, else files/timetable.db) and migrate it"""
+    if db_path is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        db_path = os.environ.get('TIMETABLE_DB') or os.path.join(project_root, 'files', 'timetable.db')
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        version = migrate(conn)
+        from change_log import prune_changes
+        prune_changes(conn)  # Keep the change log from growing without bound
+        return version
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print(f"Schema version: {ensure_schema()}")
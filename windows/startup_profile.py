@@ -0,0 +1,188 @@
+import ast
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+'''
+    STARTUP PROFILE
+
+    Measures the cold-start import cost of every entry point: main.py and
+    app.py (whose top-level imports are replayed, since running them would
+    open a window or need a Streamlit server) and each screen of the app
+    shell (whose module is imported, module-level work included). Every
+    measurement runs in a fresh interpreter with -X importtime, and the
+    report breaks the total down into the slowest top-level imports the
+    same way that flag does. Results can be saved as a JSON baseline and
+    later runs compared against it to catch regressions. Timings depend on
+    the machine, so the baseline is recorded locally and not committed.
+
+    Screens that open the database at import time are pointed at a copy
+    of files/timetable.db (through TIMETABLE_DB), so profiling never
+    migrates or writes the real one.
+
+        python windows/startup_profile.py
+        python windows/startup_profile.py --save-baseline
+        python windows/startup_profile.py --compare
+'''
+
+WINDOWS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(WINDOWS_DIR)
+BASELINE_PATH = os.path.join(PROJECT_ROOT, 'files', 'startup_baseline.json')  # local, ignored by git
+
+SCRIPTS = ['main.py', 'app.py']  # Entry points run as scripts from the project root
+
+TOLERANCE = 0.25  # Allowed slowdown over the baseline, as a fraction
+SLACK_MS = 10     # and in milliseconds, so tiny imports do not trip on noise
+
+
+def script_imports(path):
+    """Source of the top-level imports (and sys.path setup) of a script"""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    tree = ast.parse(source)
+    lines = []
+    for node in tree.body:
+        is_import = isinstance(node, (ast.Import, ast.ImportFrom))
+        is_path_setup = isinstance(node, ast.Expr) and 'sys.path' in ast.get_source_segment(source, node)
+        if is_import or is_path_setup:
+            lines.append(ast.get_source_segment(source, node))
+    return "\n".join(lines)
+
+
+def entry_points():
+    """{name: (code that imports the entry point, its module or None)} for the scripts and every screen"""
+    from app_shell import SCREENS
+    entries = {script: (script_imports(os.path.join(PROJECT_ROOT, script)), None) for script in SCRIPTS}
+    setup = f"import sys; sys.path.insert(0, {WINDOWS_DIR!r})\n"
+    for module in sorted(set(SCREENS.values())):
+        entries[f"windows/{module}.py"] = (setup + f"import {module}", module)
+    return entries
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile(code, runs=3, entry_module=None, env=None):
+    """
+    Import cost of code in fresh interpreters.
+
+    Returns a dict with import_ms (the median over runs of the summed
+    cumulative time of top-level imports), wall_ms (median interpreter
+    run time), top (slowest imports of the median run, one level below
+    entry_module when given) and error (the last stderr line when the
+    code failed, else None). env is the environment of the interpreters.
+    """
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, env=env)
+        wall_ms = (time.perf_counter() - started) * 1000
+        rows = parse_importtime(proc.stderr)
+        top_level = [row for row in rows if row[3] == 0]
+        breakdown = [row for row in rows if row[3] <= 1 and row[0] != entry_module]
+        error = None
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+        results.append({
+            'import_ms': sum(row[2] for row in top_level) / 1000,
+            'wall_ms': wall_ms,
+            'top': [(name, cumulative / 1000)
+                    for name, _, cumulative, _ in sorted(breakdown, key=lambda r: -r[2])[:5]],
+            'error': error,
+        })
+    median = statistics.median(r['import_ms'] for r in results)
+    result = min(results, key=lambda r: abs(r['import_ms'] - median))
+    result['wall_ms'] = statistics.median(r['wall_ms'] for r in results)
+    return result
+
+
+def profile_all(runs=3, only=None):
+    """{entry point: profile()} of every (or only the named) entry point, run against a copy of the database"""
+    from database import DB_PATH
+    with tempfile.TemporaryDirectory() as scratch:
+        db_copy = os.path.join(scratch, 'timetable.db')
+        if os.path.exists(DB_PATH):
+            shutil.copyfile(DB_PATH, db_copy)
+        env = dict(os.environ, TIMETABLE_DB=db_copy)
+        return {name: profile(code, runs, module, env) for name, (code, module) in entry_points().items()
+                if not only or name in only}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = {name: {'import_ms': round(r['import_ms'], 1)}
+                for name, r in results.items() if r['error'] is None}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance=TOLERANCE, slack_ms=SLACK_MS):
+    """[(entry point, baseline ms, current ms)] that got slower than the baseline allows"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or result['error'] is not None:
+            continue
+        allowed = baseline[name]['import_ms'] * (1 + tolerance) + slack_ms
+        if result['import_ms'] > allowed:
+            regressions.append((name, baseline[name]['import_ms'], result['import_ms']))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    for name, result in results.items():
+        if result['error'] is not None:
+            print(f"{name:40} failed: {result['error']}")
+            continue
+        line = f"{name:40} {result['import_ms']:8.1f} ms imports {result['wall_ms']:8.1f} ms run"
+        if baseline and name in baseline:
+            line += f"   baseline {baseline[name]['import_ms']:8.1f} ms"
+        print(line)
+        for module, cumulative_ms in result['top']:
+            print(f"    {cumulative_ms:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure the import/startup time of every entry point")
+    parser.add_argument('entry', nargs='*', help="entry points to measure, e.g. main.py windows/step3.py (default all)")
+    parser.add_argument('--runs', type=int, default=3, help="fresh interpreters per entry point (median is reported)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="record these results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="exit with status 1 if an entry point got slower")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+
+    if args.compare and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; record one on this machine with --save-baseline first")
+
+    results = profile_all(args.runs, args.entry)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+    if args.compare:
+        regressions = compare(results, baseline or {}, args.tolerance)
+        for name, before, after in regressions:
+            print(f"Regression: {name} {before:.1f} ms -> {after:.1f} ms")
+        sys.exit(1 if regressions else 0)
@@ -1,61 +1,111 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import filedialog
 import os
 import sqlite3
-from PIL import Image, ImageTk
-import subprocess
+import sys
+from database import get_connection, release_connection
+from app_shell import open_screen, run_standalone
+from conflict_engine import find_conflicts
+from db_worker import DBWorker, BusyIndicator
 
 # Database paths
 DB_FOLDER = 'files'
 DB_NAME = 'timetable.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
+SOLVE_TIME_LIMIT = 60  # seconds the solver may take before the best timetable found is used
+
+def run_import(title, kinds):
+    """Ask for a CSV file and bulk import it as one of kinds (detected from its header)"""
+    path = filedialog.askopenfilename(parent=root, title=title,
+                                      filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    if not path:
+        return
+
+    conn = None
+    try:
+        # pandas is imported on first use, not when the wizard opens
+        from bulk_import import import_csv, read_header, detect_kind
+        kind = detect_kind(read_header(path), kinds)
+        if kind is None:
+            messagebox.showerror("Import", f"The columns of this file do not match any of: {', '.join(kinds)}")
+            return
+        conn = get_connection(DB_PATH)
+        root.config(cursor="watch")
+        root.update_idletasks()
+        report = import_csv(conn, path, kind)
+    except (ValueError, RuntimeError, OSError, sqlite3.Error) as e:
+        messagebox.showerror("Import", f"Failed to import {os.path.basename(path)}: {e}")
+        return
+    finally:
+        root.config(cursor="")
+        if conn:
+            release_connection(conn, DB_PATH)
+
+    print(report.summary())
+    if report.errors:
+        messagebox.showwarning("Import", report.summary())
+    else:
+        messagebox.showinfo("Import", report.summary())
 
-# Placeholder functions
 def import_requests():
-    print("Import student's requests clicked")
+    run_import("Import students, faculty or subjects", ['students', 'faculty', 'subjects'])
 
 def import_lessons():
-    print("Import lessons clicked")
+    run_import("Import lessons", ['lessons'])
+
+# Test and Generate run the solver on the database worker thread, so the
+# wizard stays responsive; their results are shown by the callbacks
+def _solve_and_check(conn):
+    # The solver (and numpy) is imported on first use, not when the wizard opens
+    from timetable_solver import generate_timetable as solve_timetable
+    solution = solve_timetable(conn, time_limit=SOLVE_TIME_LIMIT)  # Dry run, nothing is written
+    return solution, find_conflicts(conn)
+
+def _solve(conn):
+    from timetable_solver import generate_timetable as solve_timetable
+    return solve_timetable(conn, time_limit=SOLVE_TIME_LIMIT)
+
+def _write(conn, solution):
+    from timetable_solver import write_schedule
+    return write_schedule(conn, solution)
 
 def test_timetable():
-    print("Test clicked")
+    """Check that the lessons can be scheduled and report conflicts in the current timetable"""
+    worker.submit(_solve_and_check, on_done=show_test_result,
+                  on_error=lambda e: messagebox.showerror("Database Error", f"Failed to test timetable: {e}"))
+
+def show_test_result(result):
+    solution, conflicts = result
+    verdict = "All lessons can be scheduled." if solution.complete else "Not all lessons can be scheduled."
+    current = f"The current timetable has {len(conflicts)} conflict(s)." if conflicts else "The current timetable has no conflicts."
+    messagebox.showinfo("Test", f"{verdict}\n\n{solution.summary()}\n\n{current}")
 
 def generate_timetable():
-    print("Generate timetable button clicked - attempting to open timetable_editor_component.py")
+    """Fill SCHEDULE from the LESSONS table, then open the timetable editor"""
+    if not messagebox.askyesno("Generate timetable",
+                               "This replaces the current timetable of every class that has lessons.\n\nContinue?"):
+        return
+    # Solving and writing are separate tasks, so cancelling the solve writes nothing
+    worker.submit(_solve, on_done=write_timetable,
+                  on_error=lambda e: messagebox.showerror("Database Error", f"Failed to generate timetable: {e}"))
+
+def write_timetable(solution):
+    worker.submit(_write, solution, on_done=lambda written: open_editor(solution, written),
+                  on_error=lambda e: messagebox.showerror("Database Error", f"Failed to generate timetable: {e}"))
+
+def open_editor(solution, written):
+    print(f"Wrote {written} SCHEDULE rows")
+    messagebox.showinfo("Generate timetable", solution.summary())
+
+    print("Opening the timetable editor")
     try:
-        # Determine the correct path to timetable_editor_component.py within the windows directory
-        script_path = os.path.join(os.path.dirname(__file__), 'timetable_editor_component.py')
-        
-        # Use subprocess.Popen to run the script
-        # Using pythonw to avoid console window on Windows if available
-        python_executable = 'pythonw' if os.name == 'nt' else 'python'
-        
-        startupinfo = None
-        creation_flags = 0
-        if os.name == 'nt':  # Windows specific startupinfo to hide console
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            creation_flags = subprocess.CREATE_NO_WINDOW
-
-        # For timetable editor, we want to see its window.
-        # The timetable_editor_component.py creates its own Tkinter window.
-        subprocess.Popen(
-            [python_executable, script_path],
-            startupinfo=startupinfo,
-            # creationflags=creation_flags # Not needed if timetable_editor_component is a GUI app
-        )
-        # Optionally, you might want to close or hide the current step3 window
-        # root.destroy() # or root.withdraw()
-        print(f"Launched {script_path}")
-
-    except FileNotFoundError:
-        messagebox.showerror("File Not Found", f"Error: timetable_editor_component.py not found at {script_path}")
-        print(f"Error: timetable_editor_component.py not found at {script_path}")
+        # The editor opens in this process and shares its timetable model
+        open_screen('editor')
     except Exception as e:
         messagebox.showerror("Error", f"Could not open timetable editor: {e}")
-        print(f"Error launching timetable_editor_component.py: {e}")
+        print(f"Error opening the timetable editor: {e}")
 
 def show_help():
     print("Help button clicked")
@@ -67,7 +117,7 @@ def go_previous():
     coming_from_subjects = False
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         # Check if NAVIGATION_FLAGS table exists
@@ -85,26 +135,15 @@ def go_previous():
         print(f"Database error: {e}")
     finally:
         if conn:
-            conn.close()
+            release_connection(conn, DB_PATH)
     
     # Determine which step to go back to
-    previous_step = 'subjects.py' if coming_from_subjects else 'step2.py'
+    previous_step = 'subjects' if coming_from_subjects else 'step2'
     print(f"Going back to {previous_step}...")
     
     try:
-        # Use subprocess.Popen instead of os.system to hide console window
-        startupinfo = None
-        if os.name == 'nt':  # Windows
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-        # Launch previous step
-        subprocess.Popen(
-            ['pythonw', f'windows\\{previous_step}'],
-            startupinfo=startupinfo,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        )
+        # Open the previous step in this process
+        open_screen(previous_step)
         root.destroy() # Close current window
     except Exception as e:
         messagebox.showerror("Navigation Error", f"Could not open {previous_step}: {e}")
@@ -123,7 +162,7 @@ def check_steps_complete():
     }
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         # Check if SETUP_PROGRESS table exists
@@ -140,7 +179,7 @@ def check_steps_complete():
         print(f"Database error: {e}")
     finally:
         if conn:
-            conn.close()
+            release_connection(conn, DB_PATH)
     
     all_complete = all(status.values())
     return (all_complete, status)
@@ -149,18 +188,10 @@ def save_all_data():
     """Save all data collected in steps 1-3 to the database"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         # Mark step 3 as complete
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS SETUP_PROGRESS (
-                step TEXT PRIMARY KEY,
-                completed INTEGER DEFAULT 0,
-                completion_date TEXT
-            )
-        ''')
-        
         import datetime
         current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         cursor.execute('''
@@ -179,7 +210,7 @@ def save_all_data():
         return False
     finally:
         if conn:
-            conn.close()
+            release_connection(conn, DB_PATH)
 
 def finish_wizard():
     """Handle finishing the wizard and saving data"""
@@ -208,120 +239,142 @@ def finish_wizard():
             # User doesn't want to save, stay on current page
             pass
 
-# --- Main Window ---
-root = tk.Tk()
-root.title("School Timetable Setup Step 3")
-root.state('zoomed')  # Maximize window
-root.minsize(800, 700)  # Set minimum window size
+def open_window(master=None):
+    """Build the Step 3 window as a Toplevel of master and return it"""
+    global root, worker
+    # --- Main Window ---
+    root = tk.Toplevel(master)
+    root.title("School Timetable Setup Step 3")
+    root.state('zoomed')  # Maximize window
+    root.minsize(800, 700)  # Set minimum window size
+
+    # Add fullscreen toggle functionality
+    def toggle_fullscreen(event=None):
+        if root.attributes('-fullscreen'):
+            root.attributes('-fullscreen', False)
+            root.state('zoomed')
+        else:
+            root.attributes('-fullscreen', True)
 
-# Add fullscreen toggle functionality
-def toggle_fullscreen(event=None):
-    if root.attributes('-fullscreen'):
+    def quit_fullscreen(event=None):
         root.attributes('-fullscreen', False)
         root.state('zoomed')
-    else:
-        root.attributes('-fullscreen', True)
-
-def quit_fullscreen(event=None):
-    root.attributes('-fullscreen', False)
-    root.state('zoomed')
     
-root.bind('<Escape>', quit_fullscreen)  # Escape key exits fullscreen
-root.bind('<F11>', toggle_fullscreen)   # F11 toggles fullscreen
-
-# --- Main Layout Frames ---
-left_frame = ttk.Frame(root, width=250)
-left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
-left_frame.pack_propagate(False) # Prevent frame from shrinking to fit content
-
-right_frame = ttk.Frame(root)
-right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-# --- Left Frame Content (Image) ---
-try:
-    img_path = "BoyImage.png" # Assuming image is in the root or adjust path
-    img = Image.open(img_path)
-    # Resize if needed
-    img_width, img_height = img.size
-    aspect_ratio = img_height / img_width
-    new_width = 230 # Fit within the left_frame width
-    new_height = int(new_width * aspect_ratio)
-    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    root.bind('<Escape>', quit_fullscreen)  # Escape key exits fullscreen
+    root.bind('<F11>', toggle_fullscreen)   # F11 toggles fullscreen
+
+    # Runs the solver off the Tk thread; stopped when the window is closed
+    worker = DBWorker(root, DB_PATH)
+    def on_destroy(event):
+        if event.widget is root:
+            worker.close()
+    root.bind("<Destroy>", on_destroy, add="+")
+
+    # --- Main Layout Frames ---
+    left_frame = ttk.Frame(root, width=250)
+    left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+    left_frame.pack_propagate(False) # Prevent frame from shrinking to fit content
+
+    right_frame = ttk.Frame(root)
+    right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    # --- Left Frame Content (Image) ---
+    try:
+        from PIL import Image, ImageTk  # Pillow is only needed for this picture
+        img_path = "BoyImage.png" # Assuming image is in the root or adjust path
+        img = Image.open(img_path)
+        # Resize if needed
+        img_width, img_height = img.size
+        aspect_ratio = img_height / img_width
+        new_width = 230 # Fit within the left_frame width
+        new_height = int(new_width * aspect_ratio)
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
     
-    boy_image = ImageTk.PhotoImage(img)
-    image_label = ttk.Label(left_frame, image=boy_image)
-    image_label.pack(pady=20, anchor=tk.CENTER)
-except FileNotFoundError:
-    error_label = ttk.Label(left_frame, text="Image 'BoyImage.png'\nnot found.", justify=tk.CENTER)
-    error_label.pack(pady=20, anchor=tk.CENTER)
-except Exception as e:
-    error_label = ttk.Label(left_frame, text=f"Error loading image:\n{e}", justify=tk.CENTER)
-    error_label.pack(pady=20, anchor=tk.CENTER)
+        boy_image = ImageTk.PhotoImage(img)
+        image_label = ttk.Label(left_frame, image=boy_image)
+        image_label.image = boy_image  # Keep a reference, the window outlives this function
+        image_label.pack(pady=20, anchor=tk.CENTER)
+    except FileNotFoundError:
+        error_label = ttk.Label(left_frame, text="Image 'BoyImage.png'\nnot found.", justify=tk.CENTER)
+        error_label.pack(pady=20, anchor=tk.CENTER)
+    except Exception as e:
+        error_label = ttk.Label(left_frame, text=f"Error loading image:\n{e}", justify=tk.CENTER)
+        error_label.pack(pady=20, anchor=tk.CENTER)
+
+    # --- Right Frame Content (Sections) ---
+
+    # Section 1: Import other data
+    import_frame = ttk.LabelFrame(right_frame, text="Import other data", padding="10")
+    import_frame.pack(fill=tk.X, pady=5)
+
+    import_buttons_frame = ttk.Frame(import_frame) # Inner frame for side-by-side buttons
+    import_buttons_frame.pack(pady=5)
 
-# --- Right Frame Content (Sections) ---
+    requests_button = ttk.Button(import_buttons_frame, text="Import student's requests", command=import_requests)
+    requests_button.pack(side=tk.LEFT, padx=10)
 
-# Section 1: Import other data
-import_frame = ttk.LabelFrame(right_frame, text="Import other data", padding="10")
-import_frame.pack(fill=tk.X, pady=5)
+    lessons_button = ttk.Button(import_buttons_frame, text="Import lessons", command=import_lessons)
+    lessons_button.pack(side=tk.LEFT, padx=10)
 
-import_buttons_frame = ttk.Frame(import_frame) # Inner frame for side-by-side buttons
-import_buttons_frame.pack(pady=5)
+    # Section 2: Verify and generate
+    verify_frame = ttk.LabelFrame(right_frame, text="Verify and generate", padding="10")
+    verify_frame.pack(fill=tk.X, pady=5)
 
-requests_button = ttk.Button(import_buttons_frame, text="Import student's requests", command=import_requests)
-requests_button.pack(side=tk.LEFT, padx=10)
+    ttk.Label(verify_frame, text="To generate timetable press the 'Generate timetable' button.").pack(anchor=tk.W, pady=(0, 10))
 
-lessons_button = ttk.Button(import_buttons_frame, text="Import lessons", command=import_lessons)
-lessons_button.pack(side=tk.LEFT, padx=10)
+    verify_buttons_frame = ttk.Frame(verify_frame) # Inner frame for buttons
+    verify_buttons_frame.pack(pady=5)
 
-# Section 2: Verify and generate
-verify_frame = ttk.LabelFrame(right_frame, text="Verify and generate", padding="10")
-verify_frame.pack(fill=tk.X, pady=5)
+    test_button = ttk.Button(verify_buttons_frame, text="Test", command=test_timetable)
+    test_button.pack(side=tk.LEFT, padx=10)
 
-ttk.Label(verify_frame, text="To generate timetable press the 'Generate timetable' button.").pack(anchor=tk.W, pady=(0, 10))
+    gen_button = ttk.Button(verify_buttons_frame, text="Generate timetable", command=generate_timetable)
+    gen_button.pack(side=tk.LEFT, padx=10)
 
-verify_buttons_frame = ttk.Frame(verify_frame) # Inner frame for buttons
-verify_buttons_frame.pack(pady=5)
+    BusyIndicator(verify_buttons_frame, worker).pack(side=tk.LEFT, padx=10)
 
-test_button = ttk.Button(verify_buttons_frame, text="Test", command=test_timetable)
-test_button.pack(side=tk.LEFT, padx=10)
+    # One solve at a time
+    def set_buttons(busy):
+        for button in (test_button, gen_button):
+            button.config(state=tk.DISABLED if busy else tk.NORMAL)
+    worker.watch(set_buttons)
 
-gen_button = ttk.Button(verify_buttons_frame, text="Generate timetable", command=generate_timetable)
-gen_button.pack(side=tk.LEFT, padx=10)
+    ttk.Label(verify_frame, 
+              text="You can find functions for the generating and the verification of the timetable in the Timetable menu.",
+              wraplength=600, justify=tk.LEFT).pack(anchor=tk.W, pady=5)
+    ttk.Label(verify_frame, 
+              text="You use Wizard command in the Specification menu to start the Wizard. You can also find options to change subjects, classes teachers there. You can change all these data at any time.",
+              wraplength=600, justify=tk.LEFT).pack(anchor=tk.W, pady=5)
 
-ttk.Label(verify_frame, 
-          text="You can find functions for the generating and the verification of the timetable in the Timetable menu.",
-          wraplength=600, justify=tk.LEFT).pack(anchor=tk.W, pady=5)
-ttk.Label(verify_frame, 
-          text="You use Wizard command in the Specification menu to start the Wizard. You can also find options to change subjects, classes teachers there. You can change all these data at any time.",
-          wraplength=600, justify=tk.LEFT).pack(anchor=tk.W, pady=5)
+    # Section 3: Help
+    help_frame = ttk.LabelFrame(right_frame, text="Help", padding="10")
+    help_frame.pack(fill=tk.X, pady=5)
 
-# Section 3: Help
-help_frame = ttk.LabelFrame(right_frame, text="Help", padding="10")
-help_frame.pack(fill=tk.X, pady=5)
+    ttk.Label(help_frame, 
+              text="Don't forget to read the manual. You can find there detail information about the program, the verification of entries and solutions and many other suggestions.",
+              wraplength=600, justify=tk.LEFT).pack(anchor=tk.W, pady=5)
 
-ttk.Label(help_frame, 
-          text="Don't forget to read the manual. You can find there detail information about the program, the verification of entries and solutions and many other suggestions.",
-          wraplength=600, justify=tk.LEFT).pack(anchor=tk.W, pady=5)
+    help_button = ttk.Button(help_frame, text="Help", command=show_help)
+    help_button.pack(pady=10)
 
-help_button = ttk.Button(help_frame, text="Help", command=show_help)
-help_button.pack(pady=10)
+    # --- Navigation Buttons (Bottom of root) ---
+    ttk.Separator(root, orient='horizontal').pack(side=tk.BOTTOM, fill=tk.X, pady=(5,0), padx=10)
+    nav_frame = ttk.Frame(root, padding="10")
+    nav_frame.pack(side=tk.BOTTOM, fill=tk.X)
 
-# --- Navigation Buttons (Bottom of root) ---
-ttk.Separator(root, orient='horizontal').pack(side=tk.BOTTOM, fill=tk.X, pady=(5,0), padx=10)
-nav_frame = ttk.Frame(root, padding="10")
-nav_frame.pack(side=tk.BOTTOM, fill=tk.X)
+    spacer_frame = ttk.Frame(nav_frame)
+    spacer_frame.pack(side=tk.LEFT, expand=True, fill=tk.X)
 
-spacer_frame = ttk.Frame(nav_frame)
-spacer_frame.pack(side=tk.LEFT, expand=True, fill=tk.X)
+    close_button = ttk.Button(nav_frame, text="Close", command=root.destroy)
+    close_button.pack(side=tk.RIGHT, padx=5)
 
-close_button = ttk.Button(nav_frame, text="Close", command=root.destroy)
-close_button.pack(side=tk.RIGHT, padx=5)
+    finish_button = ttk.Button(nav_frame, text="Finish", command=finish_wizard)
+    finish_button.pack(side=tk.RIGHT, padx=5)
 
-finish_button = ttk.Button(nav_frame, text="Finish", command=finish_wizard)
-finish_button.pack(side=tk.RIGHT, padx=5)
+    prev_button = ttk.Button(nav_frame, text="Previous", command=go_previous)
+    prev_button.pack(side=tk.RIGHT, padx=5)
+    return root
 
-prev_button = ttk.Button(nav_frame, text="Previous", command=go_previous)
-prev_button.pack(side=tk.RIGHT, padx=5)
 
-# --- Run ---
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    run_standalone('step3', sys.modules[__name__])
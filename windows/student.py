@@ -1,4 +1,3 @@
-import sqlite3
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
@@ -7,6 +6,9 @@ import os
 
 # Import ClassDialog from the renamed module
 from class_dialog import ClassDialog
+from database import get_connection, release_connection
+from db_worker import DBWorker
+from app_shell import run_standalone
 
 fid = passw = conf_passw = name = roll = section = None
 
@@ -15,10 +17,13 @@ fid = passw = conf_passw = name = roll = section = None
     LIST OF FUNCTIONS USED FOR VARIOUS FUNCTIONS THROUGH TKinter INTERFACE
         * create_treeview()
         * update_treeview()
+        * fill_treeview()
         * parse_data()
         * update data()
         * remove_data()
         * show_passw()
+        * on_destroy()
+        * open_window()
 '''
 
 # create treeview (call this function once)
@@ -38,11 +43,23 @@ def create_treeview():
 
 
 # update treeview (call this function after each update)
+# the rows are read on the database worker thread, then shown by fill_treeview()
+load_task = None
 def update_treeview():
+    global load_task
+    if load_task:
+        load_task.cancel()
+    load_task = worker.submit(
+        lambda conn: conn.execute("SELECT SID, NAME, ROLL, SECTION FROM STUDENT").fetchall(),
+        on_done=fill_treeview,
+        on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load the list: {e}")
+    )
+
+
+def fill_treeview(rows):
     for row in tree.get_children():
         tree.delete(row)
-    cursor = conn.execute("SELECT SID, NAME, ROLL, SECTION FROM STUDENT")
-    for row in cursor:
+    for row in rows:
         tree.insert(
             "",
             0,
@@ -161,34 +178,23 @@ def open_class_dialog():
     update_section_combobox()  # Refresh sections after dialog closes
 
 
-# main
-if __name__ == "__main__":  
+# stop the worker and return the connection when the window is closed
+def on_destroy(event):
+    if event.widget is subtk:
+        worker.close()
+        release_connection(conn)
 
+
+# build the window (as a Toplevel of master) and return it
+def open_window(master=None):
+    global B1_show, conf_passw_entry, conn, fid_entry, name_entry, passw_entry, roll_entry
+    global section_combo, subtk, tree, worker
     '''
         DATABASE CONNECTIONS AND SETUP
     '''
 
-    # connecting database
-    conn = sqlite3.connect(r'files/timetable.db')
-
-    # creating Tabe in the database
-    conn.execute('CREATE TABLE IF NOT EXISTS STUDENT\
-    (SID CHAR(10) NOT NULL PRIMARY KEY,\
-    PASSW CHAR(50) NOT NULL,\
-    NAME CHAR(50) NOT NULL,\
-    ROLL INTEGER NOT NULL,\
-    SECTION CHAR(5) NOT NULL)')
-
-    # Ensure CLASSES table exists
-    conn.execute('CREATE TABLE IF NOT EXISTS CLASSES\
-    (CLASS_NAME TEXT PRIMARY KEY NOT NULL,\
-    SHORT_NAME TEXT,\
-    PRINT_SUBJECT_PICTURES INTEGER,\
-    COLOR TEXT,\
-    CLASS_TEACHER_FID TEXT,\
-    GRADE TEXT)')
-
-    conn.commit()
+    # connecting database (tables are created/upgraded by the pool on first connect)
+    conn = get_connection()
 
     '''
         TKinter WINDOW SETUP WITH WIDGETS
@@ -200,10 +206,14 @@ if __name__ == "__main__":
     '''
 
     # TKinter Window
-    subtk = tk.Tk()
+    subtk = tk.Toplevel(master)
     subtk.geometry('1000x470')
     subtk.title('Add/Update Students')
 
+    # runs the list queries off the Tk thread
+    worker = DBWorker(subtk)
+    subtk.bind("<Destroy>", on_destroy, add="+")
+
     # Label1
     tk.Label(
         subtk,
@@ -325,7 +335,7 @@ if __name__ == "__main__":
         state='readonly'
     )
     section_combo.place(x=260, y=330)
-    
+
     # Add button to open class dialog
     add_class_btn = tk.Button(
         subtk,
@@ -370,6 +380,8 @@ if __name__ == "__main__":
     )
     B3.place(x=650,y=400)
 
-    # looping Tkiniter window
-    subtk.mainloop()
-    conn.close() # close database after all operations
+    return subtk
+
+
+if __name__ == "__main__":
+    run_standalone('students', sys.modules[__name__])
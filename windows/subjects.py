@@ -4,7 +4,9 @@ from tkinter import ttk
 from tkinter import messagebox
 from tkinter import colorchooser  # Add colorchooser import
 import os  # Add import for path operations
-import subprocess  # Add import for launching processes
+import sys
+from database import get_connection, release_connection
+from app_shell import open_screen, run_standalone
 # import sys # sys import is not used
 
 # inputs in this window
@@ -28,6 +30,7 @@ DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
         * update_data()
         * remove_data()
         * navigation functions
+        * open_window()
 '''
 
 # --- Navigation functions ---
@@ -37,28 +40,12 @@ def go_previous():
     
     try:
         # Mark that we're coming from subjects.py in the navigation flags table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS NAVIGATION_FLAGS (
-                flag_name TEXT PRIMARY KEY,
-                flag_value TEXT
-            )
-        ''')
         conn.execute("INSERT OR REPLACE INTO NAVIGATION_FLAGS (flag_name, flag_value) VALUES (?, ?)", 
                     ('coming_from', 'subjects'))
         conn.commit()
         
-        # Use subprocess.Popen to launch step2.py
-        startupinfo = None
-        if os.name == 'nt':  # Windows
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-        subprocess.Popen(
-            ['pythonw', 'windows\\step2.py'],
-            startupinfo=startupinfo,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        )
+        # Open step2 in this process
+        open_screen('step2')
         subtk.destroy()  # Close current window
     except Exception as e:
         messagebox.showerror("Navigation Error", f"Could not open step2.py: {e}")
@@ -70,28 +57,12 @@ def go_next():
     
     try:
         # Mark that we're coming from subjects.py in the navigation flags table
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS NAVIGATION_FLAGS (
-                flag_name TEXT PRIMARY KEY,
-                flag_value TEXT
-            )
-        ''')
         conn.execute("INSERT OR REPLACE INTO NAVIGATION_FLAGS (flag_name, flag_value) VALUES (?, ?)", 
                     ('coming_from', 'subjects'))
         conn.commit()
         
-        # Use subprocess.Popen to launch step3.py
-        startupinfo = None
-        if os.name == 'nt':  # Windows
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-        subprocess.Popen(
-            ['pythonw', 'windows\\step3.py'],
-            startupinfo=startupinfo,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        )
+        # Open step3 in this process
+        open_screen('step3')
         subtk.destroy()  # Close current window
     except Exception as e:
         messagebox.showerror("Navigation Error", f"Could not open step3.py: {e}")
@@ -102,23 +73,18 @@ def close_window():
     print("Close clicked")
     subtk.destroy()
 
+def on_destroy(event):
+    """Return the connection when the window is closed"""
+    if event.widget is subtk:
+        release_connection(conn, DB_PATH)
+
 def open_lesson_dialog():
     """Open the lesson dialog window"""
     print("Opening lesson dialog...")
     
     try:
-        # Use subprocess.Popen to launch lesson_dialog.py
-        startupinfo = None
-        if os.name == 'nt':  # Windows
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-        subprocess.Popen(
-            ['pythonw', 'windows\\lesson_dialog.py'],
-            startupinfo=startupinfo,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        )
+        # Open the lesson dialog in this process
+        open_screen('lessons')
     except Exception as e:
         messagebox.showerror("Navigation Error", f"Could not open lesson dialog: {e}")
         print(f"Error opening lesson_dialog.py: {e}")
@@ -493,54 +459,21 @@ def remove_data():
     update_treeview()
 
 
-# main
-if __name__ == "__main__":  
-
+# build the window (as a Toplevel of master) and return it
+def open_window(master=None):
+    global color_display_label, conn, radio_var, subcode_entry, subname_entry, subtk, tree
     '''
         DATABASE CONNECTIONS AND SETUP
     '''
-    conn = sqlite3.connect(DB_PATH)
-    
-    # Check if COLOR column exists in SUBJECTS table and add it if it doesn't
-    def ensure_color_column_exists():
-        try:
-            # Check if the COLOR column exists in the SUBJECTS table
-            cursor = conn.execute("PRAGMA table_info(SUBJECTS)")
-            columns = [info[1] for info in cursor.fetchall()]
-            
-            # If COLOR column doesn't exist, add it
-            if 'COLOR' not in columns:
-                print("Adding COLOR column to SUBJECTS table")
-                conn.execute("ALTER TABLE SUBJECTS ADD COLUMN COLOR TEXT DEFAULT '#008080'")
-                conn.commit()
-        except sqlite3.Error as e:
-            print(f"Error checking/adding COLOR column: {e}")
-
-    # Update SUBJECTS table to include color
-    conn.execute('''CREATE TABLE IF NOT EXISTS SUBJECTS
-    (SUBCODE CHAR(10) NOT NULL PRIMARY KEY,
-    SUBNAME CHAR(50) NOT NULL,
-    SUBTYPE CHAR(1) NOT NULL,
-    COLOR TEXT DEFAULT "#008080")''')
-
-    # Create table for subject-classroom associations
-    conn.execute('''CREATE TABLE IF NOT EXISTS SUBJECT_CLASSROOMS
-    (ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    SUBCODE CHAR(10) NOT NULL,
-    CLASSROOM_NAME TEXT NOT NULL,
-    FOREIGN KEY(SUBCODE) REFERENCES SUBJECTS(SUBCODE),
-    UNIQUE(SUBCODE, CLASSROOM_NAME))''')
-
-    # Ensure the COLOR column exists
-    ensure_color_column_exists()
-
-    conn.commit()
+    # Tables (SUBJECTS with its COLOR column, SUBJECT_CLASSROOMS) are created/upgraded by the pool
+    conn = get_connection(DB_PATH)
 
     '''
         TKinter WINDOW SETUP WITH WIDGETS
     '''
-    subtk = tk.Tk()
+    subtk = tk.Toplevel(master)
     subtk.title("Subject Management")
+    subtk.bind("<Destroy>", on_destroy, add="+")
     subtk.state('zoomed')  # Maximize window
     subtk.minsize(800, 700)  # Set minimum window size
 
@@ -555,7 +488,7 @@ if __name__ == "__main__":
     def quit_fullscreen(event=None):
         subtk.attributes('-fullscreen', False)
         subtk.state('zoomed')
-        
+
     subtk.bind('<Escape>', quit_fullscreen)  # Escape key exits fullscreen
     subtk.bind('<F11>', toggle_fullscreen)   # F11 toggles fullscreen
 
@@ -578,7 +511,7 @@ if __name__ == "__main__":
     ttk.Label(fields_frame, text='Subject Code:', font=('Consolas', 12)).grid(row=0, column=0, sticky=tk.W, padx=5, pady=3)
     subcode_entry = ttk.Entry(fields_frame, font=('Consolas', 12), width=20)
     subcode_entry.grid(row=0, column=1, sticky=tk.EW, padx=5, pady=3)
-    
+
     ttk.Label(fields_frame, text='Subject Name:', font=('Consolas', 12)).grid(row=1, column=0, sticky=tk.W, padx=5, pady=3)
     subname_entry = tk.Text(fields_frame, font=('Consolas', 10), width=20, height=3, wrap=tk.WORD)
     subname_entry.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=3)
@@ -599,7 +532,7 @@ if __name__ == "__main__":
     # Original control buttons (Add, Update/Load)
     original_buttons_frame = ttk.Frame(left_panel)
     original_buttons_frame.pack(fill=tk.X, pady=(15,5))
-    
+
     B1_add = ttk.Button(original_buttons_frame, text='Add/Save Current', command=parse_data)
     B1_add.pack(side=tk.LEFT, padx=10, expand=True, fill=tk.X)
 
@@ -612,7 +545,7 @@ if __name__ == "__main__":
 
     color_display_label = tk.Label(color_picture_frame, bg=selected_color, width=15, height=2, relief=tk.SUNKEN)
     color_display_label.pack(side=tk.LEFT, padx=(5,10), expand=True, fill=tk.BOTH)
-    
+
     change_color_btn = ttk.Button(color_picture_frame, text="Change", command=change_color_picture_placeholder)
     change_color_btn.pack(side=tk.LEFT, padx=(0,5))
 
@@ -622,10 +555,10 @@ if __name__ == "__main__":
 
     classrooms_btn = ttk.Button(classrooms_frame, text="Select Classrooms", command=select_classrooms_placeholder)
     classrooms_btn.pack(fill=tk.X, pady=(0,5), padx=5)
-    
+
     set_all_lessons_btn = ttk.Button(classrooms_frame, text="Set for all lessons of this subject", command=set_all_lessons_classrooms_placeholder)
     set_all_lessons_btn.pack(fill=tk.X, pady=(0,5), padx=5)
-    
+
     # Spacer to push OK/Cancel to bottom
     ttk.Frame(left_panel).pack(fill=tk.Y, expand=True) 
 
@@ -635,18 +568,18 @@ if __name__ == "__main__":
 
     ok_btn = ttk.Button(ok_cancel_frame, text="OK (Save)", command=ok_button_action)
     ok_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
-    
+
     cancel_btn = ttk.Button(ok_cancel_frame, text="Close Window", command=cancel_button_action)
     cancel_btn.pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=5)
 
 
     # --- RIGHT PANEL CONTENT (Treeview and its controls) ---
     ttk.Label(right_panel, text='List of Subjects', font=('Consolas', 18, 'bold')).pack(pady=(0,10))
-    
+
     tree_container = ttk.Frame(right_panel)
     tree_container.pack(fill=tk.BOTH, expand=True)
     tree = ttk.Treeview(tree_container)
-    
+
     # Add scrollbar to treeview
     tree_scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=tree.yview)
     tree.configure(yscrollcommand=tree_scrollbar.set)
@@ -661,26 +594,26 @@ if __name__ == "__main__":
     tree_h_scrollbar.pack(fill=tk.X)
 
     create_treeview() # tree is defined above
-    
+
     tree_buttons_frame = ttk.Frame(right_panel)
     tree_buttons_frame.pack(pady=10, fill=tk.X)
-        
+
     B3_delete = ttk.Button(tree_buttons_frame, text='Delete Selected Subject(s)', command=remove_data)
     B3_delete.pack(padx=5, expand=True) # Centered delete button for treeview
-    
+
     update_treeview() # Initial population
 
     # --- Navigation Buttons (Bottom of window) ---
     ttk.Separator(subtk, orient='horizontal').pack(side=tk.BOTTOM, fill=tk.X, pady=(5,0), padx=10)
-    
+
     # Create two frames - one for lesson dialog button and one for navigation
     lesson_frame = ttk.Frame(subtk, padding="5")
     lesson_frame.pack(side=tk.BOTTOM, fill=tk.X)
-    
+
     # Add the lesson dialog button centered in its own frame
     lesson_dialog_button = ttk.Button(lesson_frame, text="Open Lesson Dialog", command=open_lesson_dialog)
     lesson_dialog_button.pack(expand=True, pady=5)
-    
+
     # Navigation buttons frame
     nav_frame = ttk.Frame(subtk, padding="10")
     nav_frame.pack(side=tk.BOTTOM, fill=tk.X)
@@ -696,6 +629,9 @@ if __name__ == "__main__":
 
     prev_button = ttk.Button(nav_frame, text="Previous", command=go_previous)
     prev_button.pack(side=tk.RIGHT, padx=5)
-    
-    subtk.mainloop()
-    conn.close() # close database after all operations
\ No newline at end of file
+
+    return subtk
+
+
+if __name__ == "__main__":
+    run_standalone('subjects', sys.modules[__name__])
@@ -0,0 +1,300 @@
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from database import connection
+from change_log import current_version
+from timetable_model import get_timetable_model
+from timetable_layout import DAY_MAP, load_timetable_structure, section_timetable, faculty_timetable
+
+'''
+    TIMETABLE JSON API
+
+    A small read-only HTTP server (standard library only) for kiosks and
+    mobile clients that poll the timetable:
+
+        GET /timetable/section/<SECTION>   a section's week
+        GET /timetable/faculty/<INI>       a faculty member's week
+        GET /today/<SID or FID>            a student's or faculty member's lessons today
+
+    Responses are built from the shared timetable model and kept in a
+    cache until the schedule change log (change_log.py) moves on. Every
+    response has an ETag made of the change log version and a hash of the
+    body; a client sending it back in If-None-Match gets 304 Not Modified
+    while the body hash is the same, so changes to other sections do not
+    make every client download its timetable again.
+
+        python windows/timetable_api.py --port 8765
+'''
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+VERSION_CHECK_INTERVAL = 1.0  # seconds between reads of the change log version
+MAX_CACHED_USERS = 10000      # SID/FID lookups and 'today' bodies kept between changes
+
+ROUTES = [
+    (re.compile(r"^/timetable/section/([^/]+)$"), 'section'),
+    (re.compile(r"^/timetable/faculty/([^/]+)$"), 'faculty'),
+    (re.compile(r"^/today/([^/]+)$"), 'today'),
+]
+
+
+class TimetableCache:
+    """
+    JSON bodies of the API's resources, built on first request and dropped
+    when the change log version changes. Safe to use from the server's
+    request threads: cached bodies are served without waiting for builds
+    or version checks, and a body being built is built once however many
+    requests ask for it at the same time.
+    """
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.model = get_timetable_model(db_path)
+        self._lock = threading.Lock()        # guards the dicts below; held only to look up and store
+        self._model_lock = threading.Lock()  # held while the model is refreshed or read by a build
+        self._version = None
+        self._checked = 0.0
+        self._bodies = {}
+        self._today = {}     # {('today', user, date): (body, etag)} of one date, at most MAX_CACHED_USERS
+        self._today_date = None
+        self._building = {}  # {key: Future} of the bodies being built
+        self._users = {}
+        self._structure = None
+        self._faculty_names = {}
+        self._update()
+
+    def _update(self):
+        """Drop everything built before the latest change; at most once per VERSION_CHECK_INTERVAL"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked < VERSION_CHECK_INTERVAL:
+                return
+            self._checked = now
+        # Other requests are still served from the cache while this runs
+        with connection(self.db_path) as conn:
+            version = current_version(conn)
+            if version == self._version:
+                return
+            with self._model_lock:
+                self.model.refresh()
+                structure = load_timetable_structure(conn)
+                faculty_names = dict(conn.execute("SELECT INI, NAME FROM FACULTY").fetchall())
+                with self._lock:
+                    self._structure = structure
+                    self._faculty_names = faculty_names
+                    self._version = version
+                    self._bodies.clear()
+                    self._today.clear()
+                    self._users.clear()
+
+    def get(self, kind, name):
+        """(body, etag) of a resource, or None if there is no such section, faculty member or user"""
+        self._update()
+        key = (kind, name, datetime.date.today()) if kind == 'today' else (kind, name)
+        with self._lock:
+            cache = self._today if kind == 'today' else self._bodies
+            if key in cache:
+                return cache[key]
+            future = self._building.get(key)
+            building = future is None
+            if building:
+                future = self._building[key] = Future()
+        if not building:
+            return future.result()  # Another request is building it
+
+        try:
+            resource = self._build_resource(kind, name, key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(resource)
+        finally:
+            with self._lock:
+                del self._building[key]
+        return resource
+
+    def _build_resource(self, kind, name, key):
+        """Build, cache and return (body, etag) of a resource, or None"""
+        identity = None
+        if kind == 'today':
+            identity = self._identity(name)  # Read before taking the model lock
+            if identity is None:
+                return None
+        with self._model_lock:
+            version = self._version
+            content = self._build(kind, name, identity)
+        if content is None:
+            return None
+        body = json.dumps(content, separators=(",", ":")).encode('utf-8')
+        resource = (body, f'"{version}-{hashlib.sha1(body).hexdigest()[:16]}"')
+        with self._lock:
+            if version == self._version:  # Not cached if the timetable changed meanwhile
+                if kind == 'today':
+                    if len(self._today) >= MAX_CACHED_USERS or key[2] != self._today_date:
+                        self._today.clear()  # Bodies of earlier days are never asked for again
+                        self._today_date = key[2]
+                    self._today[key] = resource
+                else:
+                    self._bodies[key] = resource
+        return resource
+
+    def _build(self, kind, name, identity):
+        days, periods_info = self._structure
+        if kind == 'section':
+            if name not in self.model.section_names():
+                return None
+            return {'section': name, 'days': days, 'periods': periods_info,
+                    'timetable': section_timetable(self.model, name, days, periods_info)}
+        if kind == 'faculty':
+            if name not in self._faculty_names and name not in self.model.faculty_names():
+                return None
+            return {'faculty': name, 'name': self._faculty_names.get(name), 'days': days, 'periods': periods_info,
+                    'timetable': faculty_timetable(self.model, name, days, periods_info)}
+        return self._build_today(name, identity, days, periods_info)
+
+    def _identity(self, user):
+        """
+        ('student', SECTION) or ('faculty', INI) of a SID or FID, or None.
+        Unknown IDs are not cached: STUDENT is not in the change log, so a
+        student added later would otherwise stay unknown.
+        """
+        with self._lock:
+            if user in self._users:
+                return self._users[user]
+        with connection(self.db_path) as conn:
+            row = conn.execute("SELECT SECTION FROM STUDENT WHERE SID = ?", (user,)).fetchone()
+            identity = ('student', row[0]) if row else None
+            if identity is None:
+                row = conn.execute("SELECT INI FROM FACULTY WHERE FID = ?", (user,)).fetchone()
+                identity = ('faculty', row[0]) if row else None
+        if identity is not None:
+            with self._lock:
+                if len(self._users) >= MAX_CACHED_USERS:
+                    self._users.clear()
+                self._users[user] = identity
+        return identity
+
+    def _build_today(self, user, identity, days, periods_info):
+        user_type, name = identity
+        today = datetime.date.today()
+        day = DAY_MAP.get(today.weekday())
+        if user_type == 'student':
+            timetable = section_timetable(self.model, name, days, periods_info)
+        else:
+            timetable = faculty_timetable(self.model, name, days, periods_info)
+
+        lessons = []
+        for period, cell in sorted(timetable.get(day, {}).items()):
+            if cell['subject_code'] in (None, "NULL"):
+                continue
+            lessons.append({
+                'period': period,
+                'time': periods_info.get(period),
+                'subject': cell['subject'],
+                'subject_code': cell['subject_code'].split("@")[0],
+                # faculty_timetable() keeps the sections in the 'faculty' line
+                'faculty' if user_type == 'student' else 'sections': cell['faculty'],
+            })
+        key = 'section' if user_type == 'student' else 'faculty'
+        return {'user': user, 'type': user_type, key: name, 'date': today.isoformat(), 'day': day,
+                'lessons': lessons}
+
+
+def _matches(if_none_match, etag):
+    """Whether an If-None-Match header holds a tag of the same body as etag (any version)"""
+    digest = etag.strip('"').split("-")[-1]
+    return any(tag.strip().strip('"').split("-")[-1] == digest
+               for tag in if_none_match.split(",") if tag.strip())
+
+
+class TimetableRequestHandler(BaseHTTPRequestHandler):
+    server_version = "TimetableAPI/1.0"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        path = urlsplit(self.path).path
+        for pattern, kind in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            return self._send_error(404, "Not found")
+
+        try:
+            resource = self.server.cache.get(kind, unquote(match.group(1)))
+        except Exception as e:
+            print(f"Error serving {path}: {e}")
+            return self._send_error(500, "Internal server error")
+        if resource is None:
+            return self._send_error(404, f"No {kind} {unquote(match.group(1))}")
+        body, etag = resource
+
+        if _matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")  # clients revalidate with If-None-Match
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, db_path=None, verbose=False):
+    """A ThreadingHTTPServer serving the API; call serve_forever() on it"""
+    server = ThreadingHTTPServer((host, port), TimetableRequestHandler)
+    server.daemon_threads = True
+    server.cache = TimetableCache(db_path)
+    server.verbose = verbose
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the timetable as read-only JSON")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument('--db', help="database file (default files/timetable.db)")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.db, args.verbose)
+    print(f"Serving the timetable on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -2,11 +2,24 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 import os
+import subprocess
 import sys
+import tempfile
 from condition import TimetableConditionChecker
+from conflict_engine import find_conflicts
+from conflict_index import OccupancyIndex
+from edit_session import EditSession
+from database import get_connection, release_connection
+from timetable_model import get_timetable_model
+from virtual_grid import VirtualTimetableGrid
+from db_worker import DBWorker, BusyIndicator
+from app_shell import open_screen, run_standalone
+
+# Above this many cells the editor draws the grid on one canvas instead of a widget per cell
+VIRTUAL_GRID_CELLS = 2000
 
 class TimetableEditorComponent(ttk.Frame):
-    def __init__(self, parent, class_names_list=None, period_labels_list=None, *args, **kwargs):
+    def __init__(self, parent, class_names_list=None, period_labels_list=None, virtual=None, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         
         # Load days from database
@@ -22,6 +35,21 @@ class TimetableEditorComponent(ttk.Frame):
         self.num_classes_display = len(self.class_names)
         self.recess_break_after = 3  # Default recess after 3rd period
 
+        # In-memory occupancy for per-cell conflict checks and live highlighting
+        self.conflict_index = OccupancyIndex(recess_after=self.recess_break_after)
+        if self.conn:
+            self.conflict_index.load(self.conn)
+
+        # Edits are staged here until Save Changes writes them in one transaction
+        self.session = EditSession()
+
+        # Shared in-memory timetable the grid is drawn from
+        self.model = get_timetable_model(self.db_path)
+        self.model.subscribe(self.on_model_change)
+
+        # Reloads and whole-timetable checks run on a worker thread
+        self.worker = DBWorker(self, self.db_path)
+
         # To store references to widgets
         self.class_label_widgets = []
         self.period_header_widgets = [] 
@@ -31,10 +59,18 @@ class TimetableEditorComponent(ttk.Frame):
         self.selected_cell = None
         self.highlighted_cells = []
 
-        self.configure_grid_weights()
-        self.create_header_labels()
-        self.create_class_labels()
-        self.create_timetable_grid_cells()
+        # virtual=None picks the canvas grid for large institutes
+        if virtual is None:
+            virtual = self.num_classes_display * len(self.days) * len(self.periods) > VIRTUAL_GRID_CELLS
+        self.virtual_grid = None
+
+        if virtual:
+            self.create_virtual_grid()
+        else:
+            self.configure_grid_weights()
+            self.create_header_labels()
+            self.create_class_labels()
+            self.create_timetable_grid_cells()
         self.create_control_buttons()
         self.load_timetable_data()
 
@@ -48,7 +84,7 @@ class TimetableEditorComponent(ttk.Frame):
                 messagebox.showerror("Database Error", f"Database not found at: {self.db_path}")
                 return False
                 
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = get_connection(self.db_path)
             return True
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to connect to database: {e}")
@@ -56,6 +92,7 @@ class TimetableEditorComponent(ttk.Frame):
 
     def load_days_from_db(self):
         """Load day names from the database"""
+        conn = None
         try:
             project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(project_root, 'files', 'timetable.db')
@@ -63,7 +100,7 @@ class TimetableEditorComponent(ttk.Frame):
             if not os.path.exists(db_path):
                 return ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
             
-            conn = sqlite3.connect(db_path)
+            conn = get_connection(db_path)
             cursor = conn.cursor()
             
             # Try to get days enabled from TIMETABLE_SETTINGS
@@ -94,18 +131,20 @@ class TimetableEditorComponent(ttk.Frame):
                 num_days = int(result[0])
                 default_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
                 return default_days[:num_days]
-                
-            conn.close()
         except sqlite3.Error as e:
             print(f"Database error loading days: {e}")
         except Exception as e:
             print(f"Error loading days: {e}")
+        finally:
+            if conn:
+                release_connection(conn, db_path)
             
         # Default days if nothing found in database
         return ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
 
     def load_classes_from_db(self):
         """Load class names from the database"""
+        conn = None
         try:
             project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(project_root, 'files', 'timetable.db')
@@ -113,7 +152,7 @@ class TimetableEditorComponent(ttk.Frame):
             if not os.path.exists(db_path):
                 return [f"Class {i+1}" for i in range(10)]
             
-            conn = sqlite3.connect(db_path)
+            conn = get_connection(db_path)
             cursor = conn.cursor()
             
             # Get distinct sections from SCHEDULE table
@@ -122,16 +161,18 @@ class TimetableEditorComponent(ttk.Frame):
             
             if sections:
                 return [section[0] for section in sections]
-            
-            conn.close()
         except sqlite3.Error as e:
             print(f"Database error loading classes: {e}")
+        finally:
+            if conn:
+                release_connection(conn, db_path)
             
         # Default classes if nothing found in database
         return [f"Class {i+1}" for i in range(10)]
 
     def load_periods_from_db(self):
         """Load period labels from the database"""
+        conn = None
         try:
             project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(project_root, 'files', 'timetable.db')
@@ -139,7 +180,7 @@ class TimetableEditorComponent(ttk.Frame):
             if not os.path.exists(db_path):
                 return [f"P{i+1}" for i in range(8)]  # Using shorter P1, P2 format
             
-            conn = sqlite3.connect(db_path)
+            conn = get_connection(db_path)
             cursor = conn.cursor()
             
             # Try to get number of periods from config
@@ -156,10 +197,11 @@ class TimetableEditorComponent(ttk.Frame):
             
             if period_ids:
                 return [f"P{period_id[0]+1}" for period_id in period_ids]  # Using shorter P1, P2 format
-                
-            conn.close()
         except sqlite3.Error as e:
             print(f"Database error loading periods: {e}")
+        finally:
+            if conn:
+                release_connection(conn, db_path)
             
         # Default periods if nothing found in database
         return [f"P{i+1}" for i in range(8)]  # Using shorter P1, P2 format
@@ -242,18 +284,30 @@ class TimetableEditorComponent(ttk.Frame):
                     # Bind right-click for context menu or details
                     cell_frame.bind("<Button-3>", lambda event, c=cell_key: self.show_cell_details(event, c))
 
+    def create_virtual_grid(self):
+        """Create a single canvas that draws only the visible cells"""
+        self.virtual_grid = VirtualTimetableGrid(
+            self, self.class_names, self.days, self.periods,
+            on_click=self.on_cell_click, on_right_click=self.show_cell_details)
+        self.virtual_grid.grid(row=0, column=0, sticky="nsew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
     def on_cell_click(self, event, cell_key):
         """Handle click on a timetable cell to edit it"""
         # Highlight the selected cell
-        if self.selected_cell:
-            self.timetable_cells[self.selected_cell].config(bg="white")
-            for widget in self.timetable_cells[self.selected_cell].winfo_children():
-                widget.config(bg="white")
-        
+        if self.virtual_grid:
+            self.virtual_grid.set_selected(cell_key)
+        else:
+            if self.selected_cell:
+                self.timetable_cells[self.selected_cell].config(bg="white")
+                for widget in self.timetable_cells[self.selected_cell].winfo_children():
+                    widget.config(bg="white")
+            
+            self.timetable_cells[cell_key].config(bg="#e0e0ff")  # Light blue highlight
+            for widget in self.timetable_cells[cell_key].winfo_children():
+                widget.config(bg="#e0e0ff")
         self.selected_cell = cell_key
-        self.timetable_cells[cell_key].config(bg="#e0e0ff")  # Light blue highlight
-        for widget in self.timetable_cells[cell_key].winfo_children():
-            widget.config(bg="#e0e0ff")
             
         # Get cell information
         class_idx, day_idx, period_idx = cell_key
@@ -443,18 +497,12 @@ class TimetableEditorComponent(ttk.Frame):
             if subject_code != 'NULL':
                 condition_checker = TimetableConditionChecker(self.db_path)
                 
-                # Count existing assignments for this subject in this section
-                cursor = self.conn.execute("""
-                    SELECT COUNT(*) FROM SCHEDULE 
-                    WHERE SUBCODE=? AND SECTION=?
-                """, (subject_code, section))
-                current_count = cursor.fetchone()[0]
-                
-                # Check if adding one more would exceed the limit
-                exceeded, count, limit, warning_message = condition_checker.check_lessons_per_week_limit(section, subject_code)
+                # Count the assignments of this subject in this section, staged ones included
+                count = self.conflict_index.subject_count(section, str(subject_code))
+                limit = self.conflict_index.lessons_per_week(section, str(subject_code)) or 0
                 
                 # If adding one more would exceed the limit (or it's already exceeded)
-                if exceeded or (count + 1 > limit and limit > 0):
+                if limit > 0 and count + 1 > limit:
                     proceed = messagebox.askyesno(
                         "Subject Limit Warning", 
                         f"Subject {subject_code} has a lessons_per_week limit of {limit}.\n\n"
@@ -470,9 +518,9 @@ class TimetableEditorComponent(ttk.Frame):
                 
                 # If subject requires multiple periods (Double/Triple)
                 if periods_to_merge > 1:
-                    # Validate if merging is possible
-                    is_valid, periods_needed, error_message = condition_checker.validate_merged_periods(
-                        section, subject_code, day_idx, period_idx)
+                    # Validate if merging is possible, staged edits included
+                    is_valid, periods_needed, error_message = self.validate_merge(
+                        section, day_idx, period_idx, periods_to_merge, lesson_type)
                     
                     if not is_valid:
                         # Show error message and ask if user wants to continue with just this period
@@ -495,51 +543,17 @@ class TimetableEditorComponent(ttk.Frame):
                             parent=dialog
                         )
                         if proceed:
-                            # Proceed with merging periods
-                            success, result_message, affected_periods = condition_checker.merge_periods(
-                                section, subject_code, day_idx, period_idx, faculty_ini)
-                            
-                            if success:
-                                # Commit changes
-                                self.conn.commit()
-                                
-                                # Update the cell display
-                                self.load_timetable_data()
-                                
-                                # Close the dialog
-                                dialog.destroy()
-                                
-                                # Show success message
-                                messagebox.showinfo("Success", result_message, parent=self)
-                                return
-                            else:
-                                # Show error message
-                                messagebox.showerror("Merging Error", result_message, parent=dialog)
-                                return
+                            # Stage every period of the lesson as one undoable edit
+                            self.stage_cells([(section, day_idx, merge_period_idx, subject_code, faculty_ini)
+                                              for merge_period_idx in periods_needed])
+                            dialog.destroy()
+                            return
             
             # If we're here, either we're removing an assignment (NULL) or we're not merging periods
-            
-            # Generate a unique ID for the schedule entry
-            entry_id = f"{section}{day_idx * len(self.periods) + period_idx}"
-            
-            # Handle NULL case (removing assignment)
             if faculty_ini == 'NULL' and subject_code == 'NULL':
-                self.conn.execute(
-                    "DELETE FROM SCHEDULE WHERE ID=? AND SECTION=? AND DAYID=? AND PERIODID=?",
-                    (entry_id, section, day_idx, period_idx)
-                )
+                self.stage_cells([(section, day_idx, period_idx, None, None)])
             else:
-                # Update or insert new schedule entry
-                self.conn.execute("""
-                    REPLACE INTO SCHEDULE (ID, DAYID, PERIODID, SUBCODE, SECTION, FINI)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (entry_id, day_idx, period_idx, subject_code, section, faculty_ini))
-                
-            # Commit changes
-            self.conn.commit()
-            
-            # Update the cell display
-            self.load_timetable_data()
+                self.stage_cells([(section, day_idx, period_idx, subject_code, faculty_ini)])
             
             # Close the dialog
             dialog.destroy()
@@ -547,131 +561,177 @@ class TimetableEditorComponent(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Update Error", f"Failed to update cell: {e}")
 
+    def entry_id(self, section, day_idx, period_idx):
+        """ID of the SCHEDULE row of a cell"""
+        return f"{section}{day_idx * len(self.periods) + period_idx}"
+
+    def validate_merge(self, section, day_idx, period_idx, periods_to_merge, lesson_type):
+        """
+        validate_merged_periods() against the occupancy index, so cells
+        staged in this session count as taken.
+        Returns (is_valid, periods_needed, error_message)
+        """
+        periods_needed = list(range(period_idx, period_idx + periods_to_merge))
+        if period_idx + periods_to_merge > len(self.periods):
+            return False, periods_needed, f"Not enough periods in the day for {lesson_type} lesson"
+        for check_period_idx in periods_needed[1:]:  # The current period is being replaced
+            if self.conflict_index.section_busy(section, day_idx, check_period_idx):
+                return False, periods_needed, f"Period {check_period_idx+1} is already assigned"
+        return True, periods_needed, ""
+
+    def stage_cells(self, cells):
+        """
+        Stage [(section, day_idx, period_idx, subject_code, faculty_ini)] as
+        one undoable edit; a None subject code frees the cell. Nothing is
+        written until save_timetable_changes().
+        """
+        changes = []
+        for section, day_idx, period_idx, subject_code, faculty_ini in cells:
+            entry_id = self.entry_id(section, day_idx, period_idx)
+            after = None if subject_code is None else (
+                day_idx, period_idx, str(subject_code), section, str(faculty_ini))
+            changes.append((entry_id, self.conflict_index.entry(entry_id), after))
+        for entry_id, _, after in self.session.stage(changes):
+            self._mirror(entry_id, after)
+        self._on_session_change()
+
+    def undo(self, event=None):
+        """Take back the last staged edit"""
+        for entry_id, state in self.session.undo():
+            self._mirror(entry_id, state)
+        self._on_session_change()
+
+    def redo(self, event=None):
+        """Apply the last undone edit again"""
+        for entry_id, state in self.session.redo():
+            self._mirror(entry_id, state)
+        self._on_session_change()
+
+    def _mirror(self, entry_id, state):
+        """Show a staged state in the occupancy index, so conflict checks include it"""
+        if state is None:
+            self.conflict_index.record_delete(entry_id)
+        else:
+            self.conflict_index.record_replace(entry_id, *state)
+
+    def _sync_conflict_index(self):
+        """sync() the occupancy index, putting the staged cells back after a rebuild"""
+        if self.conflict_index.sync(self.conn):
+            for entry_id, (_, staged) in self.session.pending().items():
+                self._mirror(entry_id, staged)
+
+    def _on_session_change(self):
+        self.load_timetable_data(refresh=False)
+        pending = len(self.session)
+        self.undo_button.config(state=tk.NORMAL if self.session.can_undo() else tk.DISABLED)
+        self.redo_button.config(state=tk.NORMAL if self.session.can_redo() else tk.DISABLED)
+        self.pending_label.config(text=f"{pending} unsaved change(s)" if pending else "")
+
     def check_conflicts(self, faculty_ini, day_id, period_id, current_section):
         """
         Check for scheduling conflicts:
         1. Same faculty teaching in different sections during the same period/day
-        2. Same section having multiple classes during the same period/day
+        2. Faculty already at the daily period limit
+        3. Faculty teaching on both sides of the recess
         
+        Answered from the in-memory occupancy index, without querying SCHEDULE.
         Returns a tuple (has_conflict, conflict_message)
         """
-        conflicts = []
-        
-        # Only check for conflicts if we're adding a faculty (not removing)
-        if faculty_ini != 'NULL':
-            try:
-                # Check if faculty is already assigned to this period on this day
-                cursor = self.conn.execute(
-                    "SELECT SECTION FROM SCHEDULE WHERE DAYID=? AND PERIODID=? AND FINI=?",
-                    (day_id, period_id, faculty_ini)
-                )
-                
-                faculty_conflicts = list(cursor)
-                for row in faculty_conflicts:
-                    if row[0] != current_section:
-                        conflicts.append(f"Faculty '{faculty_ini}' is already assigned to section '{row[0]}' during {self.days[day_id]} Period {period_id+1}")
-                        
-                # Check if faculty has too many periods in a day
-                cursor = self.conn.execute(
-                    "SELECT COUNT(*) FROM SCHEDULE WHERE DAYID=? AND FINI=?",
-                    (day_id, faculty_ini)
-                )
-                period_count = cursor.fetchone()[0]
-                if period_count >= 5:  # If faculty already has 5 or more periods in a day
-                    conflicts.append(f"Faculty '{faculty_ini}' already has {period_count} periods on {self.days[day_id]}")
-                
-                # Check for back-to-back recess conflict
-                if period_id == self.recess_break_after or period_id == self.recess_break_after - 1:
-                    adjacent_period = self.recess_break_after - 1 if period_id == self.recess_break_after else self.recess_break_after
-                    cursor = self.conn.execute(
-                        "SELECT COUNT(*) FROM SCHEDULE WHERE DAYID=? AND PERIODID=? AND FINI=?",
-                        (day_id, adjacent_period, faculty_ini)
-                    )
-                    has_adjacent = cursor.fetchone()[0] > 0
-                    if has_adjacent:
-                        conflicts.append(f"Faculty '{faculty_ini}' is assigned to adjacent periods across recess on {self.days[day_id]}")
-                
-            except sqlite3.Error as e:
-                print(f"Database error while checking conflicts: {e}")
-                return True, f"Database error: {e}"
-                
-        if conflicts:
-            return True, "\n".join(conflicts)
-        else:
-            return False, ""
+        try:
+            self._sync_conflict_index()  # Pick up edits committed by other windows
+        except sqlite3.Error as e:
+            print(f"Database error while checking conflicts: {e}")
+            return True, f"Database error: {e}"
+        return self.conflict_index.check_conflicts(faculty_ini, day_id, period_id, current_section, self.days)
+
+    def highlight_conflicts(self):
+        """Outline in red every cell whose faculty is double-booked"""
+        try:
+            self._sync_conflict_index()
+        except sqlite3.Error as e:
+            print(f"Database error while highlighting conflicts: {e}")
+            return
+        conflicting = self.conflict_index.conflicting_slots()
+        if self.virtual_grid:
+            class_idx = {section: idx for idx, section in enumerate(self.class_names)}
+            self.virtual_grid.set_conflicts(
+                (class_idx[section], day_idx, period_idx)
+                for section, day_idx, period_idx in conflicting if section in class_idx)
+            return
+        for (class_idx, day_idx, period_idx), cell_frame in self.timetable_cells.items():
+            if (self.class_names[class_idx], day_idx, period_idx) in conflicting:
+                cell_frame.config(highlightthickness=2, highlightbackground="red", highlightcolor="red")
+            else:
+                cell_frame.config(highlightthickness=0)
+
+    def on_model_change(self, changes):
+        """Redraw when the shared timetable model changes"""
+        if self.timetable_cells or self.virtual_grid:
+            self.load_timetable_data(refresh=False)
 
-    def load_timetable_data(self):
-        """Load timetable data from the database"""
+    def load_timetable_data(self, refresh=True):
+        """Display the timetable from the shared timetable model"""
         try:
-            # Clear existing cell content
+            # A reload caused by other windows' edits redraws through on_model_change
+            if refresh and self.model.refresh():
+                return
+
+            # Filled cells from the model, which loads SCHEDULE with SUBJECTS.COLOR in one query
+            filled = {}
+            for class_idx, section in enumerate(self.class_names):
+                for (day_idx, period_idx), (subject_code, faculty_ini) in self.model.section_week(section).items():
+                    if day_idx < len(self.days) and period_idx < len(self.periods):
+                        # Only display the subject code (short name)
+                        filled[(class_idx, day_idx, period_idx)] = (
+                            f"{subject_code}", self.get_subject_color(subject_code) or "white")
+
+            # Staged edits are drawn over the saved timetable, marked with *
+            class_idx = {section: idx for idx, section in enumerate(self.class_names)}
+            for original, staged in self.session.pending().values():
+                day_idx, period_idx, subject_code, section, _ = staged or original
+                if section not in class_idx:
+                    continue
+                cell_key = (class_idx[section], day_idx, period_idx)
+                if staged is None:
+                    filled[cell_key] = ("*", "white")
+                else:
+                    filled[cell_key] = (f"{subject_code}*", self.get_subject_color(subject_code) or "white")
+
+            if self.virtual_grid:
+                self.virtual_grid.set_cells(filled)
             for cell_key, cell_frame in self.timetable_cells.items():
+                cell_text, subject_color = filled.get(cell_key, ("", "white"))
+                # Set background color based on subject
+                cell_frame.config(bg=subject_color)
                 for widget in cell_frame.winfo_children():
                     if isinstance(widget, tk.Label):
-                        widget.config(text="")  # Empty text for empty cells
+                        widget.config(text=cell_text, bg=subject_color)
             
-            # Load and display data for each section
-            for class_idx, section in enumerate(self.class_names):
-                for day_idx in range(len(self.days)):
-                    for period_idx in range(len(self.periods)):
-                        cursor = self.conn.execute("""
-                            SELECT SUBCODE, FINI FROM SCHEDULE
-                            WHERE DAYID=? AND PERIODID=? AND SECTION=?
-                        """, (day_idx, period_idx, section))
-                        
-                        result = cursor.fetchone()
-                        cell_key = (class_idx, day_idx, period_idx)
-                        
-                        if result:
-                            subject_code, faculty_ini = result
-                            # Only display the subject code (short name)
-                            cell_text = f"{subject_code}"
-                            
-                            # Update the cell label
-                            for widget in self.timetable_cells[cell_key].winfo_children():
-                                if isinstance(widget, tk.Label):
-                                    widget.config(text=cell_text)
-                                    
-                                    # Set background color based on subject (optional)
-                                    subject_color = self.get_subject_color(subject_code)
-                                    if subject_color:
-                                        widget.config(bg=subject_color)
-                                        self.timetable_cells[cell_key].config(bg=subject_color)
+            self.highlight_conflicts()
                         
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to load timetable data: {e}")
 
     def get_subject_color(self, subject_code):
-        """Get color for a subject from the database"""
-        try:
-            cursor = self.conn.execute(
-                "SELECT color FROM SUBJECTS WHERE SUBCODE=?", (subject_code,)
-            )
-            result = cursor.fetchone()
-            if result and result[0]:
-                return result[0]
-        except:
-            pass
-        return None
+        """Get color for a subject from the timetable model's subject color map"""
+        return self.model.subject_color(subject_code)
 
     def show_cell_details(self, event, cell_key):
-        """Show detailed information about a cell on right-click"""
+        """Show detailed information about a cell on right-click, staged edits included"""
         class_idx, day_idx, period_idx = cell_key
         section = self.class_names[class_idx]
         
         try:
-            # Get cell data
-            cursor = self.conn.execute("""
-                SELECT SCHEDULE.SUBCODE, SCHEDULE.FINI, SUBJECTS.SUBNAME, FACULTY.NAME
-                FROM SCHEDULE 
-                LEFT JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
-                LEFT JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI
-                WHERE SCHEDULE.DAYID=? AND SCHEDULE.PERIODID=? AND SCHEDULE.SECTION=?
-            """, (day_idx, period_idx, section))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                subject_code, faculty_ini, subject_name, faculty_name = result
+            # The occupancy index holds the saved cells with the staged ones mirrored over them
+            self._sync_conflict_index()
+            entry_id = self.entry_id(section, day_idx, period_idx)
+            entry = self.conflict_index.entry(entry_id)
+            
+            if entry:
+                _, _, subject_code, _, faculty_ini = entry
+                subject_name = self.model.subject_name(subject_code)
+                row = self.conn.execute("SELECT NAME FROM FACULTY WHERE INI=?", (faculty_ini,)).fetchone()
+                faculty_name = row[0] if row else None
                 
                 # Check if this is part of a merged (Double/Triple) lesson
                 condition_checker = TimetableConditionChecker(self.db_path)
@@ -683,6 +743,8 @@ class TimetableEditorComponent(ttk.Frame):
                 details += f"Period: {period_idx + 1}\n\n"
                 details += f"Subject: {subject_name} ({subject_code})\n"
                 details += f"Faculty: {faculty_name} ({faculty_ini})\n"
+                if entry_id in self.session.pending():
+                    details += "Not saved yet\n"
                 
                 # Add lesson type information if it's a multi-period lesson
                 if periods_to_merge > 1:
@@ -693,13 +755,8 @@ class TimetableEditorComponent(ttk.Frame):
                         if p == period_idx:
                             continue  # Skip current period
                         
-                        cursor = self.conn.execute("""
-                            SELECT SUBCODE FROM SCHEDULE 
-                            WHERE DAYID=? AND PERIODID=? AND SECTION=?
-                        """, (day_idx, p, section))
-                        result = cursor.fetchone()
-                        
-                        if result and result[0] == subject_code:
+                        neighbour = self.conflict_index.entry(self.entry_id(section, day_idx, p))
+                        if neighbour and neighbour[2] == subject_code:
                             consecutive_periods.append(p + 1)  # 1-based period numbering
                     
                     details += f"\nLesson Type: {lesson_type} ({periods_to_merge} periods)\n"
@@ -731,6 +788,15 @@ class TimetableEditorComponent(ttk.Frame):
         )
         save_button.pack(side=tk.LEFT, padx=5)
         
+        # Undo/redo of the staged edits
+        self.undo_button = ttk.Button(control_frame, text="Undo", command=self.undo, state=tk.DISABLED)
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+        self.redo_button = ttk.Button(control_frame, text="Redo", command=self.redo, state=tk.DISABLED)
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+        toplevel = self.winfo_toplevel()
+        toplevel.bind("<Control-z>", self.undo, add="+")
+        toplevel.bind("<Control-y>", self.redo, add="+")
+        
         # Reload button
         reload_button = ttk.Button(
             control_frame, 
@@ -755,6 +821,14 @@ class TimetableEditorComponent(ttk.Frame):
         )
         print_timetable_button.pack(side=tk.LEFT, padx=5)
         
+        # Export every timetable button
+        self.export_all_button = ttk.Button(
+            control_frame,
+            text="Export All Timetables",
+            command=self.export_all_timetables
+        )
+        self.export_all_button.pack(side=tk.LEFT, padx=5)
+        
         # Class selector combobox
         if len(self.class_names) > 1:
             ttk.Label(control_frame, text="Select Section:").pack(side=tk.LEFT, padx=(20, 5))
@@ -768,23 +842,67 @@ class TimetableEditorComponent(ttk.Frame):
             section_combo.pack(side=tk.LEFT, padx=5)
             section_combo.bind("<<ComboboxSelected>>", lambda e: self.filter_by_section())
 
+        BusyIndicator(control_frame, self.worker).pack(side=tk.RIGHT, padx=5)
+        self.pending_label = ttk.Label(control_frame, text="")
+        self.pending_label.pack(side=tk.RIGHT, padx=5)
+
     def save_timetable_changes(self):
-        """Save all changes to the database"""
+        """Check the staged edits together and write them in one transaction"""
+        if not len(self.session):
+            messagebox.showinfo("Save Changes", "There are no unsaved changes.")
+            return
         try:
-            self.conn.commit()
-            messagebox.showinfo("Success", "Timetable changes saved successfully!")
-        except sqlite3.Error as e:
+            self._sync_conflict_index()
+            problems = self.session.problems(self.conflict_index, self.days)
+            if problems and not messagebox.askyesno(
+                    "Scheduling Conflict",
+                    "The following conflicts were detected:\n\n" + "\n".join(problems)
+                    + "\n\nDo you want to save anyway?"):
+                return
+            saved = self.session.save(self.conn)
+        except (sqlite3.Error, RuntimeError) as e:
             messagebox.showerror("Database Error", f"Failed to save changes: {e}")
+            return
+        # The model reads the saved sections back through the change log and redraws
+        self.model.refresh()
+        self._on_session_change()
+        messagebox.showinfo("Success", f"{saved} timetable change(s) saved successfully!")
+
+    def discard_changes(self):
+        """Forget the staged edits, asking first; returns False if the user keeps them"""
+        pending = len(self.session)
+        if pending and not messagebox.askyesno(
+                "Unsaved Changes", f"Discard {pending} unsaved timetable change(s)?"):
+            return False
+        while self.session.can_undo():
+            for entry_id, state in self.session.undo():
+                self._mirror(entry_id, state)
+        self.session.discard()
+        self._on_session_change()
+        return True
 
     def reload_timetable(self):
         """Reload timetable data from the database"""
-        self.load_timetable_data()
+        if not self.discard_changes():
+            return
+        self.model.refresh_async(
+            self.worker,
+            on_done=self._on_reloaded,
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to reload timetable: {e}")
+        )
+
+    def _on_reloaded(self, reloaded):
+        # A reload has already redrawn through on_model_change
+        if not reloaded:
+            self.load_timetable_data(refresh=False)
         messagebox.showinfo("Success", "Timetable reloaded successfully!")
 
     def filter_by_section(self):
         """Filter timetable display to show only the selected section"""
         selected_section = self.section_var.get()
-        if selected_section in self.class_names:
+        if self.virtual_grid and selected_section in self.class_names:
+            self.virtual_grid.show_rows([self.class_names.index(selected_section)])
+        elif selected_section in self.class_names:
             for i, class_name in enumerate(self.class_names):
                 # Make all rows invisible first
                 for cell_key in [(i, day_idx, period_idx) for day_idx in range(len(self.days)) for period_idx in range(len(self.periods))]:
@@ -801,130 +919,22 @@ class TimetableEditorComponent(ttk.Frame):
 
     def check_all_conflicts(self):
         """Check and display all conflicts in the current timetable"""
-        conflict_report = []
-        
-        try:
-            # Query all schedule entries
-            cursor = self.conn.execute(
-                "SELECT DISTINCT DAYID, PERIODID, FINI FROM SCHEDULE WHERE FINI != 'NULL'"
-            )
-            schedule_items = list(cursor)
-            
-            # Check for faculty conflicts (same faculty assigned to multiple sections in same period)
-            for day_id, period_id, faculty_ini in schedule_items:
-                cursor = self.conn.execute(
-                    "SELECT SECTION FROM SCHEDULE WHERE DAYID=? AND PERIODID=? AND FINI=?", 
-                    (day_id, period_id, faculty_ini)
-                )
-                sections = [row[0] for row in cursor]
-                
-                if len(sections) > 1:
-                    conflict_report.append(
-                        f"CONFLICT: Faculty '{faculty_ini}' is assigned to multiple sections ({', '.join(sections)}) "
-                        f"during {self.days[day_id]} Period {period_id+1}"
-                    )
-            
-            # Check for faculty workload (too many periods in a day)
-            cursor = self.conn.execute("SELECT DISTINCT FINI FROM SCHEDULE WHERE FINI != 'NULL'")
-            faculty_list = [row[0] for row in cursor]
-            
-            for faculty in faculty_list:
-                for day in range(len(self.days)):
-                    cursor = self.conn.execute(
-                        "SELECT COUNT(*) FROM SCHEDULE WHERE DAYID=? AND FINI=?",
-                        (day, faculty)
-                    )
-                    period_count = cursor.fetchone()[0]
-                    if period_count > 5:  # If faculty has more than 5 periods in a day
-                        conflict_report.append(
-                            f"WORKLOAD: Faculty '{faculty}' has {period_count} periods on {self.days[day]} (recommended max: 5)"
-                        )
-            
-            # Check for subject assignments exceeding lessons_per_week limits
-            condition_checker = TimetableConditionChecker(self.db_path)
-            exceeded_limits = condition_checker.check_all_sections_limits()
-            
-            for section, subject_code, current_count, limit in exceeded_limits:
-                conflict_report.append(
-                    f"WARNING: Subject '{subject_code}' in section '{section}' has {current_count} assignments "
-                    f"but lessons_per_week is set to {limit}"
-                )
-                
-            # Check for incorrectly merged periods (Double/Triple lessons not spanning consecutive periods)
-            # Get all distinct sections and subjects
-            cursor = self.conn.execute("SELECT DISTINCT SECTION, SUBCODE FROM SCHEDULE WHERE SUBCODE != 'NULL'")
-            section_subjects = [(row[0], row[1]) for row in cursor.fetchall()]
-            
-            for section, subject_code in section_subjects:
-                # Check the lesson type for this subject
-                periods_to_merge, lesson_type, _ = condition_checker.check_lesson_type_for_merging(section, subject_code)
-                
-                # Only check subjects with Double/Triple lesson type
-                if periods_to_merge > 1:
-                    # Get all periods where this subject is assigned
-                    cursor = self.conn.execute("""
-                        SELECT DAYID, PERIODID FROM SCHEDULE 
-                        WHERE SECTION=? AND SUBCODE=?
-                        ORDER BY DAYID, PERIODID
-                    """, (section, subject_code))
-                    assignments = [row for row in cursor.fetchall()]
-                    
-                    # For each assignment, check if it has the correct number of consecutive periods
-                    for day_id, period_id in assignments:
-                        # Find if there are consecutive periods with the same subject
-                        consecutive_count = 1  # Start with 1 (the current period)
-                        consecutive_periods = [period_id]
-                        
-                        # Check periods after this one
-                        for i in range(1, periods_to_merge):
-                            next_period = period_id + i
-                            if (day_id, next_period) in assignments:
-                                consecutive_count += 1
-                                consecutive_periods.append(next_period)
-                                
-                        # Check periods before this one
-                        for i in range(1, periods_to_merge):
-                            prev_period = period_id - i
-                            if prev_period >= 0 and (day_id, prev_period) in assignments:
-                                consecutive_count += 1
-                                consecutive_periods.append(prev_period)
-                        
-                        # Check if this period is part of a proper consecutive sequence
-                        is_properly_merged = False
-                        consecutive_periods.sort()
-                        
-                        # Check for each possible start position if there's a full span of consecutive periods
-                        for start_idx in range(max(0, period_id - periods_to_merge + 1), period_id + 1):
-                            expected_span = list(range(start_idx, start_idx + periods_to_merge))
-                            if all(p in consecutive_periods for p in expected_span):
-                                is_properly_merged = True
-                                break
-                        
-                        # Only report if this specific period is not part of a proper merged sequence
-                        # and we haven't reported it before
-                        if not is_properly_merged:
-                            # Check if we've already reported this specific period
-                            conflict_key = f"{section}_{subject_code}_{day_id}_{period_id}"
-                            if conflict_key not in [getattr(c, '_reported_key', '') for c in conflict_report]:
-                                conflict_msg = (
-                                    f"MERGE ISSUE: Subject '{subject_code}' in section '{section}' on {self.days[day_id]} "
-                                    f"Period {period_id+1} is configured as {lesson_type} lesson but does not span {periods_to_merge} "
-                                    f"consecutive periods as required"
-                                )
-                                # Add a custom attribute to track reported conflicts
-                                conflict_msg = type('', (), {'__str__': lambda self: conflict_msg, '_reported_key': conflict_key})()
-                                conflict_report.append(conflict_msg)
-            
-            # Display conflict report
-            if conflict_report:
-                conflict_text = "\n\n".join(str(c) for c in conflict_report)
-                messagebox.showwarning("Timetable Conflicts", 
-                                     f"The following conflicts were detected in the timetable:\n\n{conflict_text}")
-            else:
-                messagebox.showinfo("Conflict Check", "No conflicts found in the timetable!")
-                
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to check conflicts: {e}")
+        # One pass over SCHEDULE and LESSONS finds every kind of conflict, off the UI thread
+        days, recess_after = list(self.days), self.recess_break_after
+        self.worker.submit(
+            lambda conn: find_conflicts(conn, day_names=days, recess_after=recess_after),
+            on_done=self._show_conflict_report,
+            on_error=lambda e: messagebox.showerror("Database Error", f"Failed to check conflicts: {e}")
+        )
+
+    def _show_conflict_report(self, conflict_report):
+        """Display the result of check_all_conflicts"""
+        if conflict_report:
+            conflict_text = "\n\n".join(str(c) for c in conflict_report)
+            messagebox.showwarning("Timetable Conflicts", 
+                                 f"The following conflicts were detected in the timetable:\n\n{conflict_text}")
+        else:
+            messagebox.showinfo("Conflict Check", "No conflicts found in the timetable!")
 
     def open_timetable_generator(self):
         """Open the timetable generator to print the current timetable"""
@@ -935,35 +945,65 @@ class TimetableEditorComponent(ttk.Frame):
             else:
                 current_section = self.class_names[0] if self.class_names else ""
             
-            # Get the path to the timetable_generator.py file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            timetable_generator_path = os.path.join(current_dir, "timetable_generator.py")
-            
-            if not os.path.exists(timetable_generator_path):
-                messagebox.showerror("File Not Found", "The timetable generator file was not found.")
-                return
-            
-            # Launch the timetable generator with the current section as parameter
-            import subprocess
-            python_executable = sys.executable
-            
-            # Create a command that will run the timetable generator with the current section
-            cmd = [python_executable, timetable_generator_path, current_section]
-            
-            # Launch the process
-            subprocess.Popen(cmd)
+            # Show the current section in the timetable window of this process
+            open_screen('timetable', current_section)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open timetable generator: {str(e)}")
 
+    def export_all_timetables(self):
+        """Export every section and faculty timetable to PNG/PDF in a separate process"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'batch_export.py')
+        # Output goes to a file, so a long progress log cannot fill a pipe and stall the export
+        log = tempfile.TemporaryFile(mode='w+')
+        try:
+            process = subprocess.Popen([sys.executable, script], stdout=log, stderr=subprocess.STDOUT, text=True)
+        except OSError as e:
+            log.close()
+            messagebox.showerror("Export", f"Failed to start the export: {e}")
+            return
+        self.export_all_button.config(state=tk.DISABLED)
+        self.after(500, self._check_export, process, log)
+
+    def _check_export(self, process, log):
+        """Poll the export started by export_all_timetables and report its result"""
+        if process.poll() is None:
+            self.after(500, self._check_export, process, log)
+            return
+        self.export_all_button.config(state=tk.NORMAL)
+        log.seek(0)
+        output = log.read().strip().splitlines()
+        log.close()
+        summary = output[-1] if output else "No output"
+        if process.returncode == 0:
+            messagebox.showinfo("Export", summary)
+        else:
+            messagebox.showerror("Export", f"The export failed:\n\n{summary}")
 
-# Example usage:
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.title("Timetable Editor")
-    root.geometry("1200x800")
+    def destroy(self):
+        """Stop listening to the timetable model and stop the database worker"""
+        self.model.unsubscribe(self.on_model_change)
+        self.worker.close()
+        super().destroy()
+
+
+def open_window(master=None):
+    """Open the editor in its own Toplevel of master and return the Toplevel"""
+    window = tk.Toplevel(master)
+    window.title("Timetable Editor")
+    window.geometry("1200x800")
     
-    editor = TimetableEditorComponent(root)
+    editor = TimetableEditorComponent(window)
     editor.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-    
-    root.mainloop()
+    window.show = editor.load_timetable_data  # Reopening picks up changes made elsewhere
+
+    def on_close():
+        if editor.discard_changes():
+            window.destroy()
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    return window
+
+
+# Example usage:
+if __name__ == "__main__":
+    run_standalone('editor', sys.modules[__name__])
@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import sqlite3
+import sys
+from database import get_connection
+from app_shell import run_standalone
+from timetable_model import get_timetable_model
+from grid_renderer import GridRenderer
 
 days = 5
 periods = 6
 recess_break_aft = 3 # recess after 3rd Period
 fini = None
 butt_grid = []
+renderer = None
 
 
 period_names = list(map(lambda x: 'Period ' + str(x), range(1, 6+1)))
@@ -18,49 +23,32 @@ day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thrusday', 'Friday']
 def select_fac():
     global fini
     fini = str(combo1.get())
-    print(fini)
-    update_table(fini)
+    # A reload caused by other windows' edits redraws through on_model_change
+    if not model.refresh():
+        update_table(fini)
 
 
 
 def update_table(fini):
+    # Only cells that differ from the screen are reconfigured, in one idle pass
+    state = {}
     for i in range(days):
         for j in range(periods):
-            cursor = conn.execute(f"SELECT SECTION, SUBCODE FROM SCHEDULE\
-                WHERE DAYID={i} AND PERIODID={j} AND FINI='{fini}'")
-            cursor = list(cursor)
-            print(cursor)
-            
-            butt_grid[i][j]['bg'] = 'white'
+            cursor = model.faculty_cell(fini, i, j)
             if len(cursor) != 0:
-                subcode = cursor[0][1]
-                cur1 = conn.execute(F"SELECT SUBTYPE FROM SUBJECTS WHERE SUBCODE='{subcode}'")
-                cur1 = list(cur1)
-                subtype = cur1[0][0]
-                butt_grid[i][j]['fg'] = 'white'
-                if subtype == 'T':
-                    butt_grid[i][j]['bg'] = 'green'
-                elif subtype == 'P':
-                    butt_grid[i][j]['bg'] = 'blue'
-
+                subtype = model.subject_type(cursor[0][1])
+                bg = 'green' if subtype == 'T' else 'blue' if subtype == 'P' else 'white'
                 sec_li = [x[0] for x in cursor]
-                t = ', '.join(sec_li)
-                butt_grid[i][j]['text'] = "Sections: " + t
-                print(i, j, cursor[0][0])
+                state[(i, j)] = {'bg': bg, 'fg': 'white', 'text': "Sections: " + ', '.join(sec_li)}
             else:
-                butt_grid[i][j]['fg'] = 'black'
-                butt_grid[i][j]['text'] = "No Class"
-                butt_grid[i][j].update()
+                state[(i, j)] = {'bg': 'white', 'fg': 'black', 'text': "No Class"}
+    renderer.render(state)
 
 
 
 def process_button(d, p):
-    print(d, p, fini)
-    details = tk.Tk()
-    cursor = conn.execute(f"SELECT SECTION, SUBCODE FROM SCHEDULE\
-                WHERE DAYID={d} AND PERIODID={p} AND FINI='{fini}'")
-    cursor = list(cursor)
-    print("section", cursor)
+    details = tk.Toplevel()
+    cursor = model.faculty_cell(fini, d, p)
     if len(cursor) != 0:
         sec_li = [x[0] for x in cursor]
         t = ', '.join(sec_li)
@@ -97,8 +85,6 @@ def process_button(d, p):
         command=details.destroy
     ).pack(pady=10)
 
-    details.mainloop()
-
 
 
 def fac_tt_frame(tt, f):
@@ -138,7 +124,8 @@ def fac_tt_frame(tt, f):
         height=2
     ).pack(side=tk.LEFT, padx=10)
 
-    global butt_grid
+    global butt_grid, renderer
+    butt_grid = []
     global fini
     fini = f
 
@@ -216,20 +203,29 @@ def fac_tt_frame(tt, f):
             b.append(bb)
 
         butt_grid.append(b)
-        # print(b)
         b = []
 
-    print(butt_grid[0][1], butt_grid[1][1])
-    update_table(fini)
+    renderer = GridRenderer.from_rows(butt_grid)
+    if not model.refresh():
+        update_table(fini)
 
 
 
-conn = sqlite3.connect(r'files/timetable.db')
-if __name__ == "__main__":
-    
-    # connecting database
+def on_model_change(changes):
+    # A changed cell may have gained or lost this faculty member, so always redraw
+    if fini is not None and renderer is not None:
+        update_table(fini)
+
 
-    tt = tk.Tk()
+conn = get_connection()
+model = get_timetable_model()
+model.subscribe(on_model_change)
+
+
+def open_window(master=None):
+    """Build the timetable window as a Toplevel of master and return it"""
+    global combo1
+    tt = tk.Toplevel(master)
     tt.title('Faculty Timetable')
 
     fac_tt_frame(tt, fini)
@@ -245,13 +241,13 @@ if __name__ == "__main__":
 
     cursor = conn.execute("SELECT DISTINCT INI FROM FACULTY")
     fac_li = [row[0] for row in cursor]
-    print(fac_li)
     combo1 = ttk.Combobox(
         fac_select_f,
         values=fac_li,
     )
     combo1.pack(side=tk.LEFT)
     combo1.current(0)
+    combo1.bind("<<ComboboxSelected>>", lambda e: select_fac())
 
     b = tk.Button(
         fac_select_f,
@@ -263,5 +259,8 @@ if __name__ == "__main__":
     b.pack(side=tk.LEFT, padx=10)
     b.invoke()
 
+    return tt
 
-    tt.mainloop()
\ No newline at end of file
+
+if __name__ == "__main__":
+    run_standalone('timetable_fac', sys.modules[__name__])
@@ -2,32 +2,26 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 import os
+import sys
+from database import get_connection, release_connection
+from timetable_model import get_timetable_model
+from db_worker import DBWorker
+from app_shell import run_standalone
+from timetable_layout import (DAY_MAP, load_timetable_structure, section_timetable,
+                              find_spans, cell_text)
 
-# Default days and period information (fallback if DB settings not available)
-DEFAULT_DAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa"]
-DEFAULT_PERIODS_INFO = {
-    1: "8:00 - 8:45",
-    2: "9:00 - 9:45",
-    3: "10:00 - 10:45",
-    4: "11:00 - 11:45",
-    5: "12:00 - 12:45",
-    6: "13:00 - 13:45",
-}
 
-# Map days from scheduler (0-4) to day codes
-DAY_MAP = {
-    0: "Mo", 1: "Tu", 2: "We", 3: "Th", 4: "Fr", 5: "Sa"
-}
-
-class TimetableApp(tk.Tk):
-    def __init__(self, class_name_filter="CSE"):
-        super().__init__()
+class TimetableApp(tk.Toplevel):
+    def __init__(self, class_name_filter="CSE", master=None):
+        super().__init__(master)
         self.class_name_filter = class_name_filter.upper()
         
         # Database connection
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.db_path = os.path.join(project_root, 'files', 'timetable.db')
         self.conn = self._connect_db()
+        self.model = get_timetable_model(self.db_path) if self.conn else None
+        self.worker = DBWorker(self, self.db_path) if self.conn else None
         
         # Initialize days and periods based on DB settings
         self.days, self.periods_info = self._load_timetable_structure()
@@ -37,6 +31,7 @@ class TimetableApp(tk.Tk):
 
         self._create_ui()
         if self.conn:
+            self.model.subscribe(self._on_model_change)
             self._load_and_display_timetable()
         else:
             # Ensure this label is also created within the main UI structure if conn fails early
@@ -47,66 +42,7 @@ class TimetableApp(tk.Tk):
 
     def _load_timetable_structure(self):
         """Load days and periods configuration from the database"""
-        days = DEFAULT_DAYS.copy()
-        periods_info = DEFAULT_PERIODS_INFO.copy()
-        
-        if not self.conn:
-            print("Warning: No database connection. Using default timetable structure.")
-            return days, periods_info
-            
-        try:
-            # First check if TIMETABLE_SETTINGS table exists
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='TIMETABLE_SETTINGS'")
-            if not cursor.fetchone():
-                print("Warning: TIMETABLE_SETTINGS table not found. Using default timetable structure.")
-                return days, periods_info
-                
-            # Try to load days configuration
-            cursor.execute("SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'DAYS_ENABLED'")
-            days_row = cursor.fetchone()
-            if days_row and days_row[0]:
-                # Format should be comma-separated day codes like "Mo,Tu,We,Th,Fr"
-                days_enabled = days_row[0].split(',')
-                # Filter the default days list to only include enabled days
-                days = [day for day in DEFAULT_DAYS if day in days_enabled]
-                
-            # Try to load periods configuration
-            cursor.execute("SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'PERIODS_CONFIG'")
-            periods_row = cursor.fetchone()
-            if periods_row and periods_row[0]:
-                # Format should be JSON-like: "1:8:00-8:45,2:9:00-9:45,..."
-                try:
-                    periods_data = {}
-                    for period_conf in periods_row[0].split(','):
-                        if ':' in period_conf:
-                            period_num, time_range = period_conf.split(':', 1)
-                            periods_data[int(period_num)] = time_range
-                    if periods_data:  # Only replace if we parsed some valid data
-                        periods_info = periods_data
-                except Exception as e:
-                    print(f"Error parsing periods config: {e}. Using default periods.")
-            
-            # Alternatively, try to load from NUM_PERIODS setting (simpler approach)
-            cursor.execute("SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'NUM_PERIODS'")
-            num_periods_row = cursor.fetchone()
-            if num_periods_row and num_periods_row[0]:
-                try:
-                    num_periods = int(num_periods_row[0])
-                    # Only keep the first num_periods from the default
-                    periods_info = {k: v for k, v in DEFAULT_PERIODS_INFO.items() if k <= num_periods}
-                except ValueError:
-                    print(f"Invalid NUM_PERIODS value: {num_periods_row[0]}. Using default periods.")
-            
-            print(f"Loaded timetable structure from database: {len(days)} days, {len(periods_info)} periods")
-            return days, periods_info
-            
-        except sqlite3.Error as e:
-            print(f"Database error loading timetable structure: {e}")
-            return days, periods_info
-        except Exception as e:
-            print(f"Unexpected error loading timetable structure: {e}")
-            return days, periods_info
+        return load_timetable_structure(self.conn)
 
     def _connect_db(self):
         try:
@@ -115,49 +51,8 @@ class TimetableApp(tk.Tk):
             if not os.path.exists(files_dir):
                 os.makedirs(files_dir) # Create if it doesn't exist
 
-            conn = sqlite3.connect(self.db_path)
-            
-            # Create tables if they don't exist (supporting both schemas)
-            
-            # Minimal FACULTY schema for INI (actual schema in faculty.py)
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS FACULTY (
-                FID TEXT PRIMARY KEY NOT NULL,
-                NAME TEXT NOT NULL,
-                INI TEXT 
-                /* other columns */
-            );""")
-            # Minimal SUBJECTS schema for SUBNAME (actual schema in subjects.py)
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS SUBJECTS (
-                SUBCODE TEXT PRIMARY KEY NOT NULL,
-                SUBNAME TEXT NOT NULL 
-                /* other columns */
-            );""")
-            # Schedule table used by scheduler.py
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS SCHEDULE (
-                ID CHAR(10) NOT NULL PRIMARY KEY,
-                DAYID INT NOT NULL,
-                PERIODID INT NOT NULL,
-                SUBCODE CHAR(10) NOT NULL,
-                SECTION CHAR(5) NOT NULL,
-                FINI CHAR(10) NOT NULL
-            );""")
-            # SCHEDULED_LESSONS table (for backward compatibility)
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS SCHEDULED_LESSONS (
-                SCHEDULE_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                CLASS_NAME TEXT NOT NULL,
-                DAY_OF_WEEK TEXT NOT NULL CHECK(DAY_OF_WEEK IN ('Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa')),
-                PERIOD_NUMBER INTEGER NOT NULL CHECK(PERIOD_NUMBER BETWEEN 1 AND 6),
-                SUBJECT_CODE TEXT,
-                TEACHER_ID TEXT, 
-                FOREIGN KEY (SUBJECT_CODE) REFERENCES SUBJECTS(SUBCODE),
-                FOREIGN KEY (TEACHER_ID) REFERENCES FACULTY(FID)
-            );""")
-            conn.commit()
-            return conn
+            # The pool creates/upgrades tables (both SCHEDULE and SCHEDULED_LESSONS schemas)
+            return get_connection(self.db_path)
         except sqlite3.Error as e:
             messagebox.showerror("Database Connection Error",
                                  f"Failed to connect to database or setup tables: {e}\nDB Path: {self.db_path}")
@@ -181,13 +76,8 @@ class TimetableApp(tk.Tk):
         # Get available sections from the database (from SCHEDULE table)
         self.available_sections = []
         try:
-            cursor = self.conn.execute("SELECT DISTINCT SECTION FROM SCHEDULE ORDER BY SECTION")
-            self.available_sections = [row[0] for row in cursor.fetchall()]
-            
-            # If no sections found in SCHEDULE, try SCHEDULED_LESSONS
-            if not self.available_sections:
-                cursor = self.conn.execute("SELECT DISTINCT CLASS_NAME FROM SCHEDULED_LESSONS ORDER BY CLASS_NAME")
-                self.available_sections = [row[0] for row in cursor.fetchall()]
+            # Sections of SCHEDULE, and of SCHEDULED_LESSONS for classes not in SCHEDULE
+            self.available_sections = self.model.section_names()
         except:
             self.available_sections = [self.class_name_filter]
             
@@ -269,54 +159,52 @@ class TimetableApp(tk.Tk):
         self.title(f"Timetable - {self.class_name_filter}")
         self._load_and_display_timetable()
 
+    def show(self, section=None):
+        """Switch the reused window to section"""
+        if section:
+            self.section_var.set(section)
+            self._change_section()
+
+    def _model_section(self):
+        """Name of the selected section as stored in the timetable model (matched case-insensitively)"""
+        for name in self.model.section_names():
+            if name.upper() == self.class_name_filter:
+                return name
+        return self.class_name_filter
+
     def _check_faculty_conflicts(self, section):
         """Check for conflicts where the same faculty is assigned to multiple sections at the same time"""
         conflicts = []
         
-        try:
-            # Try to check conflicts in SCHEDULE table first (from scheduler.py)
-            query = """
-            SELECT s1.DAYID, s1.PERIODID, s1.FINI, s1.SECTION, s2.SECTION
-            FROM SCHEDULE s1
-            JOIN SCHEDULE s2 ON s1.DAYID = s2.DAYID 
-                             AND s1.PERIODID = s2.PERIODID
-                             AND s1.FINI = s2.FINI
-                             AND s1.SECTION != s2.SECTION
-            WHERE s1.SECTION = ?
-            ORDER BY s1.DAYID, s1.PERIODID;
-            """
-            cursor = self.conn.execute(query, (section,))
-            conflicts_schedule = cursor.fetchall()
-            
+        section = self._model_section()
+        for (day_id, period_id), (subcode, fini) in sorted(self.model.section_week(section).items()):
+            if self.model.faculty_busy(fini, day_id, period_id) < 2:
+                continue
             # Convert from numeric day ID to day code
-            for conflict in conflicts_schedule:
-                day_id, period_id, fini, section1, section2 = conflict
-                day_code = DAY_MAP.get(day_id, f"Day{day_id}")
-                # Add 1 to period_id since we store 0-indexed but display 1-indexed
-                conflicts.append((day_code, period_id + 1, fini, section1, section2))
-            
-            # Also check SCHEDULED_LESSONS table for conflicts (original format)
-            query2 = """
-            SELECT sl1.DAY_OF_WEEK, sl1.PERIOD_NUMBER, f.INI, sl1.CLASS_NAME, sl2.CLASS_NAME
-            FROM SCHEDULED_LESSONS sl1
-            JOIN SCHEDULED_LESSONS sl2 ON sl1.DAY_OF_WEEK = sl2.DAY_OF_WEEK 
-                                      AND sl1.PERIOD_NUMBER = sl2.PERIOD_NUMBER
-                                      AND sl1.TEACHER_ID = sl2.TEACHER_ID
-                                      AND sl1.CLASS_NAME != sl2.CLASS_NAME
-            JOIN FACULTY f ON sl1.TEACHER_ID = f.FID
-            WHERE sl1.CLASS_NAME = ?
-            ORDER BY sl1.DAY_OF_WEEK, sl1.PERIOD_NUMBER;
-            """
-            cursor = self.conn.execute(query2, (section,))
-            conflicts.extend(cursor.fetchall())
-            
-            return conflicts
-            
-        except sqlite3.Error as e:
-            print(f"Database error checking for conflicts: {e}")
-            return []
+            day_code = DAY_MAP.get(day_id, f"Day{day_id}")
+            for other, _ in self.model.faculty_cell(fini, day_id, period_id):
+                if other != section:
+                    # Add 1 to period_id since we store 0-indexed but display 1-indexed
+                    conflicts.append((day_code, period_id + 1, fini, section, other))
+        
+        return conflicts
+
+    def _on_model_change(self, changes):
+        """Redraw when a cell of the shown section changes"""
+        section = self._model_section()
+        if changes is None or any(changed[0] == section for changed in changes):
+            self._load_and_display_timetable(refresh=False)
+
+    def _load_and_display_timetable(self, refresh=True):
+        # Reload other windows' edits on the worker thread; a reload redraws through _on_model_change
+        if refresh:
+            self.model.refresh_async(
+                self.worker,
+                on_done=lambda reloaded: reloaded or self._load_and_display_timetable(refresh=False),
+                on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load timetable: {e}")
+            )
+            return
 
-    def _load_and_display_timetable(self):
         # Reset all cells first
         self._reset_cells()
 
@@ -348,128 +236,20 @@ class TimetableApp(tk.Tk):
                                      "\n".join(conflict_msgs[:5]) +
                                      ("\n..." if len(conflict_msgs) > 5 else ""))
 
-            # Collect all schedule data by day
-            timetable_data = {}
-            has_schedule_data = False
+            # Collect all schedule data by day from the shared timetable model
+            # (SCHEDULE rows, or SCHEDULED_LESSONS for sections without any)
+            timetable_data = section_timetable(self.model, self._model_section(), self.days, self.periods_info)
             
-            try:
-                # Query to get timetable data from SCHEDULE table
-                query = """
-                SELECT sch.DAYID, sch.PERIODID, s.SUBNAME, sch.FINI, s.SUBCODE
-                FROM SCHEDULE sch
-                LEFT JOIN SUBJECTS s ON sch.SUBCODE = s.SUBCODE
-                WHERE sch.SECTION = ? 
-                ORDER BY sch.DAYID, sch.PERIODID;
-                """
-                cursor = self.conn.execute(query, (self.class_name_filter,))
-                lessons = cursor.fetchall()
-                
-                if lessons:
-                    has_schedule_data = True
-                    for lesson_data in lessons:
-                        day_id, period_id, sub_name, fini, subcode = lesson_data
-                        # Convert from numeric day ID to day code
-                        day_code = DAY_MAP.get(day_id, f"Day{day_id}")
-                        # Period is 0-indexed in SCHEDULE table, but 1-indexed in UI
-                        period_num = period_id + 1
-                        
-                        # Skip if day or period not in our timetable grid
-                        if day_code not in self.days or period_num not in self.periods_info:
-                            continue
-                            
-                        if day_code not in timetable_data:
-                            timetable_data[day_code] = {}
-                            
-                        # Use subject name from SUBJECTS table if available, otherwise use SUBCODE
-                        subject_display = sub_name if sub_name else subcode if subcode != "NULL" else "Free"
-                        faculty_display = fini if fini != "NULL" else "-"
-                        
-                        timetable_data[day_code][period_num] = {
-                            'subject': subject_display,
-                            'faculty': faculty_display,
-                            'subject_code': subcode
-                        }
-            except sqlite3.Error as e:
-                print(f"Error loading SCHEDULE data: {e}")
-                has_schedule_data = False
-
-            # If no data from SCHEDULE table, try SCHEDULED_LESSONS
-            if not has_schedule_data:
-                query = """
-                SELECT sl.DAY_OF_WEEK, sl.PERIOD_NUMBER, s.SUBNAME, f.INI, sl.SUBJECT_CODE 
-                FROM SCHEDULED_LESSONS sl
-                LEFT JOIN SUBJECTS s ON sl.SUBJECT_CODE = s.SUBCODE
-                LEFT JOIN FACULTY f ON sl.TEACHER_ID = f.FID
-                WHERE UPPER(sl.CLASS_NAME) = ? 
-                ORDER BY sl.DAY_OF_WEEK, sl.PERIOD_NUMBER; 
-                """
-                cursor = self.conn.execute(query, (self.class_name_filter,))
-                lessons = cursor.fetchall()
-
-                if not lessons:
-                    print(f"No scheduled lessons found for class: {self.class_name_filter}")
-                else:
-                    for lesson_data in lessons:
-                        day_db, period_num, sub_name, teacher_ini, subject_code = lesson_data
-                        
-                        if day_db not in timetable_data:
-                            timetable_data[day_db] = {}
-                            
-                        subject_display = sub_name or 'N/A'
-                        faculty_display = teacher_ini or 'N/A'
-                        
-                        timetable_data[day_db][period_num] = {
-                            'subject': subject_display,
-                            'faculty': faculty_display,
-                            'subject_code': subject_code
-                        }
+            if not timetable_data:
+                print(f"No scheduled lessons found for class: {self.class_name_filter}")
             
             # Process the timetable data to find consecutive same subjects
             for day in self.days:
                 if day not in timetable_data:
                     continue
-                    
-                # Find spans of consecutive periods with the same subject
-                spans = []
-                current_span = []
-                last_subject = None
-                
-                for period in sorted(self.periods_info.keys()):
-                    if period in timetable_data[day]:
-                        current_subject = timetable_data[day][period].get('subject_code')
-                        
-                        # Skip if no subject code (free period)
-                        if current_subject in (None, "NULL", ""):
-                            if current_span:
-                                spans.append(current_span)
-                                current_span = []
-                            last_subject = None
-                            continue
-                            
-                        # If same subject as previous period, extend the span
-                        if current_subject == last_subject:
-                            current_span.append(period)
-                        else:
-                            # End previous span if exists
-                            if current_span:
-                                spans.append(current_span)
-                                
-                            # Start new span
-                            current_span = [period]
-                            last_subject = current_subject
-                    else:
-                        # No class this period
-                        if current_span:
-                            spans.append(current_span)
-                            current_span = []
-                        last_subject = None
-                
-                # Add the last span if it exists
-                if current_span:
-                    spans.append(current_span)
                 
                 # Process spans to merge cells where needed
-                for span in spans:
+                for span in find_spans(timetable_data[day], self.periods_info.keys()):
                     if len(span) > 1:
                         # Get subject info from the first period
                         first_period = span[0]
@@ -484,12 +264,7 @@ class TimetableApp(tk.Tk):
                         subject_info = timetable_data[day][period]
                         
                         if cell_key in self.cells and not self.cells[cell_key]['merged']:
-                            lesson_text = f"{subject_info['subject']}\n{subject_info['faculty']}"
-                            self.cells[cell_key]['label'].config(text=lesson_text)
-                            
-                            # Add period information for single cells
-                            lesson_text += f"\nPeriod {period}"
-                            self.cells[cell_key]['label'].config(text=lesson_text)
+                            self.cells[cell_key]['label'].config(text=cell_text(subject_info, span))
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Query Error", f"Failed to load timetable data: {e}", parent=self)
@@ -545,8 +320,7 @@ class TimetableApp(tk.Tk):
         style.configure("Merged.TLabel", background="#f0f0f0", font=("Arial", 10, "bold"))
         
         # Add label with subject information
-        period_range = f"Periods {periods[0]}-{periods[-1]}" if len(periods) > 1 else f"Period {periods[0]}"
-        merged_text = f"{subject_info['subject']}\n{subject_info['faculty']}\n{period_range}"
+        merged_text = cell_text(subject_info, periods)
         
         merged_label = ttk.Label(
             merged_frame, 
@@ -563,11 +337,20 @@ class TimetableApp(tk.Tk):
         self.merged_cells[merged_key] = merged_frame
 
     def _on_closing(self):
+        if self.model:
+            self.model.unsubscribe(self._on_model_change)
+        if self.worker:
+            self.worker.close()
         if self.conn:
-            self.conn.close()
-            print("Database connection closed.")
+            release_connection(self.conn, self.db_path)
+            print("Database connection released.")
         self.destroy()
 
+def open_window(master=None, section="CSE"):
+    """Build the timetable window of section as a Toplevel of master and return it"""
+    return TimetableApp(class_name_filter=section or "CSE", master=master)
+
+
 if __name__ == '__main__':
     # This makes the script runnable to display the timetable.
     # Ensure that:
@@ -580,6 +363,5 @@ if __name__ == '__main__':
     # 2. The database should have either:
     #    - SCHEDULED_LESSONS table populated (original format)
     #    - SCHEDULE table populated (scheduler.py format)
-    
-    app = TimetableApp(class_name_filter="CSE") # You can change "CSE" to any class/section name
-    app.mainloop() 
\ No newline at end of file
+    # An optional argument picks the class/section, e.g. timetable_generator.py CSE
+    run_standalone('timetable', sys.modules[__name__], *sys.argv[1:2])
@@ -0,0 +1,117 @@
+import os
+import threading
+from database import get_connection
+
+# Layout of the grid shown in the Streamlit app
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+PERIODS = list(range(1, 7))
+
+# One query per grid: the whole week of a section or of a faculty member
+SECTION_WEEK_QUERY = """
+    SELECT SCHEDULE.DAYID, SCHEDULE.PERIODID, SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, FACULTY.NAME
+    FROM SCHEDULE
+    JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
+    JOIN FACULTY ON SCHEDULE.FINI = FACULTY.INI
+    WHERE SCHEDULE.SECTION = ?
+"""
+
+FACULTY_WEEK_QUERY = """
+    SELECT SCHEDULE.DAYID, SCHEDULE.PERIODID, SCHEDULE.SUBCODE, SUBJECTS.SUBNAME, SCHEDULE.SECTION
+    FROM SCHEDULE
+    JOIN SUBJECTS ON SCHEDULE.SUBCODE = SUBJECTS.SUBCODE
+    WHERE SCHEDULE.FINI = ?
+"""
+
+
+class TimetableGridService:
+    """
+    Builds the day x period timetable grid of a section or a faculty member
+    with a single query and keeps the result cached per section/FINI.
+
+    The cache is cleared when SCHEDULE is written to, either through
+    invalidate() from this process or by another process committing to the
+    database file (detected through PRAGMA data_version).
+    """
+    def __init__(self, db_path=None, days=None, periods=None):
+        if db_path is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            db_path = os.path.join(project_root, 'files', 'timetable.db')
+        self.db_path = db_path
+        self.days = days if days else DAY_NAMES
+        self.periods = periods if periods else PERIODS
+
+        # Held for the service's lifetime: PRAGMA data_version is per connection
+        self.conn = get_connection(self.db_path)
+        self._lock = threading.Lock()
+        self._cache = {}  # {('section', SECTION) | ('faculty', FINI): DataFrame}
+        self._data_version = None
+
+    def get_section_grid(self, section):
+        """Return the timetable DataFrame of a student section"""
+        return self._get_grid('section', section)
+
+    def get_faculty_grid(self, faculty_ini):
+        """Return the timetable DataFrame of a faculty member"""
+        return self._get_grid('faculty', faculty_ini)
+
+    def invalidate(self):
+        """Drop every cached grid (call after writing to SCHEDULE)"""
+        with self._lock:
+            self._cache.clear()
+
+    def _get_grid(self, kind, key):
+        with self._lock:
+            self._check_external_writes()
+            cache_key = (kind, key)
+            if cache_key not in self._cache:
+                self._cache[cache_key] = self._build_grid(kind, key)
+            # Callers may style or edit the frame, so never hand out the cached one
+            return self._cache[cache_key].copy()
+
+    def _check_external_writes(self):
+        """Clear the cache if any other connection committed since the last check"""
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+
+    def _build_grid(self, kind, key):
+        """Fetch the whole week in one query and pivot it into the grid"""
+        import pandas as pd  # Loaded with the first grid, not when the app starts
+        query = SECTION_WEEK_QUERY if kind == 'section' else FACULTY_WEEK_QUERY
+        week = pd.read_sql_query(query, self.conn, params=(key,))
+        week.columns = ['DAYID', 'PERIODID', 'SUBCODE', 'SUBNAME', 'OTHER']
+
+        if kind == 'section':
+            week['CELL'] = week['SUBNAME'] + "\n(" + week['SUBCODE'] + ")\n" + week['OTHER']
+        else:
+            week['CELL'] = week['SUBNAME'] + "\n(" + week['SUBCODE'] + ")\nSection: " + week['OTHER']
+
+        # Keep the first class of a slot, like the old per-cell fetchone() did
+        week = week.drop_duplicates(subset=['DAYID', 'PERIODID'])
+
+        grid = week.pivot(index='DAYID', columns='PERIODID', values='CELL')
+        grid = grid.reindex(index=range(len(self.days)), columns=range(len(self.periods)))
+        grid = grid.fillna("No Class")
+        grid.index = self.days
+        grid.columns = self.periods
+        return grid
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_grid_service():
+    """Return the process-wide grid service (created on first use)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TimetableGridService()
+        return _service
+
+
+def invalidate_timetable_cache():
+    """Clear the cached grids after SCHEDULE was modified in this process"""
+    if _service is not None:
+        _service.invalidate()
@@ -0,0 +1,189 @@
+import sqlite3
+
+'''
+    TIMETABLE LAYOUT
+
+    The day x period layout of one printed timetable, shared by the
+    timetable window (timetable_generator.py) and the batch exporter
+    (batch_export.py): the days and periods configured in
+    TIMETABLE_SETTINGS, the cells of a section's or a faculty member's week
+    read from the timetable model, and the spans of consecutive periods of
+    the same lesson that are drawn as one merged cell. Nothing here uses
+    Tk, so the exporter's worker processes can use it too.
+'''
+
+# Default days and period information (fallback if DB settings not available)
+DEFAULT_DAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa"]
+DEFAULT_PERIODS_INFO = {
+    1: "8:00 - 8:45",
+    2: "9:00 - 9:45",
+    3: "10:00 - 10:45",
+    4: "11:00 - 11:45",
+    5: "12:00 - 12:45",
+    6: "13:00 - 13:45",
+}
+
+# Map days from scheduler (0-4) to day codes
+DAY_MAP = {
+    0: "Mo", 1: "Tu", 2: "We", 3: "Th", 4: "Fr", 5: "Sa"
+}
+
+
+def load_timetable_structure(conn):
+    """(days, {period number: time range}) configured in TIMETABLE_SETTINGS, or the defaults"""
+    days = DEFAULT_DAYS.copy()
+    periods_info = DEFAULT_PERIODS_INFO.copy()
+
+    if not conn:
+        print("Warning: No database connection. Using default timetable structure.")
+        return days, periods_info
+
+    try:
+        # First check if TIMETABLE_SETTINGS table exists
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='TIMETABLE_SETTINGS'")
+        if not cursor.fetchone():
+            print("Warning: TIMETABLE_SETTINGS table not found. Using default timetable structure.")
+            return days, periods_info
+
+        # Try to load days configuration
+        cursor.execute("SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'DAYS_ENABLED'")
+        days_row = cursor.fetchone()
+        if days_row and days_row[0]:
+            # Format should be comma-separated day codes like "Mo,Tu,We,Th,Fr"
+            days_enabled = days_row[0].split(',')
+            # Filter the default days list to only include enabled days
+            days = [day for day in DEFAULT_DAYS if day in days_enabled]
+
+        # Try to load periods configuration
+        cursor.execute("SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'PERIODS_CONFIG'")
+        periods_row = cursor.fetchone()
+        if periods_row and periods_row[0]:
+            # Format should be JSON-like: "1:8:00-8:45,2:9:00-9:45,..."
+            try:
+                periods_data = {}
+                for period_conf in periods_row[0].split(','):
+                    if ':' in period_conf:
+                        period_num, time_range = period_conf.split(':', 1)
+                        periods_data[int(period_num)] = time_range
+                if periods_data:  # Only replace if we parsed some valid data
+                    periods_info = periods_data
+            except Exception as e:
+                print(f"Error parsing periods config: {e}. Using default periods.")
+
+        # Alternatively, try to load from NUM_PERIODS setting (simpler approach)
+        cursor.execute("SELECT setting_value FROM TIMETABLE_SETTINGS WHERE setting_name = 'NUM_PERIODS'")
+        num_periods_row = cursor.fetchone()
+        if num_periods_row and num_periods_row[0]:
+            try:
+                num_periods = int(num_periods_row[0])
+                # Only keep the first num_periods from the default
+                periods_info = {k: v for k, v in DEFAULT_PERIODS_INFO.items() if k <= num_periods}
+            except ValueError:
+                print(f"Invalid NUM_PERIODS value: {num_periods_row[0]}. Using default periods.")
+
+        print(f"Loaded timetable structure from database: {len(days)} days, {len(periods_info)} periods")
+        return days, periods_info
+
+    except sqlite3.Error as e:
+        print(f"Database error loading timetable structure: {e}")
+        return days, periods_info
+    except Exception as e:
+        print(f"Unexpected error loading timetable structure: {e}")
+        return days, periods_info
+
+
+def _add_cell(timetable_data, days, periods_info, day_id, period_id, cell):
+    # Convert from numeric day ID to day code; period is 0-indexed in SCHEDULE, 1-indexed in the grid
+    day_code = DAY_MAP.get(day_id, f"Day{day_id}")
+    period_num = period_id + 1
+    # Skip if day or period not in our timetable grid
+    if day_code in days and period_num in periods_info:
+        timetable_data.setdefault(day_code, {})[period_num] = cell
+
+
+def section_timetable(model, section, days, periods_info):
+    """
+    {day code: {period number: {'subject', 'faculty', 'subject_code'}}} of
+    a section's week in the timetable model
+    """
+    timetable_data = {}
+    for (day_id, period_id), (subcode, fini) in sorted(model.section_week(section).items()):
+        # Use subject name from SUBJECTS table if available, otherwise use SUBCODE
+        sub_name = model.subject_name(subcode)
+        _add_cell(timetable_data, days, periods_info, day_id, period_id, {
+            'subject': sub_name if sub_name else subcode if subcode != "NULL" else "Free",
+            'faculty': fini if fini != "NULL" else "-",
+            'subject_code': subcode,
+        })
+    return timetable_data
+
+
+def faculty_timetable(model, fini, days, periods_info):
+    """
+    section_timetable() of a faculty member: the 'faculty' line of a cell
+    holds the section(s) taught instead, and 'subject_code' includes them
+    so only the same lesson of the same sections is merged
+    """
+    timetable_data = {}
+    for (day_id, period_id), classes in sorted(model.faculty_week(fini).items()):
+        subcode = classes[0][1]
+        sections = ", ".join(sorted(section for section, _ in classes))
+        sub_name = model.subject_name(subcode)
+        _add_cell(timetable_data, days, periods_info, day_id, period_id, {
+            'subject': sub_name if sub_name else subcode if subcode != "NULL" else "Free",
+            'faculty': sections,
+            'subject_code': f"{subcode}@{sections}" if subcode != "NULL" else subcode,
+        })
+    return timetable_data
+
+
+def find_spans(day_cells, periods):
+    """
+    Runs of consecutive periods of a day with the same subject code, as
+    lists of period numbers; free periods break runs and are left out
+    """
+    spans = []
+    current_span = []
+    last_subject = None
+
+    for period in sorted(periods):
+        if period in day_cells:
+            current_subject = day_cells[period].get('subject_code')
+
+            # Skip if no subject code (free period)
+            if current_subject in (None, "NULL", ""):
+                if current_span:
+                    spans.append(current_span)
+                    current_span = []
+                last_subject = None
+                continue
+
+            # If same subject as previous period, extend the span
+            if current_subject == last_subject:
+                current_span.append(period)
+            else:
+                # End previous span if exists
+                if current_span:
+                    spans.append(current_span)
+
+                # Start new span
+                current_span = [period]
+                last_subject = current_subject
+        else:
+            # No class this period
+            if current_span:
+                spans.append(current_span)
+                current_span = []
+            last_subject = None
+
+    # Add the last span if it exists
+    if current_span:
+        spans.append(current_span)
+    return spans
+
+
+def cell_text(subject_info, periods):
+    """Text of the cell of a span of periods"""
+    period_range = f"Periods {periods[0]}-{periods[-1]}" if len(periods) > 1 else f"Period {periods[0]}"
+    return f"{subject_info['subject']}\n{subject_info['faculty']}\n{period_range}"
@@ -0,0 +1,379 @@
+import os
+import threading
+import numpy as np
+
+from database import DB_PATH, get_connection
+from change_log import current_version, changes_since, changed_sections
+
+'''
+    TIMETABLE MODEL
+
+    One in-memory copy of the timetable shared by every view of a process.
+    Section, subject and faculty names are interned to small integers and
+    the week is stored in int16 arrays indexed [section, day, period], so a
+    cell, a section's week or a faculty member's slot is read without SQL.
+    The model is loaded with one query over SCHEDULE and SCHEDULED_LESSONS
+    joined with SUBJECTS (sections that have no SCHEDULE rows fall back to
+    SCHEDULED_LESSONS), which also fills the subject name, type and color
+    maps, and views subscribe to be told which cells changed. Windows with
+    a DBWorker reload through refresh_async() so the query runs off the
+    Tk thread. A refresh reads the schedule change log (change_log.py) and
+    re-reads only the sections whose SCHEDULE rows changed; changes to
+    subjects, faculty or SCHEDULED_LESSONS reload everything.
+'''
+
+EMPTY = -1  # array value of a free cell
+
+DAY_CODES = ['Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa']
+
+# PERIODID and DAYID are zero indexed; SCHEDULED_LESSONS uses day codes and 1-based periods
+MODEL_QUERY = """
+    SELECT s.SECTION, s.DAYID, s.PERIODID, s.SUBCODE, s.FINI, sub.SUBNAME, sub.SUBTYPE, sub.COLOR
+    FROM SCHEDULE s
+    LEFT JOIN SUBJECTS sub ON s.SUBCODE = sub.SUBCODE
+    UNION ALL
+    SELECT sl.CLASS_NAME,
+           CASE sl.DAY_OF_WEEK WHEN 'Mo' THEN 0 WHEN 'Tu' THEN 1 WHEN 'We' THEN 2
+                               WHEN 'Th' THEN 3 WHEN 'Fr' THEN 4 WHEN 'Sa' THEN 5 END,
+           sl.PERIOD_NUMBER - 1,
+           COALESCE(sl.SUBJECT_CODE, 'NULL'),
+           COALESCE(f.INI, sl.TEACHER_ID, 'NULL'),
+           sub.SUBNAME, sub.SUBTYPE, sub.COLOR
+    FROM SCHEDULED_LESSONS sl
+    LEFT JOIN FACULTY f ON sl.TEACHER_ID = f.FID
+    LEFT JOIN SUBJECTS sub ON sl.SUBJECT_CODE = sub.SUBCODE
+    WHERE sl.CLASS_NAME NOT IN (SELECT SECTION FROM SCHEDULE)
+"""
+
+
+# Changes to these tables can alter any cell's names or the fallback rows, so they reload everything
+FULL_RELOAD_TABLES = {'SUBJECTS', 'FACULTY', 'SCHEDULED_LESSONS'}
+
+
+def fetch_model_rows(conn):
+    """Rows of MODEL_QUERY; safe to run on a worker thread's connection"""
+    return conn.execute(MODEL_QUERY).fetchall()
+
+
+def fetch_model_update(conn, since):
+    """
+    What changed after change log version since: ('all', rows of
+    MODEL_QUERY, version) or ('sections', (sections, their MODEL_QUERY
+    rows), version). Safe to run on a worker thread's connection.
+    """
+    # Read first: rows read afterwards are at least this new
+    version = current_version(conn)
+    changes = None if since is None else changes_since(conn, since)
+    if changes is None or any(change.table in FULL_RELOAD_TABLES for change in changes):
+        return 'all', fetch_model_rows(conn), version
+    sections = sorted(changed_sections([change for change in changes if change.table == 'SCHEDULE']))
+    rows = []
+    for start in range(0, len(sections), 500):
+        batch = sections[start:start + 500]
+        rows += conn.execute(f"SELECT * FROM ({MODEL_QUERY}) WHERE SECTION IN ({', '.join('?' for _ in batch)})",
+                             batch).fetchall()
+    return 'sections', (sections, rows), version
+
+
+class Interner:
+    """Maps names to consecutive small integers and back"""
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        """Id of name, adding it if new"""
+        name = str(name)
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        return self.ids[name]
+
+    def get(self, name):
+        """Id of name, or EMPTY if unknown"""
+        return self.ids.get(str(name), EMPTY)
+
+
+class TimetableModel:
+    """
+    Shared timetable of every section.
+
+    Views read it with cell(), section_week() and faculty_cell(), and
+    subscribe(callback) to be called with the list of changed
+    (section, day, period) cells, or None when everything was reloaded.
+    Views that write SCHEDULE call set_cell()/clear_cell() afterwards.
+    """
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.conn = get_connection(db_path)  # held so PRAGMA data_version tracks other writers
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._data_version = None
+        self._change_version = None  # change log version the arrays are up to date with
+        self._clear()
+        self.load()
+
+    def _clear(self, num_days=len(DAY_CODES), num_periods=6):
+        self.sections = Interner()
+        self.subjects = Interner()
+        self.faculty = Interner()
+        self.subject_names = {}  # {SUBCODE: SUBNAME}
+        self.subject_types = {}  # {SUBCODE: SUBTYPE}
+        self.subject_colors = {}  # {SUBCODE: COLOR}
+        self._subject = np.full((0, num_days, num_periods), EMPTY, dtype=np.int16)
+        self._teacher = np.full((0, num_days, num_periods), EMPTY, dtype=np.int16)
+        self._load = np.zeros((0, num_days, num_periods), dtype=np.int16)  # [faculty, day, period]: sections taught
+
+    @property
+    def num_days(self):
+        return self._subject.shape[1]
+
+    @property
+    def num_periods(self):
+        return self._subject.shape[2]
+
+    # --- loading -------------------------------------------------------------
+
+    def load(self):
+        """(Re)load the whole timetable and notify subscribers"""
+        version = self._current_version()
+        change_version = current_version(self.conn)
+        self._apply(fetch_model_rows(self.conn), version, change_version)
+
+    def _current_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _apply(self, rows, version, change_version):
+        """Replace the timetable with MODEL_QUERY rows read at data_version/change log version"""
+        with self._lock:
+            rows = [row for row in rows if row[1] is not None and row[2] >= 0]
+            num_days = max([len(DAY_CODES)] + [row[1] + 1 for row in rows])
+            num_periods = max([6] + [row[2] + 1 for row in rows])
+            self._clear(num_days, num_periods)
+            for section in sorted({str(row[0]) for row in rows}):
+                self.sections.intern(section)
+            self._grow_sections()
+            for section, day, period, subcode, fini, subname, subtype, color in rows:
+                self._store(self.sections.get(section), day, period, subcode, fini)
+                if subname is not None:
+                    self._remember_subject(subcode, subname, subtype, color)
+            self._data_version = version
+            self._change_version = change_version
+        self._notify(None)
+
+    def _apply_update(self, update, version):
+        """Apply a fetch_model_update() result read at data_version version"""
+        kind, payload, change_version = update
+        if kind == 'all':
+            self._apply(payload, version, change_version)
+            return
+        sections, rows = payload
+        rows = [row for row in rows if row[1] is not None and row[2] >= 0]
+        with self._lock:
+            if any(row[1] >= self.num_days or row[2] >= self.num_periods for row in rows):
+                fits = False  # The week grew: the arrays have to be rebuilt
+            else:
+                fits = True
+                changes = []
+                for section in sections:
+                    s = self.sections.intern(section)
+                    self._grow_sections()
+                    before = (self._subject[s].copy(), self._teacher[s].copy())
+                    for day in range(self.num_days):
+                        for period in range(self.num_periods):
+                            self._store(s, day, period, None, None)
+                    for _, day, period, subcode, fini, subname, subtype, color in (r for r in rows if str(r[0]) == section):
+                        self._store(s, day, period, subcode, fini)
+                        if subname is not None:
+                            self._remember_subject(subcode, subname, subtype, color)
+                    changed = (before[0] != self._subject[s]) | (before[1] != self._teacher[s])
+                    changes += [(section, int(d), int(p)) for d, p in zip(*np.nonzero(changed))]
+                self._data_version = version
+                self._change_version = change_version
+        if not fits:
+            self.load()
+        elif changes:
+            self._notify(changes)
+
+    def refresh(self):
+        """Apply what other connections committed since the last load; returns True if anything was read"""
+        version = self._current_version()
+        if version == self._data_version:
+            return False
+        self._apply_update(fetch_model_update(self.conn, self._change_version), version)
+        return True
+
+    def refresh_async(self, worker, on_done=None, on_error=None):
+        """
+        refresh() with the query run on a DBWorker; on_done(reloaded) or
+        on_error(exception) is called on the Tk thread. Returns the DBTask,
+        or None if the model was up to date.
+        """
+        # Read before the query, so commits made while it runs are caught by the next refresh
+        version = self._current_version()
+        if version == self._data_version:
+            if on_done:
+                on_done(False)
+            return None
+
+        def apply(update):
+            self._apply_update(update, version)
+            if on_done:
+                on_done(True)
+        return worker.submit(fetch_model_update, self._change_version, on_done=apply, on_error=on_error)
+
+    def _grow_sections(self):
+        missing = len(self.sections) - self._subject.shape[0]
+        if missing > 0:
+            pad = ((0, missing), (0, 0), (0, 0))
+            self._subject = np.pad(self._subject, pad, constant_values=EMPTY)
+            self._teacher = np.pad(self._teacher, pad, constant_values=EMPTY)
+
+    def _remember_subject(self, subcode, subname, subtype, color):
+        self.subject_names[str(subcode)] = subname
+        self.subject_types[str(subcode)] = subtype
+        self.subject_colors[str(subcode)] = color
+
+    def _lookup_subject(self, subcode):
+        """Fetch the details of a subject placed after the last load"""
+        row = self.conn.execute("SELECT SUBNAME, SUBTYPE, COLOR FROM SUBJECTS WHERE SUBCODE = ?",
+                                (str(subcode),)).fetchone()
+        if row:
+            self._remember_subject(subcode, *row)
+
+    def _store(self, s, day, period, subcode, fini):
+        previous = self._teacher[s, day, period]
+        if previous != EMPTY:
+            self._load[previous, day, period] -= 1
+
+        self._subject[s, day, period] = EMPTY if subcode in (None, 'NULL') else self.subjects.intern(subcode)
+        if fini in (None, 'NULL'):
+            self._teacher[s, day, period] = EMPTY
+            return
+        f = self.faculty.intern(fini)
+        if f >= self._load.shape[0]:
+            self._load = np.pad(self._load, ((0, max(f + 1, 2 * self._load.shape[0]) - self._load.shape[0]), (0, 0), (0, 0)))
+        self._teacher[s, day, period] = f
+        self._load[f, day, period] += 1
+
+    # --- changes -------------------------------------------------------------
+
+    def subscribe(self, callback):
+        """Call callback(changes) after every change; changes is [(section, day, period)] or None"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self, changes):
+        for callback in list(self._subscribers):
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Timetable model subscriber error: {e}")
+
+    def set_cell(self, section, day, period, subcode, fini):
+        """Record that SCHEDULE now has (subcode, fini) for section at day/period"""
+        with self._lock:
+            s = self.sections.intern(section)
+            self._grow_sections()
+            if day >= self.num_days or period >= self.num_periods:
+                return
+            self._store(s, day, period, subcode, fini)
+            if subcode not in (None, 'NULL') and str(subcode) not in self.subject_names:
+                self._lookup_subject(subcode)
+        self._notify([(str(section), day, period)])
+
+    def clear_cell(self, section, day, period):
+        """Record that section's cell at day/period was deleted"""
+        self.set_cell(section, day, period, None, None)
+
+    # --- reading -------------------------------------------------------------
+
+    def section_names(self):
+        return list(self.sections.names)
+
+    def faculty_names(self):
+        return list(self.faculty.names)
+
+    def cell(self, section, day, period):
+        """(SUBCODE, FINI) of a section's cell, or None if it is free"""
+        s = self.sections.get(section)
+        if s == EMPTY or day >= self.num_days or period >= self.num_periods:
+            return None
+        subject, teacher = self._subject[s, day, period], self._teacher[s, day, period]
+        if subject == EMPTY and teacher == EMPTY:
+            return None
+        return (self.subjects.names[subject] if subject != EMPTY else 'NULL',
+                self.faculty.names[teacher] if teacher != EMPTY else 'NULL')
+
+    def section_week(self, section):
+        """{(day, period): (SUBCODE, FINI)} of every occupied cell of a section"""
+        s = self.sections.get(section)
+        if s == EMPTY:
+            return {}
+        subject, teacher = self._subject[s], self._teacher[s]
+        days, periods = np.nonzero((subject != EMPTY) | (teacher != EMPTY))
+        subject_names, faculty_names = self.subjects.names, self.faculty.names
+        return {
+            (d, p): (subject_names[sub] if sub != EMPTY else 'NULL', faculty_names[fac] if fac != EMPTY else 'NULL')
+            for d, p, sub, fac in zip(days.tolist(), periods.tolist(),
+                                      subject[days, periods].tolist(), teacher[days, periods].tolist())
+        }
+
+    def faculty_busy(self, fini, day, period):
+        """Number of sections fini teaches at day/period"""
+        f = self.faculty.get(fini)
+        if f == EMPTY or day >= self.num_days or period >= self.num_periods:
+            return 0
+        return int(self._load[f, day, period])
+
+    def faculty_cell(self, fini, day, period):
+        """[(SECTION, SUBCODE)] that fini teaches at day/period"""
+        if not self.faculty_busy(fini, day, period):
+            return []
+        f = self.faculty.get(fini)
+        return [(self.sections.names[s],
+                 self.subjects.names[self._subject[s, day, period]] if self._subject[s, day, period] != EMPTY else 'NULL')
+                for s in np.flatnonzero(self._teacher[:, day, period] == f)]
+
+    def faculty_week(self, fini):
+        """{(day, period): [(SECTION, SUBCODE)]} of every slot fini teaches"""
+        f = self.faculty.get(fini)
+        if f == EMPTY:
+            return {}
+        week = {}
+        for s, d, p in zip(*np.nonzero(self._teacher == f)):
+            subject = self._subject[s, d, p]
+            week.setdefault((int(d), int(p)), []).append(
+                (self.sections.names[s], self.subjects.names[subject] if subject != EMPTY else 'NULL'))
+        return week
+
+    def subject_name(self, subcode):
+        return self.subject_names.get(str(subcode))
+
+    def subject_type(self, subcode):
+        return self.subject_types.get(str(subcode))
+
+    def subject_color(self, subcode):
+        return self.subject_colors.get(str(subcode))
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_timetable_model(db_path=None):
+    """Return the process-wide TimetableModel of db_path (loaded on first use)"""
+    key = os.path.abspath(db_path) if db_path else DB_PATH
+    with _models_lock:
+        if key not in _models:
+            _models[key] = TimetableModel(key)
+        return _models[key]
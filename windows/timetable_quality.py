@@ -0,0 +1,232 @@
+import numpy as np
+
+from conflict_engine import RECESS_AFTER
+
+'''
+    TIMETABLE QUALITY
+
+    Soft-constraint scoring of a timetable that is already free of hard
+    conflicts. SCHEDULE is turned into two integer arrays of shape
+    (days, periods, sections), one holding subject numbers and one faculty
+    numbers (-1 = free period), and every penalty is computed with numpy
+    operations over the whole array (at most a loop over the periods of a
+    day, and bincounts over the cells for the per-faculty counts):
+        * gaps        free periods between a section's first and last class of a day
+        * uneven load squared deviation of a faculty member's daily periods from their mean
+        * repeats     the same subject taught in two separate blocks on one day
+        * recess      a faculty member teaching both periods around the recess
+    The arrays may carry extra leading axes, so a generator can score a
+    whole stack of candidate timetables with one call.
+'''
+
+# Penalty per occurrence of each soft constraint
+WEIGHTS = {
+    'gaps': 3,
+    'uneven_load': 1,
+    'repeats': 5,
+    'recess': 10,
+}
+
+FREE = -1  # array value of a period with no class
+NOT_STARTED = -2  # repeated_subjects(): no block starts at this period
+
+
+class TimetableArrays:
+    """
+    SCHEDULE as subject and faculty arrays of shape (days, periods, sections).
+
+    sections, subjects and faculty list the names behind the array numbers.
+    """
+    def __init__(self, num_days, num_periods, sections, subjects, faculty):
+        self.sections = list(sections)
+        self.subjects = list(subjects)
+        self.faculty = list(faculty)
+        shape = (num_days, num_periods, len(self.sections))
+        self.subject = np.full(shape, FREE, dtype=np.int32)
+        self.teacher = np.full(shape, FREE, dtype=np.int32)
+
+    @classmethod
+    def from_rows(cls, rows, num_days, num_periods):
+        """Build from (DAYID, PERIODID, SUBCODE, SECTION, FINI) rows; 'NULL' values are free"""
+        rows = [(day, period, str(subcode), str(section), str(fini))
+                for day, period, subcode, section, fini in rows
+                if 0 <= day < num_days and 0 <= period < num_periods]
+        sections = sorted({r[3] for r in rows})
+        subjects = sorted({r[2] for r in rows if r[2] != 'NULL'})
+        faculty = sorted({r[4] for r in rows if r[4] != 'NULL'})
+        arrays = cls(num_days, num_periods, sections, subjects, faculty)
+
+        section_no = {name: i for i, name in enumerate(sections)}
+        subject_no = {name: i for i, name in enumerate(subjects)}
+        faculty_no = {name: i for i, name in enumerate(faculty)}
+        for day, period, subcode, section, fini in rows:
+            s = section_no[section]
+            arrays.subject[day, period, s] = subject_no.get(subcode, FREE)
+            arrays.teacher[day, period, s] = faculty_no.get(fini, FREE)
+        return arrays
+
+    @classmethod
+    def from_connection(cls, conn, num_days=None, num_periods=None):
+        """Build from the SCHEDULE table; dimensions default to the timetable settings"""
+        if num_days is None or num_periods is None:
+            from timetable_solver import load_timetable_dimensions
+            days, periods = load_timetable_dimensions(conn)
+            num_days = num_days if num_days is not None else days
+            num_periods = num_periods if num_periods is not None else periods
+        rows = conn.execute("SELECT DAYID, PERIODID, SUBCODE, SECTION, FINI FROM SCHEDULE").fetchall()
+        return cls.from_rows(rows, num_days, num_periods)
+
+
+def _by_period(array):
+    """The period axis of (..., days, periods, sections) moved to the front, for contiguous per-period slices"""
+    return np.ascontiguousarray(np.moveaxis(array, -2, 0))
+
+
+def section_gaps(subject):
+    """Free periods between the first and last class, per (..., day, section)"""
+    # One pass over the periods: free periods since the last class are
+    # counted as gaps once another class follows
+    busy = _by_period(subject != FREE)
+    seen = busy[0].copy()
+    free_run = np.zeros(seen.shape, dtype=np.int16)
+    gaps = np.zeros(seen.shape, dtype=np.int16)
+    for taught in busy[1:]:
+        gaps += free_run * taught
+        free_run = (free_run + seen) * ~taught
+        seen |= taught
+    return gaps
+
+
+def repeated_subjects(subject):
+    """Blocks of a subject beyond the first on the same day, per (..., day, section)"""
+    # A block starts where a subject differs from the period before it, and
+    # repeats if the same subject started a block earlier that day. A day has
+    # only a handful of periods, so they are compared pairwise.
+    periods = _by_period(subject)
+    repeats = np.zeros(periods.shape[1:], dtype=np.int16)
+    earlier_starts = []  # subject of each earlier period where a block starts, NOT_STARTED elsewhere
+    previous = None
+    for current in periods:
+        starts = current != FREE
+        if previous is not None:
+            starts &= current != previous
+        if earlier_starts:
+            repeated = earlier_starts[0] == current
+            for started in earlier_starts[1:]:
+                repeated |= started == current
+            repeats += starts & repeated
+        earlier_starts.append(np.where(starts, current, NOT_STARTED))
+        previous = current
+    return repeats
+
+
+def _faculty_keys(teacher, num_faculty):
+    """
+    Bin of every cell of teacher for counting per (..., faculty, day), and
+    the number of bins. Faculty numbers are shifted by one so free cells
+    fall in bins of their own.
+    """
+    *lead, days, periods, sections = teacher.shape
+    lead_size = int(np.prod(lead)) if lead else 1
+    bins = (num_faculty + 1) * days
+    dtype = np.int32 if lead_size * bins < 2 ** 31 else np.int64
+    base = (np.arange(lead_size, dtype=dtype).reshape(lead_size, 1, 1, 1) * bins
+            + np.arange(days, dtype=dtype).reshape(1, days, 1, 1))
+    keys = base + (teacher.reshape(lead_size, days, periods, sections).astype(dtype) + 1) * days
+    return keys.ravel(), lead_size * bins
+
+
+def _per_faculty(counts, teacher, num_faculty):
+    """Counts over _faculty_keys() bins as (..., faculty, day), free bins dropped"""
+    *lead, days, _, _ = teacher.shape
+    return counts.reshape(-1, num_faculty + 1, days)[:, 1:, :].reshape(*lead, num_faculty, days)
+
+
+def faculty_load(teacher, num_faculty):
+    """
+    Periods taught per (..., faculty, day), counted with one bincount over
+    the cells. A faculty member booked in two sections at once counts both;
+    scored timetables have no such clashes.
+    """
+    num_faculty = max(num_faculty, 1)
+    keys, bins = _faculty_keys(teacher, num_faculty)
+    return _per_faculty(np.bincount(keys, minlength=bins), teacher, num_faculty)
+
+
+def faculty_unevenness(load):
+    """Squared deviation of daily periods from the weekly mean, per (..., faculty)"""
+    mean = load.mean(axis=-1, keepdims=True)
+    return ((load - mean) ** 2).sum(axis=-1)
+
+
+def recess_violations(teacher, num_faculty, recess_after=RECESS_AFTER):
+    """Days a faculty member teaches both periods around the recess, per (..., faculty)"""
+    num_faculty = max(num_faculty, 1)
+    if not 0 < recess_after < teacher.shape[-2]:
+        return np.zeros(teacher.shape[:-3] + (num_faculty,), dtype=np.int64)
+    # Mark the (faculty, day) bins taught before the recess, then those of them also taught after it
+    before_keys, bins = _faculty_keys(teacher[..., recess_after - 1:recess_after, :], num_faculty)
+    after_keys, _ = _faculty_keys(teacher[..., recess_after:recess_after + 1, :], num_faculty)
+    before = np.zeros(bins, dtype=bool)
+    before[before_keys] = True
+    both = np.zeros(bins, dtype=bool)
+    both[after_keys[before[after_keys]]] = True
+    return _per_faculty(both, teacher, num_faculty).sum(axis=-1)
+
+
+def penalty(subject, teacher, num_subjects, num_faculty, weights=None, recess_after=RECESS_AFTER):
+    """
+    Weighted soft-constraint penalty of one timetable, or of a stack of them.
+
+    subject and teacher have shape (..., days, periods, sections); the result
+    has the shape of the leading axes (a float for a single timetable).
+    num_subjects is the number of subject numbers in use; the subject terms
+    are computed without it.
+    """
+    weights = weights if weights else WEIGHTS
+    total = (weights['gaps'] * section_gaps(subject).sum(axis=(-2, -1))
+             + weights['repeats'] * repeated_subjects(subject).sum(axis=(-2, -1))
+             + weights['uneven_load'] * faculty_unevenness(faculty_load(teacher, num_faculty)).sum(axis=-1)
+             + weights['recess'] * recess_violations(teacher, num_faculty, recess_after).sum(axis=-1))
+    return float(total) if np.ndim(total) == 0 else total
+
+
+def score_arrays(arrays, weights=None, recess_after=RECESS_AFTER):
+    """Weighted penalty of a TimetableArrays"""
+    return penalty(arrays.subject, arrays.teacher, len(arrays.subjects), len(arrays.faculty),
+                   weights, recess_after)
+
+
+def quality_report(arrays, weights=None, recess_after=RECESS_AFTER):
+    """
+    Per-section and per-faculty quality of a timetable.
+
+    Returns (sections, faculty, total): sections is a list of dicts with
+    SECTION, gaps, repeats and penalty; faculty a list of dicts with FINI,
+    periods, daily (periods per day), unevenness, recess and penalty.
+    """
+    weights = weights if weights else WEIGHTS
+    gaps = section_gaps(arrays.subject).sum(axis=0)
+    repeats = repeated_subjects(arrays.subject).sum(axis=0)
+    daily = faculty_load(arrays.teacher, len(arrays.faculty))
+    unevenness = faculty_unevenness(daily)
+    recess = recess_violations(arrays.teacher, len(arrays.faculty), recess_after)
+
+    sections = [{
+        'section': name,
+        'gaps': int(gaps[i]),
+        'repeats': int(repeats[i]),
+        'penalty': float(weights['gaps'] * gaps[i] + weights['repeats'] * repeats[i]),
+    } for i, name in enumerate(arrays.sections)]
+
+    faculty = [{
+        'faculty': name,
+        'periods': int(daily[i].sum()),
+        'daily': [int(n) for n in daily[i]],
+        'unevenness': float(unevenness[i]),
+        'recess': int(recess[i]),
+        'penalty': float(weights['uneven_load'] * unevenness[i] + weights['recess'] * recess[i]),
+    } for i, name in enumerate(arrays.faculty)]
+
+    total = sum(s['penalty'] for s in sections) + sum(f['penalty'] for f in faculty)
+    return sections, faculty, total
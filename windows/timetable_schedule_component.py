@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 import os
+from database import get_connection, release_connection
+from timetable_model import get_timetable_model
 
 class TimetableScheduleComponent(ttk.Frame):
     def __init__(self, parent, class_name_filter="CSE", *args, **kwargs):
@@ -11,6 +13,8 @@ class TimetableScheduleComponent(ttk.Frame):
         # Database connection
         self.db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'files', 'timetable.db')
         self.conn = self._connect_db()
+        self.model = get_timetable_model(self.db_path)
+        self.model.subscribe(self._on_model_change)
         
         # Default timetable settings
         self.days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
@@ -24,20 +28,10 @@ class TimetableScheduleComponent(ttk.Frame):
         self._load_timetable_data()
 
     def _connect_db(self):
-        """Connect to the database and create tables if they don't exist"""
+        """Connect to the database and bring its schema up to date"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Create tables if they don't exist
-            conn.execute('''CREATE TABLE IF NOT EXISTS SCHEDULE
-                (ID CHAR(10) NOT NULL PRIMARY KEY,
-                DAYID INT NOT NULL,
-                PERIODID INT NOT NULL,
-                SUBCODE CHAR(10) NOT NULL,
-                SECTION CHAR(5) NOT NULL,
-                FINI CHAR(10) NOT NULL)''')
-            
-            return conn
+            # The pool creates/upgrades tables on its first connection
+            return get_connection(self.db_path)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to connect to database: {e}")
             return None
@@ -204,8 +198,8 @@ class TimetableScheduleComponent(ttk.Frame):
             
             self.conn.commit()
             
-            # Update UI
-            self._load_timetable_data()
+            # Update UI through _on_model_change
+            self.model.set_cell(self.class_name_filter, day_idx, period_idx, subject_code, faculty_ini)
             dialog.destroy()
             
         except sqlite3.Error as e:
@@ -218,8 +212,8 @@ class TimetableScheduleComponent(ttk.Frame):
             self.conn.execute("DELETE FROM SCHEDULE WHERE ID=?", (schedule_id,))
             self.conn.commit()
             
-            # Update UI
-            self._load_timetable_data()
+            # Update UI through _on_model_change
+            self.model.clear_cell(self.class_name_filter, day_idx, period_idx)
             dialog.destroy()
             
         except sqlite3.Error as e:
@@ -250,8 +244,7 @@ class TimetableScheduleComponent(ttk.Frame):
     def _get_available_sections(self):
         """Get list of available sections from the database"""
         try:
-            cursor = self.conn.execute("SELECT DISTINCT SECTION FROM SCHEDULE ORDER BY SECTION")
-            sections = [row[0] for row in cursor]
+            sections = self.model.section_names()
             
             if not sections:
                 # Try getting from STUDENT table as fallback
@@ -268,25 +261,26 @@ class TimetableScheduleComponent(ttk.Frame):
         self.class_name_filter = self.section_var.get()
         self._load_timetable_data()
 
-    def _load_timetable_data(self):
-        """Load and display timetable data from database"""
+    def _on_model_change(self, changes):
+        """Redraw when a cell of the shown section changes"""
+        if changes is None or any(changed[0] == self.class_name_filter for changed in changes):
+            self._load_timetable_data(refresh=False)
+
+    def _load_timetable_data(self, refresh=True):
+        """Display the section's timetable from the shared timetable model"""
         try:
+            # A reload caused by other windows' edits redraws through _on_model_change
+            if refresh and self.model.refresh():
+                return
+
             # Clear all cells first
             for cell_frame in self.cells.values():
                 for widget in cell_frame.winfo_children():
                     widget.config(text="")
                 cell_frame.winfo_children()[0].config(text="No Class")
             
-            # Load data from database
-            cursor = self.conn.execute("""
-                SELECT s.DAYID, s.PERIODID, s.SUBCODE, s.FINI, sub.SUBNAME
-                FROM SCHEDULE s
-                LEFT JOIN SUBJECTS sub ON s.SUBCODE = sub.SUBCODE
-                WHERE s.SECTION = ?
-            """, (self.class_name_filter,))
-            
-            for row in cursor:
-                day_idx, period_idx, subcode, faculty_ini, subname = row
+            for (day_idx, period_idx), (subcode, faculty_ini) in self.model.section_week(self.class_name_filter).items():
+                subname = self.model.subject_name(subcode)
                 if (day_idx, period_idx) in self.cells:
                     cell_frame = self.cells[(day_idx, period_idx)]
                     cell_frame.winfo_children()[0].config(text=subname or subcode)  # Subject
@@ -297,8 +291,9 @@ class TimetableScheduleComponent(ttk.Frame):
 
     def destroy(self):
         """Clean up resources"""
+        self.model.unsubscribe(self._on_model_change)
         if self.conn:
-            self.conn.close()
+            release_connection(self.conn, self.db_path)
         super().destroy()
 
 if __name__ == '__main__':
@@ -0,0 +1,773 @@
+import os
+import random
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+
+from conflict_engine import LESSON_PERIODS, MAX_DAILY_PERIODS, RECESS_AFTER
+from timetable_quality import FREE, TimetableArrays, score_arrays, penalty
+
+'''
+    AUTOMATIC TIMETABLE GENERATOR
+
+    Turns the LESSONS table into SCHEDULE rows. Every LESSONS row becomes
+    one or more blocks of consecutive periods (a Double lesson with four
+    lessons per week is two Double blocks; a fifth lesson could not be a
+    full Double and is reported instead of placed), and each block
+    gets a day and a start period such that:
+        * a section has at most one class per period
+        * a faculty member teaches at most one section per period, at most
+          MAX_DAILY_PERIODS periods per day, and never both periods around
+          the recess (so blocks never span the recess either)
+        * subjects listed in SUBJECT_CLASSROOMS get one of their rooms
+    Rows already in SCHEDULE for sections that have no LESSONS are kept and
+    their faculty are treated as busy.
+
+    The search is MRV backtracking with forward checking. If it runs out of
+    its node budget, min-conflicts local search repairs the partial
+    timetable: each unplaced block goes where it displaces the fewest
+    (weighted) blocks, counted from the bitsets, with a tabu list against
+    cycling and restarts from the best timetable when progress stalls. A final improvement pass then moves each block to the
+    free slot with the lowest soft-constraint penalty (timetable_quality),
+    scoring all of a block's candidate slots as one stack of timetables.
+'''
+
+DEFAULT_NUM_DAYS = 5
+DEFAULT_NUM_PERIODS = 6
+
+
+class Block:
+    """One lesson occurrence: `length` consecutive periods of a LESSONS row"""
+    __slots__ = ('index', 'lesson_id', 'section', 'faculty', 'subject', 'length', 'rooms')
+
+    def __init__(self, index, lesson_id, section, faculty, subject, length, rooms):
+        self.index = index
+        self.lesson_id = lesson_id
+        self.section = section
+        self.faculty = faculty
+        self.subject = subject
+        self.length = length
+        self.rooms = rooms
+
+
+class TimetableProblem:
+    """Everything the solver needs, loaded from the database in a few queries"""
+    def __init__(self, num_days, num_periods, blocks, fixed_rows=(), skipped=(),
+                 max_daily_periods=MAX_DAILY_PERIODS, recess_after=RECESS_AFTER):
+        self.num_days = num_days
+        self.num_periods = num_periods
+        self.blocks = list(blocks)
+        self.fixed_rows = list(fixed_rows)  # [(DAYID, PERIODID, FINI)] kept from SCHEDULE
+        self.skipped = list(skipped)        # [message] LESSONS rows that cannot be scheduled
+        self.max_daily_periods = max_daily_periods
+        self.recess_after = recess_after
+
+    @property
+    def sections(self):
+        return sorted({block.section for block in self.blocks})
+
+
+class TimetableSolution:
+    """Result of a solver run"""
+    def __init__(self, problem, placements, unplaced, nodes, seconds):
+        self.problem = problem
+        self.placements = placements  # {block index: (day, start, room)}
+        self.unplaced = unplaced      # [Block] that could not be placed
+        self.nodes = nodes
+        self.seconds = seconds
+
+    @property
+    def complete(self):
+        return not self.unplaced
+
+    @property
+    def score(self):
+        """Lower is better: unplaced periods dominate, then the soft-constraint penalty"""
+        return placement_score(self.problem, self.placements)
+
+    def schedule_rows(self):
+        """SCHEDULE rows (ID, DAYID, PERIODID, SUBCODE, SECTION, FINI) of the placed blocks"""
+        rows = []
+        num_periods = self.problem.num_periods
+        for block in self.problem.blocks:
+            if block.index not in self.placements:
+                continue
+            day, start, _ = self.placements[block.index]
+            for period in range(start, start + block.length):
+                entry_id = f"{block.section}{day * num_periods + period}"
+                rows.append((entry_id, day, period, block.subject, block.section, block.faculty))
+        return rows
+
+    def summary(self):
+        placed_periods = sum(self.problem.blocks[i].length for i in self.placements)
+        lines = [f"Placed {len(self.placements)} of {len(self.problem.blocks)} lessons "
+                 f"({placed_periods} periods) for {len(self.problem.sections)} classes "
+                 f"in {self.seconds:.1f}s"]
+        if self.placements:
+            lines.append(f"Soft-constraint penalty: {self.score % UNPLACED_WEIGHT:g}")
+        for block in self.unplaced:
+            lines.append(f"Could not place {block.subject} ({block.length} period(s)) "
+                         f"for {block.section} with {block.faculty}")
+        lines.extend(self.problem.skipped)
+        return "\n".join(lines)
+
+
+def load_timetable_dimensions(conn):
+    """Return (num_days, num_periods) from TIMETABLE_SETTINGS, then SCHOOL_CONFIG"""
+    settings = dict(conn.execute("SELECT setting_name, setting_value FROM TIMETABLE_SETTINGS"))
+    config = conn.execute("SELECT num_days, periods_per_day FROM SCHOOL_CONFIG WHERE config_id=1").fetchone()
+
+    num_days, num_periods = DEFAULT_NUM_DAYS, DEFAULT_NUM_PERIODS
+    if settings.get('DAYS_ENABLED'):
+        num_days = len([d for d in settings['DAYS_ENABLED'].split(',') if d])
+    elif settings.get('NUM_DAYS'):
+        num_days = int(settings['NUM_DAYS'])
+    elif config and config[0]:
+        num_days = int(config[0])
+
+    if settings.get('NUM_PERIODS'):
+        num_periods = int(settings['NUM_PERIODS'])
+    elif config and config[1]:
+        num_periods = int(config[1])
+    return num_days, num_periods
+
+
+def load_problem(conn, max_daily_periods=MAX_DAILY_PERIODS, recess_after=RECESS_AFTER):
+    """Build a TimetableProblem from LESSONS, FACULTY, SUBJECT_CLASSROOMS and TIMETABLE_SETTINGS"""
+    num_days, num_periods = load_timetable_dimensions(conn)
+
+    # LESSONS.TEACHER_ID holds the FID, SCHEDULE.FINI the initials
+    fid_to_ini = dict(conn.execute("SELECT FID, INI FROM FACULTY"))
+    known_inis = set(fid_to_ini.values())
+
+    rooms_of = {}
+    for subcode, room in conn.execute("SELECT SUBCODE, CLASSROOM_NAME FROM SUBJECT_CLASSROOMS ORDER BY ID"):
+        rooms_of.setdefault(subcode, []).append(room)
+
+    blocks, skipped = [], []
+    for lesson_id, teacher, subcode, section, per_week, lesson_type in conn.execute(
+            "SELECT ID, TEACHER_ID, SUBJECT_CODE, CLASS_NAME, LESSONS_PER_WEEK, LESSON_TYPE FROM LESSONS ORDER BY ID"):
+        faculty = fid_to_ini.get(teacher, teacher if teacher in known_inis else None)
+        if faculty is None:
+            skipped.append(f"Skipped lesson {lesson_id}: teacher '{teacher}' is not in FACULTY")
+            continue
+        if not per_week or per_week <= 0:
+            continue
+
+        # Every period of a Double/Triple/... lesson must be part of a full span (as
+        # conflict_engine checks), so only whole blocks are placed
+        span = LESSON_PERIODS.get(lesson_type, 1)
+        if span > num_periods:
+            skipped.append(f"Skipped lesson {lesson_id}: a {lesson_type} lesson does not fit "
+                           f"in {num_periods} periods a day")
+            continue
+        full_blocks, remainder = divmod(per_week, span)
+        if remainder:
+            skipped.append(f"Lesson {lesson_id} ({subcode} for {section}): {remainder} of {per_week} "
+                           f"lessons per week left out, a {lesson_type} lesson needs blocks of {span}")
+        for _ in range(full_blocks):
+            blocks.append(Block(len(blocks), lesson_id, section, faculty, subcode, span,
+                                tuple(rooms_of.get(subcode, ()))))
+
+    # Keep hand-made rows of sections the generator does not own
+    generated = {block.section for block in blocks}
+    fixed_rows = [
+        (day, period, fini)
+        for day, period, section, fini in conn.execute("SELECT DAYID, PERIODID, SECTION, FINI FROM SCHEDULE")
+        if section not in generated and fini != 'NULL'
+    ]
+    return TimetableProblem(num_days, num_periods, blocks, fixed_rows, skipped,
+                            max_daily_periods, recess_after)
+
+
+# Weight of one unplaced period against one point of soft-constraint penalty
+UNPLACED_WEIGHT = 1000000
+
+
+def placement_score(problem, placements):
+    """Score of a set of placements: unplaced periods, then timetable_quality's penalty"""
+    unplaced = sum(b.length for b in problem.blocks if b.index not in placements)
+    solution = TimetableSolution(problem, placements, (), 0, 0)
+    rows = [row[1:] for row in solution.schedule_rows()]
+    arrays = TimetableArrays.from_rows(rows, problem.num_days, problem.num_periods)
+    return unplaced * UNPLACED_WEIGHT + score_arrays(arrays, recess_after=problem.recess_after)
+
+
+IMPROVE_PASSES = 2     # sweeps of the soft-constraint improvement over every placed block
+TABU_TENURE = 10       # repair steps a displaced block may not return to its slot
+STALL_STEPS = 2000     # repair steps without progress before restarting from the best timetable
+SHAKE_FRACTION = 0.2   # share of the unplaced blocks' neighbours unplaced on a restart
+MAX_RESTARTS = 5       # restarts in a row without progress before repair gives up
+
+
+class TimetableSolver:
+    """
+    MRV backtracking with forward checking, falling back to tabu
+    min-conflicts repair when the node budget runs out.
+    """
+    def __init__(self, problem, seed=None, node_limit=None, repair_steps=200000, time_limit=None,
+                 improve_passes=IMPROVE_PASSES):
+        self.problem = problem
+        self.rng = random.Random(seed)
+        # Deep backtracking rarely pays off; hand over to repair early
+        self.node_limit = node_limit if node_limit else max(1000, len(problem.blocks))
+        self.repair_steps = repair_steps
+        self.improve_passes = improve_passes
+        self.time_limit = time_limit
+        self.nodes = 0
+
+        p = problem
+        self._blocks = p.blocks
+        recess = p.recess_after
+        # Starts at which a block fits in the day without spanning the recess
+        self._starts = {}
+        for length in {b.length for b in p.blocks}:
+            self._starts[length] = [
+                s for s in range(p.num_periods - length + 1)
+                if not (0 < recess < p.num_periods and s < recess < s + length)
+            ]
+        self._recess_mask = (1 << (recess - 1)) | (1 << recess) if 0 < recess < p.num_periods else 0
+
+        # Blocks whose placement can rule out each other's values
+        by_section, by_faculty, by_room = {}, {}, {}
+        for b in p.blocks:
+            by_section.setdefault(b.section, []).append(b.index)
+            by_faculty.setdefault(b.faculty, []).append(b.index)
+            for room in b.rooms:
+                by_room.setdefault(room, []).append(b.index)
+        self._neighbors = []
+        for b in p.blocks:
+            related = set(by_section[b.section]) | set(by_faculty[b.faculty])
+            for room in b.rooms:
+                related.update(by_room[room])
+            related.discard(b.index)
+            self._neighbors.append(tuple(related))
+
+        self._reset_state()
+
+    def _reset_state(self):
+        p = self.problem
+        self._section_mask = {}   # {(SECTION, day): bitset}
+        self._faculty_mask = {}   # {(FINI, day): bitset}
+        self._faculty_load = {}   # {(FINI, day): periods}
+        self._room_mask = {}      # {(room, day): bitset}
+        self._lesson_days = {}    # {(lesson_id, day): blocks placed}
+        self._placed = {}         # {block index: (day, start, room)}
+        self._section_blocks = {} # {(SECTION, day): {block index}}
+        self._faculty_blocks = {} # {(FINI, day): {block index}}
+        self._room_blocks = {}    # {(room, day): {block index}}
+        self._fixed_mask = {}     # {(FINI, day): bitset} of rows kept from SCHEDULE
+        self._fixed_load = {}     # {(FINI, day): periods} of rows kept from SCHEDULE
+        for day, period, fini in p.fixed_rows:
+            if day < p.num_days:
+                key = (fini, day)
+                self._fixed_mask[key] = self._fixed_mask.get(key, 0) | (1 << period)
+                self._fixed_load[key] = self._fixed_load.get(key, 0) + 1
+                self._faculty_mask[key] = self._faculty_mask.get(key, 0) | (1 << period)
+                self._faculty_load[key] = self._faculty_load.get(key, 0) + 1
+
+        self._domains = [
+            {(day, start) for day in range(p.num_days) for start in self._starts[b.length]
+             if self._fits(b, day, start) is not False}
+            for b in self._blocks
+        ]
+        self._trail = []  # [(block index, value)] removed from domains
+
+    # --- constraint checks -------------------------------------------------
+
+    def _fits(self, block, day, start):
+        """Room to use if block can start at (day, start) now, '' when no room is needed, else False"""
+        mask = ((1 << block.length) - 1) << start
+        if self._section_mask.get((block.section, day), 0) & mask:
+            return False
+        fkey = (block.faculty, day)
+        faculty_mask = self._faculty_mask.get(fkey, 0)
+        if faculty_mask & mask:
+            return False
+        if self._faculty_load.get(fkey, 0) + block.length > self.problem.max_daily_periods:
+            return False
+        if self._recess_mask and (faculty_mask | mask) & self._recess_mask == self._recess_mask:
+            return False
+        if not block.rooms:
+            return ''
+        for room in block.rooms:
+            if not self._room_mask.get((room, day), 0) & mask:
+                return room
+        return False
+
+    def _place(self, block, day, start, room):
+        mask = ((1 << block.length) - 1) << start
+        skey, fkey = (block.section, day), (block.faculty, day)
+        self._section_mask[skey] = self._section_mask.get(skey, 0) | mask
+        self._faculty_mask[fkey] = self._faculty_mask.get(fkey, 0) | mask
+        self._faculty_load[fkey] = self._faculty_load.get(fkey, 0) + block.length
+        if room:
+            self._room_mask[(room, day)] = self._room_mask.get((room, day), 0) | mask
+        lkey = (block.lesson_id, day)
+        self._lesson_days[lkey] = self._lesson_days.get(lkey, 0) + 1
+        self._placed[block.index] = (day, start, room)
+        self._section_blocks.setdefault(skey, set()).add(block.index)
+        self._faculty_blocks.setdefault(fkey, set()).add(block.index)
+        if room:
+            self._room_blocks.setdefault((room, day), set()).add(block.index)
+
+    def _unplace(self, block):
+        day, start, room = self._placed.pop(block.index)
+        mask = ((1 << block.length) - 1) << start
+        self._section_mask[(block.section, day)] &= ~mask
+        self._faculty_mask[(block.faculty, day)] &= ~mask
+        self._faculty_load[(block.faculty, day)] -= block.length
+        if room:
+            self._room_mask[(room, day)] &= ~mask
+            self._room_blocks[(room, day)].discard(block.index)
+        self._lesson_days[(block.lesson_id, day)] -= 1
+        self._section_blocks[(block.section, day)].discard(block.index)
+        self._faculty_blocks[(block.faculty, day)].discard(block.index)
+
+    # --- backtracking ------------------------------------------------------
+
+    def _select_unassigned(self):
+        """Minimum remaining values; longer blocks and busier faculty first on ties"""
+        best, best_key = None, None
+        for b in self._blocks:
+            if b.index in self._placed:
+                continue
+            key = (len(self._domains[b.index]), -b.length, -len(self._neighbors[b.index]))
+            if best_key is None or key < best_key:
+                best, best_key = b, key
+                if key[0] == 0:
+                    break
+        return best
+
+    def _ordered_values(self, block):
+        """Spread a lesson over different days, otherwise random order"""
+        values = list(self._domains[block.index])
+        self.rng.shuffle(values)
+        values.sort(key=lambda v: self._lesson_days.get((block.lesson_id, v[0]), 0))
+        return values
+
+    def _forward_check(self, block, day):
+        """Prune neighbours' values on `day` that no longer fit; False if a domain empties"""
+        for n in self._neighbors[block.index]:
+            if n in self._placed:
+                continue
+            neighbor = self._blocks[n]
+            domain = self._domains[n]
+            for value in [v for v in domain if v[0] == day]:
+                if self._fits(neighbor, day, value[1]) is False:
+                    domain.discard(value)
+                    self._trail.append((n, value))
+            if not domain:
+                return False
+        return True
+
+    def _undo(self, mark):
+        while len(self._trail) > mark:
+            n, value = self._trail.pop()
+            self._domains[n].add(value)
+
+    def _out_of_time(self, deadline):
+        return deadline is not None and time.monotonic() > deadline
+
+    def _search(self, deadline):
+        """Iterative DFS; True when complete, False when infeasible, None when out of budget"""
+        frames = []  # [block, values, next value, trail mark or None]
+        while True:
+            block = self._select_unassigned()
+            if block is None:
+                return True
+            frames.append([block, self._ordered_values(block), 0, None])
+            while True:
+                if not frames:
+                    return False
+                frame = frames[-1]
+                if frame[3] is not None:
+                    self._unplace(frame[0])
+                    self._undo(frame[3])
+                    frame[3] = None
+                if frame[2] >= len(frame[1]):
+                    frames.pop()
+                    continue
+                if self.nodes >= self.node_limit or self._out_of_time(deadline):
+                    return None
+                day, start = frame[1][frame[2]]
+                frame[2] += 1
+                self.nodes += 1
+                room = self._fits(frame[0], day, start)
+                if room is False:
+                    continue
+                frame[3] = len(self._trail)
+                self._place(frame[0], day, start, room)
+                if self._forward_check(frame[0], day):
+                    break
+
+    # --- min-conflicts repair ----------------------------------------------
+
+    def _overlapping(self, key_index, key, mask):
+        """Placed blocks in key_index[key] whose periods overlap mask"""
+        return [
+            i for i in key_index.get(key, ())
+            if mask & (((1 << self._blocks[i].length) - 1) << self._placed[i][1])
+        ]
+
+    def _conflicts(self, block, day, start):
+        """
+        (blocks in the way, room, {block index: room to move it to}) to start
+        block at (day, start) during repair, or None if rows kept from
+        SCHEDULE rule it out. Worked out from the bitsets; nothing is moved.
+        """
+        mask = ((1 << block.length) - 1) << start
+        fkey = (block.faculty, day)
+        fixed_mask = self._fixed_mask.get(fkey, 0)
+        if fixed_mask & mask or self._fixed_load.get(fkey, 0) + block.length > self.problem.max_daily_periods:
+            return None
+        if self._recess_mask and (fixed_mask | mask) & self._recess_mask == self._recess_mask:
+            return None
+
+        # Blocks in the same section or with the same faculty at these periods
+        evict = set(self._overlapping(self._section_blocks, (block.section, day), mask))
+        teaching = set(self._overlapping(self._faculty_blocks, fkey, mask))
+
+        # The faculty's class on the other side of the recess
+        if self._recess_mask and mask & self._recess_mask:
+            if (self._faculty_mask.get(fkey, 0) | mask) & self._recess_mask == self._recess_mask:
+                teaching.update(self._overlapping(self._faculty_blocks, fkey, self._recess_mask & ~mask))
+
+        # Enough of the faculty's other classes that day to stay under the cap, longest first
+        load = self._faculty_load.get(fkey, 0) + block.length - sum(self._blocks[i].length for i in teaching)
+        others = sorted(self._faculty_blocks.get(fkey, set()) - teaching, key=lambda i: self._blocks[i].length)
+        while load > self.problem.max_daily_periods:
+            i = others.pop()
+            teaching.add(i)
+            load -= self._blocks[i].length
+        evict |= teaching
+
+        if not block.rooms:
+            return evict, '', {}
+        # The subject's room that displaces the fewest further blocks; a block using
+        # it that has another of its rooms free at the time moves there instead
+        best = None
+        for room in block.rooms:
+            users, moves = set(), {}
+            for i in self._overlapping(self._room_blocks, (room, day), mask):
+                if i in evict:
+                    continue
+                other = self._blocks[i]
+                other_mask = ((1 << other.length) - 1) << self._placed[i][1]
+                free = [r for r in other.rooms if r != room and r not in moves.values()
+                        and not self._room_mask.get((r, day), 0) & other_mask]
+                if free:
+                    moves[i] = free[0]
+                else:
+                    users.add(i)
+            if best is None or len(users) < len(best[1]):
+                best = (room, users, moves)
+                if not users:
+                    break
+        return evict | best[1], best[0], best[2]
+
+    def _snapshot_restore(self, placements):
+        """Put the placements back as they were in a snapshot of self._placed"""
+        for index in list(self._placed):
+            self._unplace(self._blocks[index])
+        for index, placement in placements.items():
+            self._place(self._blocks[index], *placement)
+
+    def _repair(self, deadline):
+        """
+        Min-conflicts with a tabu list: place an unplaced block where it
+        displaces the least weight of others, a block's weight growing each
+        time it has to be placed again. A block in a room the new one needs
+        is moved to another of its rooms when one is free. A displaced block may not go back to the
+        slot it lost for TABU_TENURE steps, which stops two blocks from
+        pushing each other out forever. When the number of unplaced blocks
+        has not improved for STALL_STEPS steps, the best timetable so far is
+        restored and the blocks around the unplaced ones are shaken loose;
+        after MAX_RESTARTS such restarts in a row the instance is taken to
+        have no complete timetable and the best one is kept.
+        """
+        unplaced = [b.index for b in self._blocks if b.index not in self._placed]
+        best = (len(unplaced), dict(self._placed))
+        tabu = {}  # {(block index, day, start): step until which the move is forbidden}
+        weight = [1] * len(self._blocks)  # grows every time a block has to be placed again
+        stalled = restarts = 0
+        steps = 0
+        while unplaced and steps < self.repair_steps and not self._out_of_time(deadline):
+            steps += 1
+            index = unplaced.pop(self.rng.randrange(len(unplaced)))
+            block = self._blocks[index]
+            weight[index] += 1
+
+            values = [(day, start) for day in range(self.problem.num_days) for start in self._starts[block.length]]
+            self.rng.shuffle(values)
+            choice = None
+            for day, start in values:
+                result = self._conflicts(block, day, start)
+                if result is None:
+                    continue
+                # Tabu moves are still taken when they displace nothing
+                if result[0] and tabu.get((index, day, start), 0) > steps:
+                    continue
+                cost = sum(weight[i] for i in result[0])
+                if choice is None or cost < choice[0]:
+                    choice = (cost, day, start) + result
+                    if not result[0]:
+                        break
+            if choice is None:
+                unplaced.append(index)
+                continue
+
+            _, day, start, evict, room, moves = choice
+            for i in evict:
+                tabu[(i,) + self._placed[i][:2]] = steps + TABU_TENURE
+                self._unplace(self._blocks[i])
+            for i, other_room in moves.items():
+                _, other_start, _ = self._placed[i]
+                self._unplace(self._blocks[i])
+                self._place(self._blocks[i], day, other_start, other_room)
+            self._place(block, day, start, room)
+            unplaced.extend(evict)
+
+            if len(unplaced) < best[0]:
+                best = (len(unplaced), dict(self._placed))
+                stalled = restarts = 0
+            else:
+                stalled += 1
+            if stalled >= STALL_STEPS and unplaced:
+                restarts += 1
+                if restarts > MAX_RESTARTS:
+                    break
+                self._snapshot_restore(best[1])
+                unplaced = [b.index for b in self._blocks if b.index not in self._placed]
+                unplaced.extend(self._shake(unplaced))
+                tabu.clear()
+                stalled = 0
+
+        if len(unplaced) > best[0]:
+            self._snapshot_restore(best[1])
+        self.nodes += steps
+
+    def _shake(self, unplaced):
+        """Unplace a random SHAKE_FRACTION of the blocks related to the unplaced ones; returns them"""
+        related = sorted({n for i in unplaced for n in self._neighbors[i] if n in self._placed})
+        shaken = self.rng.sample(related, max(1, int(len(related) * SHAKE_FRACTION))) if related else []
+        for i in shaken:
+            self._unplace(self._blocks[i])
+        return shaken
+
+    # --- soft-constraint improvement -----------------------------------------
+
+    def _improve(self, deadline):
+        """
+        Move every placed block, in random order, to the slot that fits it
+        with the lowest penalty(). Only the block's section and faculty
+        member are scored: the other sections and faculty are the same in
+        every candidate, so they cannot change which one is best. The other
+        faculty of the section are merged into one, and the faculty member's
+        classes in other sections come from the solver's bitsets.
+        """
+        p = self.problem
+        section_no = {name: i for i, name in enumerate(p.sections)}
+        subject_no = {name: i for i, name in enumerate(sorted({b.subject for b in self._blocks}))}
+        faculty_no = {name: i for i, name in enumerate(sorted({b.faculty for b in self._blocks}))}
+        shape = (p.num_days, p.num_periods, len(section_no))
+        subject = np.full(shape, FREE, dtype=np.int32)
+        teacher = np.full(shape, FREE, dtype=np.int32)
+
+        def fill(block, day, start, value):
+            s = section_no[block.section]
+            subject[day, start:start + block.length, s] = subject_no[block.subject] if value else FREE
+            teacher[day, start:start + block.length, s] = faculty_no[block.faculty] if value else FREE
+
+        for index, (day, start, _) in self._placed.items():
+            fill(self._blocks[index], day, start, True)
+        periods = np.arange(p.num_periods)
+
+        for _ in range(self.improve_passes):
+            order = list(self._placed)
+            self.rng.shuffle(order)
+            for index in order:
+                if self._out_of_time(deadline):
+                    return
+                block = self._blocks[index]
+                current = self._placed[index]
+                self._unplace(block)
+                fill(block, current[0], current[1], False)
+
+                candidates = [(day, start, room) for day in range(p.num_days) for start in self._starts[block.length]
+                              for room in [self._fits(block, day, start)] if room is not False]
+                s, f = section_no[block.section], faculty_no[block.faculty]
+                # Column 0: the section (faculty member as 0, everyone else as 1); column 1: the
+                # faculty member's classes elsewhere, fixed rows included
+                column = teacher[:, :, s]
+                own = np.where(column == f, 0, np.where(column == FREE, FREE, 1))
+                elsewhere = np.array([[0 if self._faculty_mask.get((block.faculty, day), 0) >> q & 1 else FREE
+                                       for q in periods] for day in range(p.num_days)], dtype=np.int32)
+                subjects = np.repeat(subject[None, :, :, s:s + 1], len(candidates), axis=0)
+                teachers = np.repeat(np.stack([own, elsewhere], axis=-1)[None], len(candidates), axis=0)
+                for k, (day, start, _) in enumerate(candidates):
+                    subjects[k, day, start:start + block.length, 0] = subject_no[block.subject]
+                    teachers[k, day, start:start + block.length, 0] = 0
+                scores = penalty(subjects, teachers, len(subject_no), 2, recess_after=p.recess_after)
+
+                best = candidates.index(current) if current in candidates else int(np.argmin(scores))
+                if scores.min() < scores[best]:
+                    best = int(np.argmin(scores))
+                day, start, room = candidates[best]
+                self._place(block, day, start, room)
+                fill(block, day, start, True)
+
+    # --- entry point -------------------------------------------------------
+
+    def solve(self):
+        """Run the solver and return a TimetableSolution"""
+        started = time.monotonic()
+        deadline = started + self.time_limit if self.time_limit else None
+        result = self._search(deadline)
+        if result is not True:
+            self._repair(deadline)
+        self._improve(deadline)
+        unplaced = [b for b in self._blocks if b.index not in self._placed]
+        return TimetableSolution(self.problem, dict(self._placed), unplaced,
+                                 self.nodes, time.monotonic() - started)
+
+
+def generate_timetable(conn, seed=None, time_limit=None):
+    """Load the problem from conn and solve it; nothing is written"""
+    problem = load_problem(conn)
+    return TimetableSolver(problem, seed=seed, time_limit=time_limit).solve()
+
+
+# --- parallel multi-start --------------------------------------------------
+
+# Set in each worker process by _init_worker
+_worker_problem = None
+_best_score = None  # multiprocessing.Value shared by all workers: [score, seed]
+_best_seed = None
+
+
+def _init_worker(problem, best_score, best_seed):
+    global _worker_problem, _best_score, _best_seed
+    _worker_problem, _best_score, _best_seed = problem, best_score, best_seed
+
+
+def _solve_seed(seed, time_limit):
+    """
+    One randomized search in a worker. The placements are sent back only
+    when they beat the best (score, seed) found so far by any worker, so
+    the only thing shared while searching is that best score.
+    """
+    solution = TimetableSolver(_worker_problem, seed=seed, time_limit=time_limit).solve()
+    score = solution.score
+    with _best_score.get_lock():
+        if (score, seed) < (_best_score.value, _best_seed.value):
+            _best_score.value, _best_seed.value = score, seed
+            return score, seed, solution.placements, solution.nodes
+    return score, seed, None, solution.nodes
+
+
+def generate_timetable_parallel(conn, workers=None, time_budget=None, seed=None, restarts=None):
+    """
+    Run independent seeded searches on a process pool and return the best TimetableSolution.
+
+    With a seed, exactly `restarts` searches (seed, seed+1, ...) run and the
+    result does not depend on timing, as long as time_budget is not hit.
+    Without one, searches keep starting until time_budget runs out or a
+    perfect timetable is found.
+    """
+    started = time.monotonic()
+    problem = load_problem(conn)
+    workers = workers if workers else os.cpu_count() or 1
+    deadline = started + time_budget if time_budget else None
+
+    if seed is not None:
+        seeds = iter(range(seed, seed + (restarts if restarts else 2 * workers)))
+    else:
+        base = random.SystemRandom().randrange(2 ** 31)
+        seeds = iter(range(base, base + restarts)) if restarts else None
+        if seeds is None and deadline is None:
+            seeds = iter(range(base, base + 2 * workers))
+
+    def next_seed():
+        if seeds is None:
+            return random.SystemRandom().randrange(2 ** 31)
+        return next(seeds, None)
+
+    def remaining():
+        return None if deadline is None else max(deadline - time.monotonic(), 0.1)
+
+    best_score = multiprocessing.Value('d', float('inf'))
+    best_seed = multiprocessing.Value('d', float('inf'))
+    best = None
+    nodes = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(problem, best_score, best_seed)) as pool:
+        pending = set()
+        for _ in range(workers):
+            s = next_seed()
+            if s is None:
+                break
+            pending.add(pool.submit(_solve_seed, s, remaining()))
+
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            for future in done:
+                score, s, placements, worker_nodes = future.result()
+                nodes += worker_nodes
+                if placements is not None and (best is None or (score, s) < best[:2]):
+                    best = (score, s, placements)
+            out_of_time = deadline is not None and time.monotonic() >= deadline
+            perfect = best is not None and best[0] == 0 and seed is None
+            if out_of_time or perfect:
+                for future in pending:
+                    future.cancel()
+                break
+            for _ in done:
+                s = next_seed()
+                if s is not None:
+                    pending.add(pool.submit(_solve_seed, s, remaining()))
+
+    placements = best[2] if best else {}
+    unplaced = [b for b in problem.blocks if b.index not in placements]
+    solution = TimetableSolution(problem, placements, unplaced, nodes, time.monotonic() - started)
+    solution.seed = int(best[1]) if best else None
+    return solution
+
+
+def write_schedule(conn, solution):
+    """Replace the SCHEDULE rows of the generated sections in one transaction"""
+    sections = solution.problem.sections
+    rows = solution.schedule_rows()
+    with conn:
+        conn.executemany("DELETE FROM SCHEDULE WHERE SECTION=?", [(s,) for s in sections])
+        conn.executemany(
+            "REPLACE INTO SCHEDULE (ID, DAYID, PERIODID, SUBCODE, SECTION, FINI) VALUES (?, ?, ?, ?, ?, ?)",
+            rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import connection
+
+    parser = argparse.ArgumentParser(description="Generate the timetable from the LESSONS table")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for a reproducible timetable")
+    parser.add_argument('--workers', type=int, default=1, help="parallel searches (0 = one per CPU core)")
+    parser.add_argument('--time-budget', type=float, default=None, help="seconds to keep searching")
+    parser.add_argument('--restarts', type=int, default=None, help="number of seeded searches to run")
+    parser.add_argument('--dry-run', action='store_true', help="solve without writing SCHEDULE")
+    parser.add_argument('--db', default=None, help="database file (default files/timetable.db)")
+    args = parser.parse_args()
+
+    with connection(args.db) as conn:
+        if args.workers == 1 and not args.restarts and not args.time_budget:
+            solution = generate_timetable(conn, seed=args.seed)
+        else:
+            solution = generate_timetable_parallel(conn, workers=args.workers or None,
+                                                   time_budget=args.time_budget,
+                                                   seed=args.seed, restarts=args.restarts)
+            print(f"Best search: seed {solution.seed}, score {solution.score}")
+        print(solution.summary())
+        if not args.dry_run:
+            print(f"Wrote {write_schedule(conn, solution)} SCHEDULE rows")
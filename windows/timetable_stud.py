@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import sqlite3
+import sys
+from database import get_connection
+from app_shell import run_standalone
+from timetable_model import get_timetable_model
+from grid_renderer import GridRenderer
 
 days = 5
 periods = 6
 recess_break_aft = 3 # recess after 3rd Period
 section = None
 butt_grid = []
+renderer = None
 
 
 period_names = list(map(lambda x: 'Period ' + str(x), range(1, 6+1)))
@@ -18,49 +23,33 @@ day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thrusday', 'Friday']
 def select_sec():
     global section
     section = str(combo1.get())
-    print(section)
-    update_table(section)
+    # A reload caused by other windows' edits redraws through on_model_change
+    if not model.refresh():
+        update_table(section)
 
 
 
 def update_table(sec):
+    # Only cells that differ from the screen are reconfigured, in one idle pass
+    state = {}
     for i in range(days):
         for j in range(periods):
-            cursor = conn.execute(f"SELECT SUBCODE, FINI FROM SCHEDULE\
-                WHERE DAYID={i} AND PERIODID={j} AND SECTION='{sec}'")
-            cursor = list(cursor)
-            print(cursor)
-            
-            butt_grid[i][j]['bg'] = 'white'
-            if len(cursor) != 0:
-                subcode = cursor[0][0]
-                cur1 = conn.execute(F"SELECT SUBTYPE FROM SUBJECTS WHERE SUBCODE='{subcode}'")
-                cur1 = list(cur1)
-                subtype = cur1[0][0]
-                butt_grid[i][j]['fg'] = 'white'
-                if subtype == 'T':
-                    butt_grid[i][j]['bg'] = 'green'
-                elif subtype == 'P':
-                    butt_grid[i][j]['bg'] = 'blue'
-
-                butt_grid[i][j]['text'] = str(cursor[0][0]) + '\n' + str(cursor[0][1])
-                butt_grid[i][j].update()
-                print(i, j, cursor[0][0])
+            cell = model.cell(sec, i, j)
+            if cell is not None:
+                subtype = model.subject_type(cell[0])
+                bg = 'green' if subtype == 'T' else 'blue' if subtype == 'P' else 'white'
+                state[(i, j)] = {'bg': bg, 'fg': 'white', 'text': str(cell[0]) + '\n' + str(cell[1])}
             else:
-                butt_grid[i][j]['fg'] = 'black'
-                butt_grid[i][j]['text'] = "No Class"
-                butt_grid[i][j].update()
+                state[(i, j)] = {'bg': 'white', 'fg': 'black', 'text': "No Class"}
+    renderer.render(state)
 
 
 
 def process_button(d, p, sec):
-    details = tk.Tk()
-    cursor = conn.execute(f"SELECT SUBCODE, FINI FROM SCHEDULE\
-                WHERE ID='{section+str((d*periods)+p)}'")
-    cursor = list(cursor)
-    if len(cursor) != 0:
-        subcode = str(cursor[0][0]) 
-        fini =  str(cursor[0][1])
+    details = tk.Toplevel()
+    cell = model.cell(section, d, p)
+    if cell is not None:
+        subcode, fini = cell
 
         cur1 = conn.execute(f"SELECT SUBNAME, SUBTYPE FROM SUBJECTS\
             WHERE SUBCODE='{subcode}'")
@@ -82,7 +71,6 @@ def process_button(d, p, sec):
     else:
         subcode = fini = subname = subtype = fname = femail = 'None'
 
-    print(subcode, fini, subname, subtype, fname, femail)
     tk.Label(details, text='Class Details', font=('Consolas', 15, 'bold')).pack(pady=15)
     tk.Label(details, text='Day: '+day_names[d], font=('Consolas'), anchor="w").pack(expand=1, fill=tk.X, padx=20)
     tk.Label(details, text='Period: '+str(p+1), font=('Consolas'), anchor="w").pack(expand=1, fill=tk.X, padx=20)
@@ -101,8 +89,6 @@ def process_button(d, p, sec):
         command=details.destroy
     ).pack(pady=10)
 
-    details.mainloop()
-
 
 
 def student_tt_frame(tt, sec):
@@ -142,7 +128,8 @@ def student_tt_frame(tt, sec):
         height=2
     ).pack(side=tk.LEFT, padx=10)
     
-    global butt_grid
+    global butt_grid, renderer
+    butt_grid = []
     global section
     section = sec
 
@@ -220,20 +207,31 @@ def student_tt_frame(tt, sec):
             b.append(bb)
 
         butt_grid.append(b)
-        # print(b)
         b = []
 
-    print(butt_grid[0][1], butt_grid[1][1])
-    update_table(sec)
+    renderer = GridRenderer.from_rows(butt_grid)
+    if not model.refresh():
+        update_table(sec)
 
 
 
-conn = sqlite3.connect(r'files/timetable.db')
-if __name__ == "__main__":
-    
-    # connecting database
+def on_model_change(changes):
+    # Redraw the shown section when any of its cells changes
+    if section is None or renderer is None:
+        return
+    if changes is None or any(changed[0] == section for changed in changes):
+        update_table(section)
+
 
-    tt = tk.Tk()
+conn = get_connection()
+model = get_timetable_model()
+model.subscribe(on_model_change)
+
+
+def open_window(master=None):
+    """Build the timetable window as a Toplevel of master and return it"""
+    global combo1
+    tt = tk.Toplevel(master)
     tt.title('Student Timetable')
 
 
@@ -251,13 +249,13 @@ if __name__ == "__main__":
     cursor = conn.execute("SELECT DISTINCT SECTION FROM STUDENT")
     sec_li = [row[0] for row in cursor]
     # sec_li.insert(0, 'NULL')
-    print(sec_li)
     combo1 = ttk.Combobox(
         sec_select_f,
         values=sec_li,
     )
     combo1.pack(side=tk.LEFT)
     combo1.current(0)
+    combo1.bind("<<ComboboxSelected>>", lambda e: select_sec())
 
     b = tk.Button(
         sec_select_f,
@@ -269,5 +267,8 @@ if __name__ == "__main__":
     b.pack(side=tk.LEFT, padx=10)
     b.invoke()
 
+    return tt
 
-    tt.mainloop()
\ No newline at end of file
+
+if __name__ == "__main__":
+    run_standalone('timetable_stud', sys.modules[__name__])
@@ -0,0 +1,207 @@
+import tkinter as tk
+from tkinter import ttk
+
+'''
+    VIRTUAL TIMETABLE GRID
+
+    Draws the class x (day, period) timetable on a single Canvas instead of
+    a Frame and Label per cell. Only the rows and columns inside the
+    visible area are drawn, and they are redrawn (once per idle pass) when
+    the grid scrolls, resizes or its data changes, so the cost of the grid
+    depends on the window size, not on the number of classes. Clicks are
+    mapped back to (class_idx, day_idx, period_idx).
+'''
+
+HEADER_HEIGHT = 20   # height of the day row and of the period row
+LABEL_WIDTH = 80     # width of the class name column
+CELL_WIDTH = 60
+CELL_HEIGHT = 40
+
+SELECTED_COLOR = "#e0e0ff"
+CONFLICT_COLOR = "red"
+
+
+class VirtualTimetableGrid(ttk.Frame):
+    """
+    Scrollable canvas grid of class_names x days x periods cells.
+
+    set_cells({(class_idx, day_idx, period_idx): (text, color)}) sets the
+    content; on_click/on_right_click are called as callback(event, cell_key).
+    """
+    def __init__(self, parent, class_names, days, periods, on_click=None, on_right_click=None):
+        super().__init__(parent)
+        self.class_names = list(class_names)
+        self.days = list(days)
+        self.periods = list(periods)
+        self.on_click = on_click
+        self.on_right_click = on_right_click
+
+        self._cells = {}             # {cell_key: (text, color)}
+        self._conflicts = set()      # {cell_key} outlined in red
+        self._selected = None
+        self._rows = list(range(len(self.class_names)))  # class_idx shown, top to bottom
+        self._redraw_id = None
+
+        # Scroll by whole cells so rows and columns stay aligned with the frozen headers
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0,
+                                xscrollincrement=CELL_WIDTH, yscrollincrement=CELL_HEIGHT)
+        self.v_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._yview)
+        self.h_scroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self._xview)
+        self.canvas.configure(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
+
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        self.h_scroll.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Button-1>", lambda e: self._dispatch(e, self.on_click))
+        self.canvas.bind("<Button-3>", lambda e: self._dispatch(e, self.on_right_click))
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", self._on_mousewheel)
+        self.canvas.bind("<Button-5>", self._on_mousewheel)
+
+        self._update_scrollregion()
+
+    # --- data ----------------------------------------------------------------
+
+    def set_cells(self, cells):
+        """Replace the content of every cell; missing cells are empty"""
+        self._cells = dict(cells)
+        self.redraw()
+
+    def set_conflicts(self, cell_keys):
+        self._conflicts = set(cell_keys)
+        self.redraw()
+
+    def set_selected(self, cell_key):
+        self._selected = cell_key
+        self.redraw()
+
+    def show_rows(self, class_indices=None):
+        """Show only these classes (all when None)"""
+        self._rows = list(range(len(self.class_names))) if class_indices is None else list(class_indices)
+        self._update_scrollregion()
+        self.canvas.yview_moveto(0)
+        self.redraw()
+
+    # --- geometry ------------------------------------------------------------
+
+    @property
+    def num_columns(self):
+        return len(self.days) * len(self.periods)
+
+    def _update_scrollregion(self):
+        width = LABEL_WIDTH + self.num_columns * CELL_WIDTH
+        height = 2 * HEADER_HEIGHT + len(self._rows) * CELL_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+
+    def cell_at(self, x, y):
+        """cell_key under widget coordinates (x, y), or None over headers or outside the grid"""
+        x, y = self.canvas.canvasx(x), self.canvas.canvasy(y)
+        if x - self.canvas.canvasx(0) < LABEL_WIDTH or y - self.canvas.canvasy(0) < 2 * HEADER_HEIGHT:
+            return None  # Over the frozen labels or headers
+        column = int((x - LABEL_WIDTH) // CELL_WIDTH)
+        row = int((y - 2 * HEADER_HEIGHT) // CELL_HEIGHT)
+        if not (0 <= column < self.num_columns and 0 <= row < len(self._rows)):
+            return None
+        day_idx, period_idx = divmod(column, len(self.periods))
+        return (self._rows[row], day_idx, period_idx)
+
+    def _visible_range(self):
+        """(first_row, last_row, first_column, last_column) visible below/right of the frozen headers, end exclusive"""
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        first_row = max(int(top // CELL_HEIGHT), 0)
+        last_row = min(int((top + height - 2 * HEADER_HEIGHT) // CELL_HEIGHT) + 1, len(self._rows))
+        first_column = max(int(left // CELL_WIDTH), 0)
+        last_column = min(int((left + width - LABEL_WIDTH) // CELL_WIDTH) + 1, self.num_columns)
+        return first_row, last_row, first_column, last_column
+
+    # --- drawing -------------------------------------------------------------
+
+    def redraw(self):
+        """Redraw the visible part of the grid on the next idle pass"""
+        if self._redraw_id is None:
+            self._redraw_id = self.after_idle(self._draw)
+
+    def _draw(self):
+        self._redraw_id = None
+        canvas = self.canvas
+        canvas.delete("all")
+        first_row, last_row, first_column, last_column = self._visible_range()
+        left, top = canvas.canvasx(0), canvas.canvasy(0)
+        num_periods = len(self.periods)
+
+        # Cells
+        for row in range(first_row, last_row):
+            class_idx = self._rows[row]
+            y = 2 * HEADER_HEIGHT + row * CELL_HEIGHT
+            for column in range(first_column, last_column):
+                day_idx, period_idx = divmod(column, num_periods)
+                key = (class_idx, day_idx, period_idx)
+                text, color = self._cells.get(key, ("", "white"))
+                if key == self._selected:
+                    color = SELECTED_COLOR
+                x = LABEL_WIDTH + column * CELL_WIDTH
+                outline, width = (CONFLICT_COLOR, 2) if key in self._conflicts else ("gray", 1)
+                canvas.create_rectangle(x, y, x + CELL_WIDTH, y + CELL_HEIGHT,
+                                        fill=color, outline=outline, width=width)
+                if text:
+                    canvas.create_text(x + CELL_WIDTH / 2, y + CELL_HEIGHT / 2, text=text,
+                                       font=('Arial', 8), width=CELL_WIDTH - 4)
+
+        # Class labels, frozen on the left
+        for row in range(first_row, last_row):
+            y = 2 * HEADER_HEIGHT + row * CELL_HEIGHT
+            canvas.create_rectangle(left, y, left + LABEL_WIDTH, y + CELL_HEIGHT, fill="#f0f0f0", outline="gray")
+            canvas.create_text(left + 5, y + CELL_HEIGHT / 2, text=self.class_names[self._rows[row]],
+                               anchor=tk.W, font=('Arial', 8, 'bold'))
+
+        # Day and period headers, frozen on top
+        for column in range(first_column, last_column):
+            day_idx, period_idx = divmod(column, num_periods)
+            x = LABEL_WIDTH + column * CELL_WIDTH
+            canvas.create_rectangle(x, top + HEADER_HEIGHT, x + CELL_WIDTH, top + 2 * HEADER_HEIGHT,
+                                    fill="#f0f0f0", outline="gray")
+            canvas.create_text(x + CELL_WIDTH / 2, top + 1.5 * HEADER_HEIGHT, text=self.periods[period_idx],
+                               font=('Arial', 8))
+        first_day = first_column // num_periods if num_periods else 0
+        last_day = -(-last_column // num_periods) if num_periods else 0
+        for day_idx in range(first_day, last_day):
+            x = LABEL_WIDTH + day_idx * num_periods * CELL_WIDTH
+            canvas.create_rectangle(x, top, x + num_periods * CELL_WIDTH, top + HEADER_HEIGHT,
+                                    fill="#f0f0f0", outline="gray")
+            canvas.create_text(max(x, left + LABEL_WIDTH) + 5, top + HEADER_HEIGHT / 2, text=self.days[day_idx],
+                               anchor=tk.W, font=('Arial', 8, 'bold'))
+
+        canvas.create_rectangle(left, top, left + LABEL_WIDTH, top + 2 * HEADER_HEIGHT,
+                                fill="#f0f0f0", outline="gray")
+        canvas.create_text(left + LABEL_WIDTH / 2, top + HEADER_HEIGHT, text="Class", font=('Arial', 8, 'bold'))
+
+    # --- events --------------------------------------------------------------
+
+    def _dispatch(self, event, callback):
+        key = self.cell_at(event.x, event.y)
+        if key is not None and callback:
+            callback(event, key)
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def _xview(self, *args):
+        self.canvas.xview(*args)
+        self.redraw()
+
+    def _on_mousewheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            step = -1
+        else:
+            step = 1
+        if event.state & 0x1:  # Shift scrolls sideways
+            self._xview("scroll", step, "units")
+        else:
+            self._yview("scroll", step, "units")